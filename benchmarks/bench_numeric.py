@@ -0,0 +1,147 @@
+"""بنچمارک و گزارش تفاوت انواع عددی (float، fixed، decimal)
+
+روی مقادیر ریالی تصادفی (اعداد صحیح بزرگ، اعشاری، منفی و صفر):
+
+- سرعت تبدیل متن سلول به عدد با parse_cell_value در test10
+- سرعت محاسبه نسبت‌های هر تحلیلگر روی جدول شرکت × سال
+- گزارش تفاوت هر نوع با decimal به عنوان مرجع: تعداد نسبت‌های متفاوت،
+  بیشینه اختلاف مطلق و نسبی، و تعداد مقادیر تبدیل شده به میلیون که دقیق نیستند
+
+    python benchmarks/bench_numeric.py
+    python benchmarks/bench_numeric.py --rows 20000 --backends float,fixed
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def random_amount(rng):
+    """متن یک مبلغ ریالی تصادفی"""
+    kind = rng.random()
+    if kind < 0.05:
+        return '0'
+    if kind < 0.15:
+        return f"{rng.uniform(-1e6, 1e6):.2f}"
+    value = rng.randint(1, 10 ** rng.randint(3, 16))
+    return str(-value if kind < 0.25 else value)
+
+
+def random_cell(rng):
+    """متن یک سلول صورت مالی با جداکننده هزارگان، پرانتز یا ارقام فارسی"""
+    text = random_amount(rng)
+    negative = text.startswith('-')
+    integer, _, fraction = text.lstrip('-').partition('.')
+    text = f"{int(integer):,}" + (f".{fraction}" if fraction else '')
+    if rng.random() < 0.3:
+        text = text.translate(str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹'))
+    return f"({text})" if negative else text
+
+
+def measure(func, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compare(reference, candidate):
+    """(تعداد متفاوت، بیشینه اختلاف مطلق، بیشینه اختلاف نسبی) دو خروجی نسبت‌ها"""
+    different, max_abs, max_rel = 0, 0.0, 0.0
+    for key, ratios in reference.items():
+        other = candidate.get(key, {})
+        for name, value in ratios.items():
+            expected, actual = float(value), float(other.get(name, float('nan')))
+            if expected != actual:
+                different += 1
+                error = abs(expected - actual)
+                max_abs = max(max_abs, error)
+                max_rel = max(max_rel, error / max(abs(expected), 1e-300))
+        different += len(set(other) - set(ratios))
+    return different, max_abs, max_rel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک و گزارش تفاوت انواع عددی")
+    parser.add_argument('--rows', type=int, default=5000, help="تعداد شرکت-سال")
+    parser.add_argument('--cells', type=int, default=50000, help="تعداد سلول برای تبدیل متن")
+    parser.add_argument('--backends', default='float,fixed,decimal')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('EXALL_QUIET', '1')
+    from log_config import configure_logging
+    configure_logging()
+    from numeric_backend import get_backend
+
+    with tempfile.TemporaryDirectory() as work_dir, \
+            open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        import pisi
+        import hai
+        import test10
+        import test12
+        engines = {
+            'pisi': pisi.ratio_engine,
+            'hai': hai.ratio_engine,
+            'test10': test10.ratio_engine,
+            'test12': test12.FinancialRatioCalculator().engine,
+        }
+
+    rng = random.Random(args.seed)
+    backends = {name: get_backend(name) for name in args.backends.split(',')}
+    reference = get_backend('decimal')
+
+    # تبدیل متن سلول‌ها
+    cells = [random_cell(rng) for _ in range(args.cells)]
+    print(f"{'تبدیل متن':<12}{'نوع':>10}{'زمان (ms)':>12}{'µs/سلول':>10}")
+    for name, backend in backends.items():
+        seconds = measure(lambda: [test10.parse_cell_value(cell, backend) for cell in cells])
+        print(f"{'test10':<12}{name:>10}{seconds * 1000:>12.1f}{seconds / len(cells) * 1e6:>10.2f}")
+
+    # جدول تصادفی متن مقادیر هر شرکت-سال
+    inputs = sorted({name for engine in engines.values() for name in engine.inputs})
+    texts = {(f"co{i // 5}", 1398 + i % 5): {name: random_amount(rng) for name in inputs}
+             for i in range(args.rows)}
+
+    def records(backend, divisor=None):
+        result = {}
+        for key, values in texts.items():
+            numbers = {name: backend.number(text) for name, text in values.items()}
+            if divisor:
+                numbers = {name: backend.scale(value, divisor) for name, value in numbers.items()}
+            result[key] = numbers
+        return result
+
+    print(f"\n{'نسبت‌ها':<12}{'نوع':>10}{'زمان (ms)':>12}{'متفاوت':>10}{'اختلاف مطلق':>14}{'اختلاف نسبی':>14}")
+    for analyzer, engine in engines.items():
+        # test10 مقادیر را به میلیون تبدیل می‌کند
+        divisor = 1_000_000 if analyzer == 'test10' else None
+        expected = reference.evaluate(engine, records(reference, divisor))
+        for name, backend in backends.items():
+            data = records(backend, divisor)
+            seconds = measure(lambda: backend.evaluate(engine, data))
+            different, max_abs, max_rel = compare(expected, backend.evaluate(engine, data))
+            print(f"{analyzer:<12}{name:>10}{seconds * 1000:>12.1f}{different:>10}"
+                  f"{max_abs:>14.3g}{max_rel:>14.3g}")
+
+    # دقت تبدیل به میلیون (مسیر read_variables در test10)
+    print(f"\n{'تبدیل به میلیون':<16}{'نوع':>10}{'نادقیق':>10}")
+    exact = records(reference, 1_000_000)
+    for name, backend in backends.items():
+        scaled = records(backend, 1_000_000)
+        inexact = sum(reference.to_decimal(scaled[key][metric]) != value
+                      for key, values in exact.items() for metric, value in values.items())
+        print(f"{'test10':<16}{name:>10}{inexact:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""بنچمارک موتور نسبت‌ها روی جدول شرکت × سال
+
+برای هر تحلیلگر یک جدول تصادفی با تعداد داده شده شرکت-سال ساخته می‌شود و
+زمان این موارد مقایسه می‌شود:
+
+- evaluate روی کل جدول (محاسبه برداری همه نسبت‌ها)
+- calculate_ratios تحلیلگر برای تک‌تک سطرها (مسیر هر فایل)
+
+    python benchmarks/bench_ratios.py
+    python benchmarks/bench_ratios.py --rows 100000 --only test10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def random_panel(inputs, rows, seed=0, zero_rate=0.05):
+    """جدول تصادفی شرکت × سال با درصدی مقدار صفر برای آزمودن ماسک‌ها"""
+    rng = np.random.default_rng(seed)
+    companies = [f"co{i}" for i in range(max(1, rows // 5))]
+    index = pd.MultiIndex.from_product([companies, range(1398, 1403)], names=['شرکت', 'سال'])[:rows]
+    values = rng.lognormal(mean=20, sigma=2, size=(len(index), len(inputs)))
+    values[rng.random(values.shape) < zero_rate] = 0.0
+    return pd.DataFrame(values, index=index, columns=inputs)
+
+
+def measure(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک موتور نسبت‌ها روی جدول شرکت × سال")
+    parser.add_argument('--rows', type=int, default=10_000, help="تعداد شرکت-سال")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--scalar-rows', type=int, default=2_000,
+                        help="تعداد سطر برای مسیر تک‌سطری (زمان به کل جدول تعمیم داده می‌شود)")
+    parser.add_argument('--only', default='')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('EXALL_QUIET', '1')
+    from log_config import configure_logging
+    configure_logging()
+
+    with tempfile.TemporaryDirectory() as work_dir, \
+            open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        import pisi
+        import hai
+        import test10
+        import test12
+        analyzers = {
+            'pisi': (pisi.ratio_engine, pisi.FinancialAnalyzer(work_dir).calculate_ratios, float),
+            'hai': (hai.ratio_engine, hai.FinancialAnalyzer(work_dir).calculate_ratios, float),
+            'test10': (test10.ratio_engine, test10.FinancialAnalyzer(work_dir).calculate_ratios,
+                       lambda v: Decimal(str(v))),
+            'test12': (test12.FinancialRatioCalculator().engine,
+                       test12.FinancialRatioCalculator().calculate_all_ratios, lambda v: Decimal(str(v))),
+        }
+
+    print(f"{'تحلیلگر':<10}{'سطر':>8}{'برداری (ms)':>14}{'تک‌سطری (ms)':>16}{'نسبت':>8}")
+    for name, (engine, calculate, convert) in analyzers.items():
+        if args.only not in name:
+            continue
+        panel = random_panel(engine.inputs, args.rows)
+        records = [{column: convert(value) for column, value in row.items()}
+                   for row in panel.head(args.scalar_rows).to_dict('records')]
+
+        vectorized = measure(lambda: engine.evaluate(panel), args.repeats)
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            scalar = measure(lambda: [calculate(record) for record in records], 1)
+        scalar *= len(panel) / len(records)
+
+        print(f"{name:<10}{len(panel):>8}{vectorized * 1000:>14.2f}{scalar * 1000:>16.1f}"
+              f"{scalar / vectorized:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""بنچمارک توابع جستجو و تبدیل عدد روی صورت‌های مالی مصنوعی در چند اندازه
+
+برای هر اندازه (سطر x ستون) یک فایل مصنوعی ساخته می‌شود و زمان این توابع
+اندازه‌گیری می‌شود:
+
+- find_value_in_df در pisi، hai و test12 و get_value_by_row در test10
+  (یک دور کامل روی همه متغیرهای هر تحلیلگر، یعنی هزینه جستجوی یک فایل)؛
+  برای pisi و hai یک بار با ساخت نمایه در هر فراخوانی و یک بار با نمایه مشترک
+- clean_number در pisi و hai، parse_cell_value در test10 و
+  convert_to_number در test12 روی همه سلول‌های شیت
+- read_financial_data کامل (خواندن فایل + استخراج) با کش غیرفعال
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --scales 60x4,500x8,2000x16 --repeats 5 --only pisi
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# اندازه‌گیری read_financial_data بدون کش شیت‌ها و نتایج
+os.environ['EXALL_CACHE'] = '0'
+
+from synthetic import make_statement, write_workbook  # noqa: E402
+
+
+def parse_scales(text):
+    return [tuple(int(part) for part in scale.split('x')) for scale in text.split(',')]
+
+
+def measure(func, repeats):
+    """میانه زمان اجرای func در چند تکرار (خروجی چاپی تابع دور ریخته می‌شود)"""
+    times = []
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def load_analyzers(work_dir):
+    """ساخت آنالایزرها با خروجی چاپی خاموش"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        import pisi
+        import hai
+        import test10
+        import test12
+        return {
+            'pisi': pisi.FinancialAnalyzer(work_dir),
+            'hai': hai.FinancialAnalyzer(work_dir),
+            'test10': test10.FinancialAnalyzer(work_dir),
+            'test12': test12.FinancialAnalyzer(work_dir),
+        }
+
+
+def benchmarks(analyzers, file_path):
+    """فهرست (نام، تابع) بنچمارک‌ها برای یک فایل"""
+    import pisi as pisi_module
+    import hai as hai_module
+    import test10
+    import test12
+
+    df = pd.read_excel(file_path, header=None)
+    df_text = pd.read_excel(file_path, header=None, dtype=str, na_filter=False)
+    cells = df.values.ravel().tolist()
+
+    pisi, hai = analyzers['pisi'], analyzers['hai']
+    t10, t12 = analyzers['test10'], analyzers['test12']
+
+    # نمایه‌های هر شیت یک بار ساخته و بین متغیرها مشترک می‌شوند (مانند read_financial_data)
+    def pisi_shared():
+        index = pisi_module.CellIndex(df, pisi.clean_number)
+        return [pisi.find_value_in_df(df, patterns, index=index) for patterns in pisi.search_patterns.values()]
+
+    def hai_shared():
+        grid = hai_module.CellGrid(df, hai.clean_number)
+        return [hai.find_value_in_df(df, patterns, grid) for patterns in hai.search_patterns.values()]
+
+    return [
+        ('pisi.find_value_in_df',
+         lambda: [pisi.find_value_in_df(df, patterns) for patterns in pisi.search_patterns.values()]),
+        ('pisi.find_value_in_df+index', pisi_shared),
+        ('hai.find_value_in_df',
+         lambda: [hai.find_value_in_df(df, patterns) for patterns in hai.search_patterns.values()]),
+        ('hai.find_value_in_df+grid', hai_shared),
+        ('test12.find_value_in_df',
+         lambda: [t12.find_value_in_df(df_text, terms) for terms in t12.search_terms.values()]),
+        ('test10.get_value_by_row',
+         lambda: [t10.get_value_by_row(df, terms) for terms in t10.variables_mapping.values()]),
+        ('pisi.clean_number', lambda: [pisi.clean_number(value) for value in cells]),
+        ('hai.clean_number', lambda: [hai.clean_number(value) for value in cells]),
+        ('test10.parse_cell_value', lambda: [test10.parse_cell_value(value) for value in cells]),
+        ('test12.convert_to_number', lambda: [test12.convert_to_number(value) for value in cells]),
+        ('pisi.read_financial_data', lambda: pisi.read_financial_data(file_path)),
+        ('hai.read_financial_data', lambda: hai.read_financial_data(file_path)),
+        ('test10.read_variables', lambda: t10.read_variables(file_path)),
+        ('test12.process_file', lambda: t12.process_file(Path(file_path))),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک توابع جستجو روی صورت‌های مالی مصنوعی")
+    parser.add_argument('--scales', default='60x4,300x8,1500x16', help="اندازه‌ها به شکل سطرxستون، جدا با ویرگول")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--only', default='', help="فقط بنچمارک‌هایی که نامشان شامل این متن است")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        analyzers = load_analyzers(work_dir)
+
+        print(f"{'بنچمارک':<28}{'اندازه':>12}{'میانه (ms)':>14}")
+        for rows, columns in parse_scales(args.scales):
+            frames, _ = make_statement(seed=args.seed, rows=rows, columns=columns)
+            file_path = str(Path(work_dir) / f"1401_bench_{rows}x{columns}.xlsx")
+            write_workbook(file_path, frames)
+
+            for name, func in benchmarks(analyzers, file_path):
+                if args.only not in name:
+                    continue
+                seconds = measure(func, args.repeats)
+                print(f"{name:<28}{f'{rows}x{columns}':>12}{seconds * 1000:>14.1f}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
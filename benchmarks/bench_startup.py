@@ -0,0 +1,94 @@
+"""اندازه‌گیری زمان شروع سرد (cold start) اجرای فقط استخراج
+
+هر سناریو در یک مفسر تازه پایتون چند بار اجرا می‌شود و کمینه و میانه زمان
+دیوار گزارش می‌شود. یک اجرای اضافه با -X importtime نشان می‌دهد کدام
+کتابخانه‌های سنگین بارگذاری شده‌اند و پرهزینه‌ترین importها کدام‌اند.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py path/to/1401_company.xlsx --analyzer hai --repeats 10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'scipy', 'skimage', 'cv2')
+
+
+def scenarios(files, analyzer):
+    """فرمان‌های مورد اندازه‌گیری به صورت (نام، آرگومان‌های پایتون)"""
+    items = [
+        ('python -c pass', ['-c', 'pass']),
+        ('import pandas', ['-c', 'import pandas']),
+        ('exall --help', ['exall.py', '--help']),
+        ('import pisi', ['-c', 'import pisi']),
+        ('import hai', ['-c', 'import hai']),
+        ('import test10', ['-c', 'import test10']),
+    ]
+    if files:
+        items.append((f'exall extract ({analyzer})',
+                      ['exall.py', 'extract', '--analyzer', analyzer, '--base-folder', tempfile.gettempdir(),
+                       *map(str, files)]))
+    return items
+
+
+def run(args, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def import_profile(args, env, top=5):
+    """ماژول‌های سنگین بارگذاری شده و پرهزینه‌ترین importهای سطح اول"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    loaded = set()
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        loaded.add(module.split('.')[0])
+        # importهای سطح اول با یک فاصله شروع می‌شوند
+        if name.startswith(' ') and not name.startswith('  '):
+            top_level.append((int(cumulative) / 1000, module))
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    return heavy, sorted(top_level, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="زمان شروع سرد فرمان‌های exall")
+    parser.add_argument('files', nargs='*', help="فایل‌های اکسل برای سناریوی extract")
+    parser.add_argument('--analyzer', default='pisi')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warm-cache', action='store_true',
+                        help="استفاده از کش پیش‌فرض شیت‌ها به جای یک پوشه کش خالی در هر اجرا")
+    args = parser.parse_args(argv)
+
+    print(f"{'سناریو':<28}{'کمینه (ms)':>12}{'میانه (ms)':>12}  کتابخانه‌های سنگین / پرهزینه‌ترین importها")
+    for name, command in scenarios(args.files, args.analyzer):
+        times = []
+        for i in range(args.repeats + 1):
+            env = dict(os.environ)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if not args.warm_cache:
+                    env['EXALL_CACHE_DIR'] = cache_dir
+                if i < args.repeats:
+                    times.append(run(command, env))
+                else:
+                    heavy, top = import_profile(command, env)
+
+        imports = ', '.join(f"{module} {ms:.0f}ms" for ms, module in top)
+        print(f"{name:<28}{min(times) * 1000:>12.0f}{statistics.median(times) * 1000:>12.0f}  "
+              f"{', '.join(heavy) or '-'} | {imports}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""اجرای کامل استخراج روی یک پوشه فایل با حقیقت زمینه و گزارش سرعت و دقت
+
+برای هر تحلیلگر (pisi، hai، test10) همه فایل‌های پوشه در یک پردازش تازه
+استخراج می‌شوند و این موارد گزارش می‌شود:
+
+- تعداد فایل در ثانیه و صدک‌های ۵۰ و ۹۵ زمان هر فایل
+- بیشینه حافظه مقیم (peak RSS) پردازش تحلیلگر
+- دقت استخراج هر متغیر در مقایسه با ground_truth.json
+
+پوشه ورودی همان خروجی benchmarks/synthetic.py است (فایل‌های year_company.xlsx
+و ground_truth.json). مقایسه به صورت پیش‌فرض روی قدر مطلق مقادیر است چون
+تحلیلگرها علامت اقلامی مانند بهای تمام شده را متفاوت برمی‌گردانند.
+
+    python benchmarks/synthetic.py /tmp/corpus --files 50
+    python benchmarks/corpus_harness.py /tmp/corpus
+    python benchmarks/corpus_harness.py /tmp/corpus --pipelines pisi,hai --json report.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import resource
+import contextlib
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# نام متغیرهای هر تحلیلگر -> نام متغیر حقیقت زمینه و ضریب واحد خروجی
+PIPELINES = {
+    'pisi': {
+        'unit': 1,
+        'metrics': {
+            'دارایی جاری': 'دارایی جاری',
+            'کل دارایی ها': 'کل دارایی ها',
+            'بدهی جاری': 'بدهی جاری',
+            'کل بدهی ها': 'کل بدهی ها',
+            'فروش': 'فروش',
+            'سود ناخالص': 'سود ناخالص',
+            'سود عملیاتی': 'سود عملیاتی',
+            'سود خالص': 'سود خالص',
+            'موجودی کالا': 'موجودی کالا',
+            'حساب های دریافتنی': 'حساب های دریافتنی',
+        },
+    },
+    'test10': {
+        # read_variables مقادیر را به میلیون تبدیل می‌کند
+        'unit': 1_000_000,
+        'metrics': {
+            'موجودی نقد': 'موجودی نقد',
+            'دارایی‌های جاری': 'دارایی جاری',
+            'موجودی مواد و کالا': 'موجودی کالا',
+            'بدهی‌های جاری': 'بدهی جاری',
+            'سود خالص': 'سود خالص',
+            'جمع دارایی‌ها': 'کل دارایی ها',
+            'جمع حقوق مالکانه': 'حقوق مالکانه',
+            'فروش': 'فروش',
+            'سود عملیاتی': 'سود عملیاتی',
+            'سود ناخالص': 'سود ناخالص',
+            'دریافتنی‌های تجاری و سایر دریافتنی‌ها': 'حساب های دریافتنی',
+            'بهای تمام شده کالای فروش رفته': 'بهای تمام شده',
+            'جمع بدهی‌ها': 'کل بدهی ها',
+        },
+    },
+}
+PIPELINES['hai'] = PIPELINES['pisi']
+
+
+def percentile(values, q):
+    """صدک q (۰ تا ۱۰۰) با روش نزدیک‌ترین رتبه"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb():
+    """بیشینه حافظه مقیم پردازش جاری به مگابایت"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # لینوکس کیلوبایت و macOS بایت گزارش می‌کند
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_pipeline(name, files, work_dir, use_cache):
+    """استخراج همه فایل‌ها با یک تحلیلگر در پردازش جاری؛ خروجی زمان‌ها، مقادیر و حافظه"""
+    sys.path.insert(0, str(ROOT))
+    if not use_cache:
+        os.environ['EXALL_CACHE'] = '0'
+
+    from extraction_service import ANALYZERS, extract_file
+
+    latencies = []
+    extracted = {}
+    errors = {}
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        import importlib
+        module = importlib.import_module(ANALYZERS[name])
+        analyzer = module.FinancialAnalyzer(work_dir)
+
+        start_all = time.perf_counter()
+        for file_path in files:
+            start = time.perf_counter()
+            try:
+                metrics, _ = extract_file(analyzer, name, Path(file_path))
+                extracted[Path(file_path).name] = {
+                    metric: float(value) for metric, value in (metrics or {}).items()
+                    if value is not None and metric in PIPELINES[name]['metrics']
+                }
+            except Exception as e:
+                errors[Path(file_path).name] = str(e)
+            latencies.append(time.perf_counter() - start)
+        total = time.perf_counter() - start_all
+
+    return {
+        'pipeline': name,
+        'files': len(files),
+        'seconds': total,
+        'latencies': latencies,
+        'peak_rss_mb': peak_rss_mb(),
+        'extracted': extracted,
+        'errors': errors,
+    }
+
+
+def score(name, extracted, truth, rel_tol=1e-6, signed=False):
+    """دقت هر متغیر: تعداد درست، اشتباه و یافت نشده"""
+    config = PIPELINES[name]
+    accuracy = {}
+    for metric, truth_metric in config['metrics'].items():
+        counts = {'correct': 0, 'wrong': 0, 'missing': 0}
+        for file_name, truth_values in truth.items():
+            expected = truth_values.get(truth_metric)
+            if expected is None:
+                continue
+            value = extracted.get(file_name, {}).get(metric)
+            # test10 مقدار صفر را برای متغیر یافت نشده برمی‌گرداند
+            if value is None or value == 0:
+                counts['missing'] += 1
+                continue
+            value *= config['unit']
+            if not signed:
+                value, expected = abs(value), abs(expected)
+            if abs(value - expected) <= rel_tol * max(abs(expected), 1):
+                counts['correct'] += 1
+            else:
+                counts['wrong'] += 1
+        total = sum(counts.values())
+        counts['accuracy'] = counts['correct'] / total if total else 0.0
+        accuracy[truth_metric] = counts
+    return accuracy
+
+
+def run_isolated(name, files, work_dir, use_cache):
+    """اجرای تحلیلگر در یک پردازش تازه (spawn) تا حافظه و importها مستقل باشند"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_pipeline, name, files, work_dir, use_cache).result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="سنجش سرعت و دقت استخراج روی یک مجموعه فایل")
+    parser.add_argument('corpus', help="پوشه فایل‌ها به همراه ground_truth.json")
+    parser.add_argument('--pipelines', default='pisi,hai,test10')
+    parser.add_argument('--truth', help="مسیر فایل حقیقت زمینه (پیش‌فرض corpus/ground_truth.json)")
+    parser.add_argument('--cache', action='store_true', help="استفاده از کش شیت‌ها و نتایج")
+    parser.add_argument('--signed', action='store_true', help="مقایسه مقادیر با علامت")
+    parser.add_argument('--rel-tol', type=float, default=1e-6)
+    parser.add_argument('--json', help="ذخیره گزارش کامل در فایل JSON")
+    args = parser.parse_args(argv)
+
+    corpus = Path(args.corpus)
+    with open(args.truth or corpus / 'ground_truth.json', encoding='utf-8') as f:
+        truth = json.load(f)
+    files = [str(corpus / name) for name in sorted(truth) if (corpus / name).exists()]
+    if not files:
+        print("هیچ فایلی از حقیقت زمینه در پوشه یافت نشد")
+        return 1
+
+    report = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in args.pipelines.split(','):
+            result = run_isolated(name, files, work_dir, args.cache)
+            result['accuracy'] = score(name, result['extracted'], truth, args.rel_tol, args.signed)
+            report.append(result)
+
+    print(f"\n{'تحلیلگر':<10}{'فایل':>6}{'فایل/ثانیه':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+          f"{'RSS (MB)':>10}{'دقت':>8}{'خطا':>6}")
+    for result in report:
+        latencies_ms = [t * 1000 for t in result['latencies']]
+        correct = sum(m['correct'] for m in result['accuracy'].values())
+        total = sum(m['correct'] + m['wrong'] + m['missing'] for m in result['accuracy'].values())
+        result['files_per_sec'] = result['files'] / result['seconds'] if result['seconds'] else 0.0
+        result['p50_ms'] = percentile(latencies_ms, 50)
+        result['p95_ms'] = percentile(latencies_ms, 95)
+        result['overall_accuracy'] = correct / total if total else 0.0
+        print(f"{result['pipeline']:<10}{result['files']:>6}{result['files_per_sec']:>12.2f}"
+              f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['peak_rss_mb']:>10.1f}"
+              f"{result['overall_accuracy']:>8.1%}{len(result['errors']):>6}")
+
+    for result in report:
+        print(f"\nدقت هر متغیر - {result['pipeline']}:")
+        for metric, counts in result['accuracy'].items():
+            print(f"  {metric:<22}{counts['accuracy']:>8.1%}   درست {counts['correct']}"
+                  f" | اشتباه {counts['wrong']} | یافت نشده {counts['missing']}")
+
+    if args.json:
+        for result in report:
+            del result['extracted']
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""تولید صورت‌های مالی مصنوعی فارسی برای بنچمارک و سنجش دقت
+
+هر فایل شامل صورت وضعیت مالی و صورت سود و زیان با ساختار رایج گزارش‌های
+کدال است (شرح، یادداشت، سال جاری، سال قبل) و مقادیر واقعی متغیرها به عنوان
+حقیقت زمینه (ground truth) برگردانده می‌شود. شکل برچسب‌ها و اعداد مانند
+فایل‌های واقعی تغییر می‌کند:
+
+- نیم‌فاصله (ZWNJ) به صورت فاصله یا حذف شده
+- حروف عربی ي و ك به جای ی و ک
+- اعداد فارسی، جداکننده هزارگان و منفی داخل پرانتز
+- سطرهای اضافی، سطرهای خالی و اعداد پراکنده به عنوان نویز
+
+    python benchmarks/synthetic.py out_dir --files 20 --rows 120 --columns 6
+"""
+import json
+import random
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+ZWNJ = '‌'
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+
+# متغیرهای حقیقت زمینه و برچسب‌های رایج هر کدام در صورت‌های مالی
+METRICS = {
+    'موجودی نقد': ['موجودی نقد', 'وجه نقد', 'موجودی نقد و بانک'],
+    'حساب های دریافتنی': ['دریافتنی‌های تجاری و سایر دریافتنی‌ها', 'حساب‌های دریافتنی تجاری'],
+    'موجودی کالا': ['موجودی مواد و کالا', 'موجودی کالا'],
+    'دارایی جاری': ['جمع دارایی‌های جاری'],
+    'کل دارایی ها': ['جمع دارایی‌ها', 'جمع کل دارایی‌ها'],
+    'بدهی جاری': ['جمع بدهی‌های جاری'],
+    'کل بدهی ها': ['جمع بدهی‌ها', 'جمع کل بدهی‌ها'],
+    'حقوق مالکانه': ['جمع حقوق مالکانه', 'جمع حقوق صاحبان سهام'],
+    'فروش': ['درآمدهای عملیاتی', 'فروش خالص'],
+    'بهای تمام شده': ['بهای تمام شده درآمدهای عملیاتی', 'بهای تمام شده کالای فروش رفته'],
+    'سود ناخالص': ['سود ناخالص', 'سود (زیان) ناخالص'],
+    'سود عملیاتی': ['سود عملیاتی', 'سود (زیان) عملیاتی'],
+    'سود خالص': ['سود خالص', 'سود (زیان) خالص'],
+}
+
+# سطرهای جزئی بدون متغیر متناظر که بین اقلام اصلی قرار می‌گیرند
+FILLER_LABELS = [
+    'سرمایه‌گذاری‌های کوتاه‌مدت', 'پیش‌پرداخت‌ها', 'سایر دارایی‌ها', 'دارایی‌های ثابت مشهود',
+    'دارایی‌های نامشهود', 'سرمایه‌گذاری‌های بلندمدت', 'پرداختنی‌های تجاری و سایر پرداختنی‌ها',
+    'مالیات پرداختنی', 'سود سهام پرداختنی', 'تسهیلات مالی', 'ذخیره مزایای پایان خدمت کارکنان',
+    'پیش‌دریافت‌ها', 'سرمایه', 'اندوخته قانونی', 'سود انباشته', 'هزینه‌های فروش، اداری و عمومی',
+    'سایر درآمدها', 'سایر هزینه‌ها', 'هزینه‌های مالی', 'سایر درآمدها و هزینه‌های غیرعملیاتی',
+    'مالیات بر درآمد', 'سود پایه هر سهم', 'توضیحات', 'یادداشت‌های توضیحی همراه، بخش جدایی‌ناپذیر صورت‌های مالی است',
+]
+
+
+def persian_digits(text):
+    return ''.join(PERSIAN_DIGITS[int(c)] if c.isdigit() else c for c in text)
+
+
+def label_variant(label, rng, variant_rate):
+    """یکی از شکل‌های رایج نوشتاری برچسب"""
+    if rng.random() < variant_rate:
+        label = label.replace(ZWNJ, rng.choice([' ', '']))
+    if rng.random() < variant_rate:
+        label = label.replace('ی', 'ي').replace('ک', 'ك')
+    if rng.random() < variant_rate / 2:
+        label = label.replace(' ', '  ', 1) + rng.choice(['', ' ', ' :'])
+    return label
+
+
+def value_variant(value, rng, text_rate):
+    """نمایش عدد به صورت عدد اکسل یا متن با جداکننده، ارقام فارسی و پرانتز"""
+    if rng.random() >= text_rate:
+        return value
+
+    text = f"{abs(value):,}" if rng.random() < 0.8 else str(abs(value))
+    if rng.random() < 0.5:
+        text = persian_digits(text)
+    if value < 0:
+        text = f"({text})" if rng.random() < 0.8 else f"-{text}"
+    return text
+
+
+def statement_items(rng, scale, loss_rate):
+    """اقلام ترازنامه و سود و زیان سال جاری و قبل؛ جمع‌ها با اجزا سازگارند"""
+
+    def year_values(growth):
+        cash = rng.randint(2, 20) * scale
+        receivables = rng.randint(10, 60) * scale
+        inventory = rng.randint(10, 80) * scale
+        other_current = rng.randint(1, 30) * scale
+        current_assets = cash + receivables + inventory + other_current
+        total_assets = current_assets + rng.randint(50, 300) * scale
+        current_liabilities = rng.randint(20, 120) * scale
+        total_liabilities = current_liabilities + rng.randint(5, 100) * scale
+        equity = total_assets - total_liabilities
+
+        sales = rng.randint(100, 600) * scale
+        cost = -int(sales * rng.uniform(0.55, 0.9))
+        gross = sales + cost
+        operating = gross - rng.randint(1, 15) * scale
+        net = int(operating * rng.uniform(0.6, 0.9))
+        if rng.random() < loss_rate:
+            operating = -abs(operating) // 4
+            net = -abs(net) // 3
+
+        values = {
+            'موجودی نقد': cash,
+            'حساب های دریافتنی': receivables,
+            'موجودی کالا': inventory,
+            'دارایی جاری': current_assets,
+            'کل دارایی ها': total_assets,
+            'بدهی جاری': current_liabilities,
+            'کل بدهی ها': total_liabilities,
+            'حقوق مالکانه': equity,
+            'فروش': sales,
+            'بهای تمام شده': cost,
+            'سود ناخالص': gross,
+            'سود عملیاتی': operating,
+            'سود خالص': net,
+        }
+        return {metric: int(value * growth) for metric, value in values.items()}
+
+    return year_values(1.0), year_values(rng.uniform(0.7, 1.0))
+
+
+BALANCE_SHEET = ['موجودی نقد', 'حساب های دریافتنی', 'موجودی کالا', 'دارایی جاری', 'کل دارایی ها',
+                 'بدهی جاری', 'کل بدهی ها', 'حقوق مالکانه']
+INCOME_STATEMENT = ['فروش', 'بهای تمام شده', 'سود ناخالص', 'سود عملیاتی', 'سود خالص']
+
+
+def statement_rows(title, metrics, current, prior, year, rng, options):
+    """سطرهای یک صورت مالی با عنوان، سرستون، اقلام اصلی و سطرهای نویز"""
+    columns = options['columns']
+    rows = [
+        [options['company']] + [''] * (columns - 1),
+        [title] + [''] * (columns - 1),
+        [persian_digits(f"سال مالی منتهی به ۲۹ اسفند {year}")] + [''] * (columns - 1),
+        [],
+        ['شرح', 'یادداشت', persian_digits(str(year)), persian_digits(str(year - 1))]
+        + [f"ستون {i}" for i in range(4, columns)],
+    ]
+
+    body = []
+    for note, metric in enumerate(metrics, start=rng.randint(3, 9)):
+        label = label_variant(rng.choice(METRICS[metric]), rng, options['variant_rate'])
+        if rng.random() >= options['note_rate']:
+            note = ''
+        elif rng.random() < 0.5:
+            note = persian_digits(str(note))
+        body.append([label, note,
+                     value_variant(current[metric], rng, options['text_rate']),
+                     value_variant(prior[metric], rng, options['text_rate'])])
+
+    # سطرهای جزئی و خالی به عنوان نویز بین اقلام اصلی
+    filler_count = max(0, options['rows'] // options['statements'] - len(rows) - len(body))
+    for _ in range(filler_count):
+        position = rng.randint(0, len(body))
+        if rng.random() < options['noise']:
+            body.insert(position, [])
+            continue
+        label = label_variant(rng.choice(FILLER_LABELS), rng, options['variant_rate'])
+        amount = rng.randint(1, 50) * options['scale'] // rng.choice([1, 10, 100])
+        if rng.random() < 0.3:
+            amount = -amount
+        body.insert(position, [label, '',
+                               value_variant(amount, rng, options['text_rate']),
+                               value_variant(int(amount * rng.uniform(0.6, 1.2)), rng, options['text_rate'])])
+
+    rows += body
+    for row in rows:
+        row.extend([''] * (columns - len(row)))
+        del row[columns:]
+        # ستون‌های اضافی: اعداد پراکنده (درصد تغییر، ستون‌های کمکی)
+        for j in range(4, columns):
+            if row[0] and rng.random() < options['noise']:
+                row[j] = round(rng.uniform(-100, 100), 1)
+    return rows
+
+
+def make_statement(seed=0, rows=60, columns=4, sheets=1, variant_rate=0.5, text_rate=0.3,
+                   noise=0.1, loss_rate=0.1, note_rate=0.5, scale=1_000_000, year=1401,
+                   company='شرکت نمونه'):
+    """ساخت یک فایل مصنوعی؛ خروجی (دیکشنری نام شیت -> دیتافریم، حقیقت زمینه سال جاری)
+
+    rows تعداد تقریبی سطرهای هر شیت، columns تعداد ستون‌ها (حداقل ۴) و sheets
+    تعداد شیت‌ها است. note_rate احتمال درج شماره یادداشت کنار هر قلم اصلی است
+    (عدد کوچکی که نزدیک‌ترین عدد به برچسب است). با یک شیت هر دو صورت مالی پشت سر هم در شیت اول قرار
+    می‌گیرند؛ با دو شیت یا بیشتر، سود و زیان در شیت دوم و بقیه شیت‌ها یادداشت‌های
+    پر از عدد هستند.
+    """
+    rng = random.Random(seed)
+    columns = max(4, columns)
+    current, prior = statement_items(rng, scale, loss_rate)
+    options = {
+        'columns': columns, 'rows': rows, 'variant_rate': variant_rate, 'text_rate': text_rate,
+        'noise': noise, 'note_rate': note_rate, 'scale': scale, 'company': company,
+        'statements': 2 if sheets == 1 else 1,
+    }
+
+    balance = statement_rows('صورت وضعیت مالی', BALANCE_SHEET, current, prior, year, rng, options)
+    income = statement_rows('صورت سود و زیان', INCOME_STATEMENT, current, prior, year, rng, options)
+
+    if sheets == 1:
+        grids = {'صورت‌های مالی': balance + [[''] * columns] + income}
+    else:
+        grids = {'صورت وضعیت مالی': balance, 'صورت سود و زیان': income}
+        for i in range(2, sheets):
+            grids[f"یادداشت {persian_digits(str(i + 1))}"] = [
+                [label_variant(rng.choice(FILLER_LABELS), rng, variant_rate)]
+                + [rng.randint(1, 1000) * scale // 100 for _ in range(columns - 1)]
+                for _ in range(rows)
+            ]
+
+    frames = {name: pd.DataFrame(grid) for name, grid in grids.items()}
+    return frames, current
+
+
+def write_workbook(path, frames):
+    """نوشتن شیت‌ها بدون سرستون و ایندکس، مانند خروجی کدال"""
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        for name, df in frames.items():
+            df.to_excel(writer, sheet_name=name[:31], header=False, index=False)
+
+
+def generate_corpus(out_dir, files=20, years=(1398, 1399, 1400, 1401, 1402), seed=0, **options):
+    """ساخت مجموعه فایل‌های year_company.xlsx و ground_truth.json کنار آن‌ها"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    truth = {}
+    for i in range(files):
+        year = years[i % len(years)]
+        company = f"co{i // len(years)}"
+        frames, values = make_statement(seed=seed + i, year=year, company=company, **options)
+        file_name = f"{year}_{company}.xlsx"
+        write_workbook(out_dir / file_name, frames)
+        truth[file_name] = values
+
+    with open(out_dir / 'ground_truth.json', 'w', encoding='utf-8') as f:
+        json.dump(truth, f, ensure_ascii=False, indent=2)
+    return truth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="تولید صورت‌های مالی مصنوعی با حقیقت زمینه")
+    parser.add_argument('out_dir')
+    parser.add_argument('--files', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=60)
+    parser.add_argument('--columns', type=int, default=4)
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--variant-rate', type=float, default=0.5, help="احتمال هر تغییر نوشتاری برچسب")
+    parser.add_argument('--text-rate', type=float, default=0.3, help="احتمال نوشتن عدد به صورت متن")
+    parser.add_argument('--noise', type=float, default=0.1, help="احتمال سطر خالی و اعداد پراکنده")
+    parser.add_argument('--loss-rate', type=float, default=0.1, help="احتمال سال زیان‌ده")
+    parser.add_argument('--note-rate', type=float, default=0.5, help="احتمال شماره یادداشت کنار اقلام اصلی")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    generate_corpus(args.out_dir, files=args.files, seed=args.seed, rows=args.rows, columns=args.columns,
+                    sheets=args.sheets, variant_rate=args.variant_rate, text_rate=args.text_rate,
+                    noise=args.noise, loss_rate=args.loss_rate, note_rate=args.note_rate)
+    print(f"{args.files} فایل در {args.out_dir} ساخته شد")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""رسم موازی و بدون نمایشگر نمودارهای روند
+
+هر نمودار یک ChartSpec است (عنوان، برچسب محورها و سری هر شرکت). نمودارها بین
+پردازش‌های کارگر تقسیم می‌شوند و هر کارگر با backend غیرتعاملی Agg یک شیء
+Figure می‌سازد و آن را برای همه نمودارهای خود دوباره استفاده می‌کند. چیدمان
+با constrained layout یک بار هنگام رسم حساب می‌شود (بدون tight_layout و
+bbox_inches='tight' که هر کدام یک بار دیگر کل شکل را رسم می‌کنند).
+
+تنظیمات (آرگومان‌های ChartRenderer یا متغیرهای محیطی):
+
+    EXALL_CHART_DPI       وضوح تصاویر (پیش‌فرض 300)
+    EXALL_CHART_FORMAT    قالب‌های هر نمودار با کاما: png، svg، pdf، ... (پیش‌فرض png)
+    EXALL_CHART_PDF       نام فایل PDF چندصفحه‌ای همه نمودارها در همان پوشه؛ 1 برای
+                          charts.pdf و خالی برای عدم ساخت
+    EXALL_CHART_WORKERS   تعداد پردازش‌های رسم (پیش‌فرض تعداد هسته‌ها؛ 1 برای رسم
+                          در همین پردازش)
+
+هر فایل نمودار با کلید هش داده‌های سری‌ها، برچسب‌ها، قالب، وضوح و سبک در کش
+دیسکی (ChartCache زیر EXALL_CACHE_DIR) نگه داشته می‌شود؛ نمودارهایی که
+کلیدشان تغییر نکرده از کش کپی و فقط بقیه رسم می‌شوند (EXALL_CACHE=0 برای
+غیرفعال کردن).
+
+به جای تصویر (یا همراه آن) می‌توان نمودارهای خطی خود اکسل را در گزارش ساخت
+(excel_trend_charts) که به محدوده‌های نوشته شده در شیت‌ها ارجاع می‌دهند و بدون
+matplotlib و با تغییر داده‌ها به‌روز می‌شوند. انتخاب با EXALL_CHARTS، فهرستی از
+image و excel با کاما (پیش‌فرض image؛ none برای هیچ نمودار).
+
+    specs = [ChartSpec('فروش_trend', 'روند فروش', 'سال', 'مقدار (ریال)', series)]
+    paths = ChartRenderer(charts_folder).render(specs)
+"""
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from importlib import metadata
+from concurrent.futures import ProcessPoolExecutor
+
+from log_config import get_logger
+from workbook_cache import default_cache_dir, atomic_write
+
+logger = get_logger('charts')
+
+COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd']
+
+# اولین قلم موجود از این فهرست استفاده می‌شود (جستجوی قلم ناموجود برای هر متن کند است)
+FONT_PREFERENCES = ['Arial', 'Vazirmatn', 'Tahoma', 'DejaVu Sans']
+
+CHART_MODES = ('image', 'excel')
+
+# بیشترین تعداد سری یک نمودار اکسل
+EXCEL_MAX_SERIES = 255
+
+# با تغییر شیوه رسم (draw یا apply_style)، نسخه افزایش می‌یابد تا کش قدیمی نادیده گرفته شود
+CHART_STYLE_VERSION = 1
+
+
+def chart_modes():
+    """نوع نمودارهای انتخاب شده با EXALL_CHARTS"""
+    value = os.getenv('EXALL_CHARTS', 'image').strip().lower()
+    if value == 'none':
+        return []
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CHART_MODES]
+    if unknown:
+        raise ValueError(f"نوع نمودار ناشناخته: {', '.join(unknown)} ({'، '.join(CHART_MODES)}، none)")
+    return names or ['image']
+
+
+class ChartSpec:
+    """تعریف یک نمودار خطی؛ series فهرستی از (برچسب، مقادیر x، مقادیر y) است"""
+
+    def __init__(self, name, title, xlabel, ylabel, series, legend_title='شرکت‌ها'):
+        self.name = name
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.series = [(label, list(xs), list(ys)) for label, xs, ys in series]
+        self.legend_title = legend_title
+
+    def __repr__(self):
+        return f"ChartSpec({self.name!r})"
+
+
+def trend_specs(results, section, names, ylabel, suffix='_trend'):
+    """یک ChartSpec برای هر متغیر از نتایج {شرکت: {سال: {section: {نام: مقدار}}}}
+
+    داده‌های هر شرکت یک بار پیمایش می‌شوند؛ متغیری که برای هیچ شرکت-سالی
+    وجود ندارد نمودار ندارد و مقادیر گمشده در سری‌ها NaN هستند.
+    """
+    specs = []
+    for name in names:
+        series = []
+        found = False
+        for company, years in results.items():
+            xs, ys = [], []
+            for year, entry in years.items():
+                values = entry.get(section, {})
+                value = values.get(name)
+                found = found or value is not None
+                xs.append(year)
+                ys.append(float('nan') if value is None else float(value))
+            series.append((company, xs, ys))
+        if not found:
+            logger.debug("متغیر %s در داده‌ها یافت نشد.", name)
+        else:
+            specs.append(ChartSpec(f"{name.replace(' ', '_')}{suffix}",
+                                   f'روند {name} برای شرکت‌های مختلف', 'سال', ylabel, series))
+    return specs
+
+
+def apply_style():
+    """backend غیرتعاملی و سبک نمودارها (تم seaborn در صورت نصب بودن)"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    from matplotlib import font_manager, style
+
+    style.use('default')
+    try:
+        import seaborn as sns
+        sns.set_theme()
+    except ImportError:
+        style.use('seaborn-v0_8-darkgrid')
+
+    for family in FONT_PREFERENCES:
+        try:
+            font_manager.findfont(family, fallback_to_default=False)
+        except ValueError:
+            continue
+        matplotlib.rcParams['font.family'] = family
+        break
+
+
+def draw(fig, spec):
+    """رسم spec روی شکل (پاک شده) fig"""
+    fig.clear()
+    ax = fig.add_subplot()
+    for i, (label, xs, ys) in enumerate(spec.series):
+        ax.plot(xs, ys, marker='o', label=label, color=COLORS[i % len(COLORS)], linewidth=2)
+    ax.set_title(spec.title, fontsize=14, pad=20)
+    ax.set_xlabel(spec.xlabel, fontsize=12)
+    ax.set_ylabel(spec.ylabel, fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend(title=spec.legend_title, bbox_to_anchor=(1.05, 1), loc='upper left')
+
+
+def new_figure(figsize):
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize, layout='constrained')
+
+
+def render_files(specs, folder, formats, dpi, figsize):
+    """رسم نمودارها در فایل‌های جداگانه با یک شکل مشترک؛ خروجی مسیر فایل‌ها"""
+    fig = new_figure(figsize)
+    paths = []
+    for spec in specs:
+        draw(fig, spec)
+        for fmt in formats:
+            path = Path(folder) / f"{spec.name}.{fmt}"
+            fig.savefig(path, dpi=dpi, format=fmt)
+            paths.append(path)
+    return paths
+
+
+def render_pdf(specs, path, figsize):
+    """همه نمودارها به صورت صفحه‌های یک فایل PDF"""
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    fig = new_figure(figsize)
+    with PdfPages(path) as pdf:
+        for spec in specs:
+            draw(fig, spec)
+            pdf.savefig(fig)
+    return [Path(path)]
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+class ChartCache:
+    """کش دیسکی فایل‌های نمودار با کلید هش ورودی‌های رسم"""
+
+    def __init__(self, cache_dir=None, enabled=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        if enabled is None:
+            enabled = os.getenv('EXALL_CACHE', '1') != '0'
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        # نسخه کتابخانه‌ها بدون import آن‌ها (تغییر نسخه ممکن است ظاهر نمودار را عوض کند)
+        self._style = [CHART_STYLE_VERSION, COLORS, FONT_PREFERENCES,
+                       _package_version('matplotlib'), _package_version('seaborn')]
+
+    def key(self, specs, fmt, dpi, figsize):
+        """کلید محتوایی یک فایل خروجی (یک نمودار یا PDF چندصفحه‌ای چند نمودار)"""
+        content = [self._style, fmt, dpi, list(figsize),
+                   [[spec.title, spec.xlabel, spec.ylabel, spec.legend_title, spec.series] for spec in specs]]
+        key = json.dumps(content, ensure_ascii=False, default=str)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key, fmt):
+        return self.cache_dir / 'charts' / key[:2] / f"{key}.{fmt}"
+
+    def fetch(self, key, fmt, path):
+        """کپی نمودار ذخیره شده در path؛ False اگر در کش نباشد"""
+        if not self.enabled:
+            return False
+        entry = self._entry_path(key, fmt)
+        try:
+            atomic_write(path, lambda tmp_path: shutil.copyfile(entry, tmp_path))
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        except Exception as e:
+            logger.warning("خطا در خواندن نمودار از کش %s: %s", entry, e)
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, fmt, path):
+        if not self.enabled:
+            return
+        entry = self._entry_path(key, fmt)
+        try:
+            atomic_write(entry, lambda tmp_path: shutil.copyfile(path, tmp_path))
+        except Exception as e:
+            logger.warning("خطا در ذخیره نمودار در کش %s: %s", entry, e)
+
+
+class ChartRenderer:
+    def __init__(self, folder, dpi=None, formats=None, pdf=None, workers=None, figsize=(12, 6), cache=None):
+        self.folder = Path(folder)
+        self.dpi = dpi or int(os.getenv('EXALL_CHART_DPI', '300'))
+        if formats is None:
+            formats = os.getenv('EXALL_CHART_FORMAT', 'png')
+        if isinstance(formats, str):
+            formats = [fmt.strip().lower() for fmt in formats.split(',') if fmt.strip()]
+        self.formats = list(formats)
+        if pdf is None:
+            pdf = os.getenv('EXALL_CHART_PDF', '')
+        self.pdf = self.folder / ('charts.pdf' if pdf in ('1', True) else pdf) if pdf else None
+        self.workers = workers or int(os.getenv('EXALL_CHART_WORKERS', '0')) or os.cpu_count() or 1
+        self.figsize = figsize
+        self.cache = cache if cache is not None else ChartCache()
+
+    def render(self, specs):
+        """رسم همه نمودارها (و PDF چندصفحه‌ای در صورت تنظیم)؛ خروجی مسیر فایل‌ها
+
+        فایل‌هایی که کلیدشان در کش است کپی می‌شوند و فقط بقیه رسم می‌شوند.
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        # کلید هر فایل خروجی: {مسیر: (کلید، قالب)}
+        keys = {}
+        stale = []
+        for spec in specs:
+            cached = True
+            for fmt in self.formats:
+                path = self.folder / f"{spec.name}.{fmt}"
+                keys[path] = (self.cache.key([spec], fmt, self.dpi, self.figsize), fmt)
+                cached = self.cache.fetch(*keys[path], path) and cached
+            if not cached:
+                stale.append(spec)
+        render_pdf_file = False
+        if self.pdf is not None:
+            keys[self.pdf] = (self.cache.key(specs, 'pdf-pages', None, self.figsize), 'pdf')
+            render_pdf_file = not self.cache.fetch(*keys[self.pdf], self.pdf)
+
+        # هر کارگر سهم یکسانی از نمودارهای تغییر کرده می‌گیرد؛ PDF یک کار جداگانه است
+        tasks = []
+        if stale and self.formats:
+            chunks = min(self.workers, len(stale))
+            tasks += [(render_files, (stale[i::chunks], self.folder, self.formats, self.dpi, self.figsize))
+                      for i in range(chunks)]
+        if render_pdf_file:
+            tasks.append((render_pdf, (specs, self.pdf, self.figsize)))
+
+        if len(tasks) > 1 and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), initializer=apply_style) as executor:
+                futures = [executor.submit(func, *args) for func, args in tasks]
+                for future in futures:
+                    self._store(future.result(), keys)
+        elif tasks:
+            apply_style()
+            for func, args in tasks:
+                self._store(func(*args), keys)
+
+        rendered = len(stale) * len(self.formats) + render_pdf_file
+        logger.debug("نمودارها: %d از کش، %d رسم شده", len(keys) - rendered, rendered)
+        return list(keys)
+
+    def _store(self, paths, keys):
+        for path in paths:
+            self.cache.store(*keys[Path(path)], path)
+
+
+def excel_trend_charts(workbook, chart_sheet, data_sheet, companies, columns, names, ylabel,
+                       first_row=1, year_col=1, chart_row=0, size=(720, 360)):
+    """نمودارهای خطی اکسل روی شیت chart_sheet با ارجاع به داده‌های data_sheet
+
+    companies نام شرکت هر سطر داده (به ترتیب نوشته شده از first_row) و columns
+    نام ستون‌های شیت است؛ سطرهای پشت سر هم هر شرکت یک سری و ستون year_col
+    محور افقی آن است. نمودارها در دو ستون از سطر chart_row چیده می‌شوند و
+    خروجی سطر بعد از آخرین نمودار است.
+    """
+    # بلوک سطرهای هر شرکت: [شرکت، اولین سطر، آخرین سطر]
+    blocks = []
+    for row, company in enumerate(companies, start=first_row):
+        if blocks and blocks[-1][0] == company:
+            blocks[-1][2] = row
+        else:
+            blocks.append([company, row, row])
+
+    width, height = size
+    # ارتفاع پیش‌فرض سطر ۲۰ و عرض پیش‌فرض ستون ۶۴ پیکسل است
+    rows_per_chart = height // 20 + 2
+    second_col = width // 64 + 1
+    position = 0
+    for name in names:
+        if name not in columns or not blocks:
+            logger.debug("متغیر %s در داده‌ها یافت نشد.", name)
+            continue
+        col = columns.index(name)
+        for start in range(0, len(blocks), EXCEL_MAX_SERIES):
+            chart = workbook.add_chart({'type': 'line'})
+            for company, first, last in blocks[start:start + EXCEL_MAX_SERIES]:
+                chart.add_series({
+                    'name': str(company),
+                    'categories': [data_sheet, first, year_col, last, year_col],
+                    'values': [data_sheet, first, col, last, col],
+                    'marker': {'type': 'circle'},
+                    'line': {'width': 2},
+                })
+            chart.set_title({'name': f'روند {name} برای شرکت‌های مختلف'})
+            chart.set_x_axis({'name': 'سال'})
+            chart.set_y_axis({'name': ylabel, 'major_gridlines': {'visible': True, 'line': {'dash_type': 'dash'}}})
+            chart.set_legend({'position': 'right'})
+            chart.set_size({'width': width, 'height': height})
+            row = chart_row + (position // 2) * rows_per_chart
+            chart_sheet.insert_chart(row, 0 if position % 2 == 0 else second_col, chart)
+            position += 1
+    return chart_row + (position + 1) // 2 * rows_per_chart
@@ -0,0 +1,153 @@
+"""خروجی ستونی (Parquet یا Arrow IPC) متغیرها و نسبت‌های استخراج شده
+
+هر سطر یک مقدار است و طرح جدول ثابت است:
+
+    analyzer     string   نام تحلیلگر (pisi، hai، test10)
+    company      string   نام شرکت
+    year         int32    سال مالی (null اگر از نام فایل قابل تشخیص نباشد)
+    kind         string   metric برای متغیرها و ratio برای نسبت‌ها
+    metric       string   نام متغیر یا نسبت
+    value        float64  مقدار
+    source_cell  string   نشانی سلول عدد در فایل منبع (مانند Sheet1!C12)؛ برای
+                          نسبت‌ها و مقادیر تخمینی null
+
+انتخاب خروجی‌ها با متغیر محیطی EXALL_EXPORT (یا exall --export)، فهرستی از
+excel، parquet و arrow با کاما؛ پیش‌فرض فقط excel است. فایل ستونی کنار فایل
+اکسل و با همان نام ذخیره می‌شود:
+
+    EXALL_EXPORT=excel,parquet    هر دو
+    EXALL_EXPORT=parquet          فقط Parquet به جای اکسل
+
+نوشتن و خواندن به بسته اختیاری pyarrow نیاز دارد (pip install 'exall[arrow]').
+
+    table = read_export('reports/financial_analysis.parquet')   # pyarrow.Table
+    df = table.to_pandas()
+"""
+import os
+import numbers
+from pathlib import Path
+
+from xlsxwriter.utility import xl_rowcol_to_cell, quote_sheetname
+
+from workbook_cache import atomic_write
+
+SCHEMA_VERSION = '1'
+FORMATS = ('excel', 'parquet', 'arrow')
+SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# کلیدهای نتایج هر سال در pisi و hai
+METRICS_KEY = 'متغیرها'
+RATIOS_KEY = 'نسبت‌ها'
+SOURCES_KEY = 'منابع'
+
+
+def cell_reference(row, col, sheet=None):
+    """نشانی A1 سلول با اندیس صفر؛ None اگر مختصات عددی نباشند"""
+    if not isinstance(row, numbers.Integral) or not isinstance(col, numbers.Integral):
+        return None
+    cell = xl_rowcol_to_cell(int(row), int(col))
+    return f"{quote_sheetname(str(sheet))}!{cell}" if sheet is not None else cell
+
+
+def export_formats():
+    """خروجی‌های انتخاب شده با EXALL_EXPORT"""
+    names = [name.strip().lower() for name in os.getenv('EXALL_EXPORT', 'excel').split(',') if name.strip()]
+    unknown = [name for name in names if name not in FORMATS]
+    if unknown:
+        raise ValueError(f"خروجی ناشناخته: {', '.join(unknown)} ({'، '.join(FORMATS)})")
+    return names or ['excel']
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("خروجی Parquet/Arrow به بسته pyarrow نیاز دارد: pip install 'exall[arrow]'") from e
+    return pyarrow
+
+
+def schema():
+    """طرح ثابت جدول خروجی"""
+    pa = _pyarrow()
+    return pa.schema([
+        pa.field('analyzer', pa.string(), nullable=False),
+        pa.field('company', pa.string(), nullable=False),
+        pa.field('year', pa.int32()),
+        pa.field('kind', pa.string(), nullable=False),
+        pa.field('metric', pa.string(), nullable=False),
+        pa.field('value', pa.float64()),
+        pa.field('source_cell', pa.string()),
+    ], metadata={'exall.schema_version': SCHEMA_VERSION})
+
+
+def parse_year(year):
+    digits = ''.join(c for c in str(year) if c.isdigit())
+    return int(digits) if digits else None
+
+
+def collect_rows(analyzer, results):
+    """ستون‌های جدول از نتایج {شرکت: {سال: {متغیرها، نسبت‌ها، منابع}}}"""
+    columns = {name: [] for name in ('analyzer', 'company', 'year', 'kind', 'metric', 'value', 'source_cell')}
+
+    def add(company, year, kind, values, sources):
+        for metric, value in values.items():
+            # مقادیر غیرعددی مانند کلید سال در داده‌های pisi کنار گذاشته می‌شوند
+            if not isinstance(value, numbers.Number) or isinstance(value, bool):
+                continue
+            columns['analyzer'].append(analyzer)
+            columns['company'].append(str(company))
+            columns['year'].append(year)
+            columns['kind'].append(kind)
+            columns['metric'].append(metric)
+            columns['value'].append(float(value))
+            columns['source_cell'].append(sources.get(metric))
+
+    for company, years in results.items():
+        for year, entry in years.items():
+            year_number = parse_year(year)
+            add(company, year_number, 'metric', entry.get(METRICS_KEY, {}), entry.get(SOURCES_KEY, {}))
+            add(company, year_number, 'ratio', entry.get(RATIOS_KEY, {}), {})
+    return columns
+
+
+def build_table(analyzer, results):
+    """جدول pyarrow با طرح ثابت از نتایج یک اجرا"""
+    pa = _pyarrow()
+    return pa.table(collect_rows(analyzer, results), schema=schema())
+
+
+def write_table(table, path, fmt=None):
+    """نوشتن اتمی جدول به صورت Parquet یا Arrow IPC (بر اساس fmt یا پسوند فایل)"""
+    pa = _pyarrow()
+    path = Path(path)
+    fmt = fmt or ('arrow' if path.suffix in ('.arrow', '.feather', '.ipc') else 'parquet')
+
+    def write(tmp_path):
+        if fmt == 'parquet':
+            pa.parquet.write_table(table, tmp_path, compression='zstd')
+        else:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    atomic_write(path, write)
+    return path
+
+
+def export_results(analyzer, results, output_path, formats=None):
+    """ذخیره نتایج در قالب‌های ستونی انتخاب شده کنار output_path؛ خروجی فهرست مسیرها"""
+    formats = [fmt for fmt in (formats or export_formats()) if fmt in SUFFIXES]
+    if not formats:
+        return []
+    table = build_table(analyzer, results)
+    return [write_table(table, Path(output_path).with_suffix(SUFFIXES[fmt]), fmt) for fmt in formats]
+
+
+def read_export(path):
+    """خواندن فایل Parquet یا Arrow ذخیره شده به صورت pyarrow.Table"""
+    pa = _pyarrow()
+    path = Path(path)
+    if path.suffix == '.parquet':
+        return pa.parquet.read_table(path)
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
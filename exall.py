@@ -0,0 +1,124 @@
+"""رابط خط فرمان exall
+
+    exall pisi | hai | test10 | test12          اجرای تعاملی هر تحلیلگر
+    exall extract FILE... --analyzer pisi      فقط استخراج و چاپ نتیجه به صورت JSON
+    exall serve --http 127.0.0.1:8765          سرویس ماندگار استخراج
+
+گزینه‌های --quiet، --verbose، --log-format و --numeric پیش از نام فرمان می‌آیند و
+از طریق متغیرهای محیطی EXALL_* به تحلیلگر و پردازش‌های کارگر آن می‌رسند
+(log_config و numeric_backend).
+
+ماژول تحلیلگر فقط پس از انتخاب فرمان بارگذاری می‌شود و کتابخانه‌های سنگین
+(matplotlib، seaborn، scipy، skimage، cv2) فقط در مسیرهایی که به آن‌ها نیاز
+دارند (رسم نمودار، تشخیص تصویر) وارد می‌شوند؛ اجرای فقط استخراج آن‌ها را
+بارگذاری نمی‌کند.
+"""
+import os
+import sys
+import json
+import argparse
+import importlib
+import contextlib
+from pathlib import Path
+
+INTERACTIVE = ('pisi', 'hai', 'test10', 'test12')
+
+
+def run_extract(files, analyzer_name, base_folder):
+    """استخراج متغیرها و نسبت‌های هر فایل و چاپ یک خط JSON برای هر فایل"""
+    from extraction_service import ANALYZERS, extract_file, to_json
+
+    if analyzer_name not in ANALYZERS:
+        print(f"آنالایزر ناشناخته: {analyzer_name}", file=sys.stderr)
+        return 1
+
+    # گزارش‌های متنی تحلیلگر به stderr می‌روند تا خروجی فقط JSON باشد
+    with contextlib.redirect_stdout(sys.stderr):
+        module = importlib.import_module(ANALYZERS[analyzer_name])
+        analyzer = module.FinancialAnalyzer(base_folder)
+
+    status = 0
+    for file_path in files:
+        file_path = Path(file_path)
+        try:
+            sources = {}
+            with contextlib.redirect_stdout(sys.stderr):
+                metrics, ratios = extract_file(analyzer, analyzer_name, file_path, sources)
+            if metrics:
+                result = {'ok': True, 'file': str(file_path),
+                          'metrics': to_json(metrics), 'ratios': to_json(ratios), 'sources': sources}
+            else:
+                result = {'ok': False, 'file': str(file_path), 'error': "هیچ داده معتبری در فایل یافت نشد"}
+        except Exception as e:
+            result = {'ok': False, 'file': str(file_path), 'error': str(e)}
+
+        if not result['ok']:
+            status = 1
+        print(json.dumps(result, ensure_ascii=False))
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='exall', description="استخراج و تحلیل صورت‌های مالی")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help="فقط هشدارها و خطاها")
+    verbosity.add_argument('-v', '--verbose', action='store_true', help="جزئیات هر تطبیق و هر نسبت (DEBUG)")
+    parser.add_argument('--log-format', choices=('text', 'json'), help="قالب لاگ")
+    parser.add_argument('--numeric', help="نوع عددی مقادیر و نسبت‌ها: float، fixed (یا fixed:N) یا decimal")
+    parser.add_argument('--full', action='store_true',
+                        help="پردازش دوباره همه فایل‌ها بدون استفاده از فهرست تغییرات پوشه")
+    parser.add_argument('--export', help="خروجی‌های اجرای تعاملی با کاما: excel، parquet، arrow (پیش‌فرض excel)")
+    parser.add_argument('--charts', help="نمودارهای hai با کاما: image، excel یا none (پیش‌فرض image)")
+    parser.add_argument('--fuzzy', help="جستجوی برچسب‌های مشابه برای متغیرهای یافت نشده: 1 یا کمترین امتیاز بین 0 و 1")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in INTERACTIVE:
+        commands.add_parser(name, help=f"اجرای تعاملی {name}")
+
+    extract = commands.add_parser('extract', help="فقط استخراج متغیرها و نسبت‌ها به صورت JSON")
+    extract.add_argument('files', nargs='+', help="فایل‌های اکسل")
+    extract.add_argument('--analyzer', default='pisi', help="pisi، hai یا test10")
+    extract.add_argument('--base-folder', default='.', help="پوشه پایه آنالایزر (پوشه reports در آن ساخته می‌شود)")
+
+    serve = commands.add_parser('serve', help="سرویس ماندگار استخراج (آرگومان‌ها به extraction_service داده می‌شوند)")
+    serve.add_argument('args', nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.quiet:
+        os.environ['EXALL_QUIET'] = '1'
+    elif args.verbose:
+        os.environ.pop('EXALL_QUIET', None)
+        os.environ['EXALL_LOG_LEVEL'] = 'DEBUG'
+    if args.log_format:
+        os.environ['EXALL_LOG_FORMAT'] = args.log_format
+    if args.numeric:
+        os.environ['EXALL_NUMERIC'] = args.numeric
+    if args.export:
+        os.environ['EXALL_EXPORT'] = args.export
+    if args.charts:
+        os.environ['EXALL_CHARTS'] = args.charts
+    if args.fuzzy:
+        os.environ['EXALL_FUZZY'] = args.fuzzy
+    if args.full:
+        os.environ['EXALL_INCREMENTAL'] = '0'
+
+    from log_config import configure_logging
+    configure_logging()
+
+    if args.command == 'extract':
+        return run_extract(args.files, args.analyzer, args.base_folder)
+
+    if args.command == 'serve':
+        from extraction_service import main as serve_main
+        return serve_main(args.args)
+
+    importlib.import_module(args.command).main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
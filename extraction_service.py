@@ -0,0 +1,260 @@
+"""سرویس ماندگار استخراج داده‌های مالی
+
+آنالایزرها یک بار در هر پردازش کارگر ساخته می‌شوند و درخواست‌ها از طریق HTTP
+یا سوکت یونیکس محلی دریافت می‌شوند. هر درخواست یک شیء JSON است:
+
+    {"analyzer": "pisi", "file": "/path/to/1401_company.xlsx"}
+
+و پاسخ شامل متغیرها و نسبت‌های استخراج شده است:
+
+    curl -X POST localhost:8765/extract -d '{"analyzer": "hai", "file": "..."}'
+
+روی سوکت یونیکس هر خط یک درخواست JSON و هر خط پاسخ یک JSON است.
+"""
+import os
+import sys
+import json
+import argparse
+import socket
+import socketserver
+import threading
+from decimal import Decimal
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ProcessPoolExecutor
+
+from numeric_backend import FixedPoint
+
+# نام ماژول هر آنالایزر (هر ماژول کلاس FinancialAnalyzer دارد)
+ANALYZERS = {
+    'pisi': 'pisi',
+    'hai': 'hai',
+    'test10': 'test10',
+}
+
+# آنالایزرهای گرم هر پردازش کارگر
+_analyzers = {}
+
+
+def _init_worker(base_folder):
+    """بارگذاری ماژول‌ها و ساخت آنالایزرها یک بار برای هر کارگر"""
+    import importlib
+
+    # خروجی متنی آنالایزرها در سرویس نمایش داده نمی‌شود
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+
+    for name, module_name in ANALYZERS.items():
+        module = importlib.import_module(module_name)
+        _analyzers[name] = module.FinancialAnalyzer(base_folder)
+
+
+def _ping():
+    return os.getpid()
+
+
+def to_json(value):
+    """تبدیل مقادیر numpy و Decimal به انواع قابل نمایش در JSON"""
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (Decimal, FixedPoint)):
+        return float(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def extract_file(analyzer, name, file_path, sources=None):
+    """استخراج متغیرها و نسبت‌های یک فایل با آنالایزر داده شده
+
+    نشانی سلول منبع هر متغیر در دیکشنری sources (در صورت وجود) ثبت می‌شود.
+    """
+    if name == 'test10':
+        metrics = analyzer.read_variables(file_path, sources=sources)
+    else:
+        metrics = analyzer.read_financial_data(file_path, sources)
+    if not metrics:
+        return None, None
+    return metrics, analyzer.calculate_ratios(metrics)
+
+
+def run_job(job):
+    """اجرای یک درخواست استخراج در پردازش کارگر؛ هر خطا به صورت پاسخ ok=False برمی‌گردد"""
+    try:
+        if not isinstance(job, dict):
+            return {'ok': False, 'error': "درخواست نامعتبر: هر درخواست باید یک شیء JSON باشد"}
+        if 'file' not in job:
+            return {'ok': False, 'error': "درخواست نامعتبر: کلید file وجود ندارد"}
+
+        name = job.get('analyzer', 'pisi')
+        if name not in _analyzers:
+            return {'ok': False, 'error': f"آنالایزر ناشناخته: {name}"}
+
+        file_path = Path(job['file'])
+        if not file_path.exists():
+            return {'ok': False, 'error': f"فایل یافت نشد: {file_path}"}
+
+        analyzer = _analyzers[name]
+        sources = {}
+        metrics, ratios = extract_file(analyzer, name, file_path, sources)
+        if not metrics:
+            return {'ok': False, 'error': "هیچ داده معتبری در فایل یافت نشد"}
+
+        return {
+            'ok': True,
+            'analyzer': name,
+            'file': str(file_path),
+            'metrics': to_json(metrics),
+            'ratios': to_json(ratios),
+            'sources': sources,
+        }
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+
+
+class ExtractionService:
+    """صف محلی درخواست‌ها روی مجموعه‌ای از پردازش‌های کارگر گرم"""
+
+    def __init__(self, base_folder, workers=None):
+        self.base_folder = str(base_folder)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.base_folder,)
+        )
+        # گرم کردن کارگرها پیش از دریافت اولین درخواست
+        for future in [self.executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, job):
+        return self.executor.submit(run_job, job)
+
+    def handle(self, payload):
+        """پردازش یک درخواست JSON و بازگرداندن پاسخ JSON"""
+        try:
+            job = json.loads(payload)
+        except json.JSONDecodeError as e:
+            return {'ok': False, 'error': f"درخواست نامعتبر: {str(e)}"}
+
+        if isinstance(job, list):
+            futures = [self.submit(item) for item in job]
+            return [self.result(future) for future in futures]
+        return self.result(self.submit(job))
+
+    @staticmethod
+    def result(future):
+        """پاسخ یک درخواست؛ خطای پردازش کارگر (مانند توقف ناگهانی آن) به صورت ok=False"""
+        try:
+            return future.result()
+        except Exception as e:
+            return {'ok': False, 'error': f"خطا در پردازش درخواست: {str(e)}"}
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+def make_http_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'ok': True, 'workers': service.workers})
+            else:
+                self._send(404, {'ok': False, 'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/extract':
+                self._send(404, {'ok': False, 'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            self._send(200, service.handle(self.rfile.read(length)))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_unix_handler(service):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                response = service.handle(line)
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                self.wfile.flush()
+
+    return Handler
+
+
+def send_job(socket_path, job):
+    """ارسال یک درخواست به سرویس روی سوکت یونیکس و دریافت پاسخ"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        stream = sock.makefile('rwb')
+        stream.write(json.dumps(job, ensure_ascii=False).encode('utf-8') + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def serve(base_folder, http_address=None, unix_socket=None, workers=None):
+    """راه‌اندازی سرویس روی HTTP و/یا سوکت یونیکس تا زمان توقف"""
+    service = ExtractionService(base_folder, workers)
+    servers = []
+
+    if http_address:
+        host, _, port = http_address.rpartition(':')
+        servers.append(ThreadingHTTPServer((host or '127.0.0.1', int(port)), make_http_handler(service)))
+        print(f"سرویس HTTP روی {host or '127.0.0.1'}:{port}")
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        servers.append(socketserver.ThreadingUnixStreamServer(unix_socket, make_unix_handler(service)))
+        print(f"سرویس سوکت یونیکس روی {unix_socket}")
+
+    if not servers:
+        raise ValueError("حداقل یکی از --http یا --unix لازم است")
+
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+
+    print(f"تعداد کارگرها: {service.workers} — برای توقف Ctrl+C")
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("\nتوقف سرویس...")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        service.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="سرویس ماندگار استخراج داده‌های مالی")
+    parser.add_argument('--base-folder', default='.', help="پوشه پایه آنالایزرها (پوشه reports در آن ساخته می‌شود)")
+    parser.add_argument('--http', help="آدرس HTTP به شکل host:port، مثلاً 127.0.0.1:8765")
+    parser.add_argument('--unix', help="مسیر سوکت یونیکس")
+    parser.add_argument('--workers', type=int, default=None, help="تعداد پردازش‌های کارگر")
+    args = parser.parse_args(argv)
+
+    if not args.http and not args.unix:
+        args.http = '127.0.0.1:8765'
+    serve(args.base_folder, args.http, args.unix, args.workers)
+
+
+if __name__ == "__main__":
+    main()
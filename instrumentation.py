@@ -0,0 +1,266 @@
+"""زمان‌سنجی مراحل پردازش و پروفایلر اختیاری هر دسته
+
+مراحل ثبت شده برای هر فایل:
+
+    read       خواندن شیت‌ها (از کش یا تجزیه اکسل)
+    normalize  پاکسازی دیتافریم و ساخت نمایه متن و اعداد
+    search     جستجوی متغیرها
+    ratio      محاسبه نسبت‌ها
+    write      ذخیره خروجی اکسل
+    plot       رسم نمودارها
+
+تنظیمات با متغیرهای محیطی:
+
+    EXALL_METRICS_FILE   مسیر خروجی آمار؛ پسوند .prom قالب textfile پرومتئوس و
+                         بقیه JSON (شامل آمار هر فایل)
+    EXALL_PROFILE        cprofile یا sample برای ذخیره پروفایل هر دسته
+    EXALL_PROFILE_DIR    پوشه پروفایل‌ها (پیش‌فرض profiles)
+
+خروجی cprofile با `python -m pstats` یا snakeviz و خروجی sample (پشته‌های
+فشرده folded) با flamegraph.pl یا speedscope قابل مشاهده است.
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+import functools
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+STAGES = ('read', 'normalize', 'search', 'ratio', 'write', 'plot')
+
+
+class StageTimer:
+    """زمان دیوار و تعداد اجرای هر مرحله، به صورت کلی و به تفکیک فایل"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.totals = {}
+        self.files = {}
+        self.current_file = None
+
+    def add(self, stage, seconds, calls=1, file=None):
+        file = file if file is not None else self.current_file
+        targets = [self.totals]
+        if file is not None:
+            targets.append(self.files.setdefault(file, {}))
+        for target in targets:
+            entry = target.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def file(self, file_name):
+        """مراحل داخل این بلوک به نام فایل داده شده ثبت می‌شوند"""
+        previous = self.current_file
+        self.current_file = str(file_name)
+        try:
+            yield
+        finally:
+            self.current_file = previous
+
+    def snapshot(self):
+        """کپی قابل ارسال آمار (برای بازگرداندن از پردازش‌های کارگر)"""
+        return {
+            'totals': {stage: list(entry) for stage, entry in self.totals.items()},
+            'files': {file: {stage: list(entry) for stage, entry in stages.items()}
+                      for file, stages in self.files.items()},
+        }
+
+    def merge(self, snapshot):
+        """افزودن آمار یک پردازش دیگر"""
+        for file, stages in snapshot['files'].items():
+            for stage, (calls, seconds) in stages.items():
+                entry = self.files.setdefault(file, {}).setdefault(stage, [0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+        for stage, (calls, seconds) in snapshot['totals'].items():
+            entry = self.totals.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+
+    def ordered_stages(self):
+        known = [stage for stage in STAGES if stage in self.totals]
+        return known + sorted(stage for stage in self.totals if stage not in STAGES)
+
+    def summary(self):
+        """جدول خلاصه مراحل: تعداد، زمان کل، میانگین و سهم از کل"""
+        total = sum(seconds for _, seconds in self.totals.values()) or 1.0
+        lines = [
+            f"\nزمان مراحل ({len(self.files)} فایل):",
+            f"{'مرحله':<12}{'تعداد':>8}{'کل (s)':>10}{'میانگین (ms)':>14}{'سهم':>8}",
+        ]
+        for stage in self.ordered_stages():
+            calls, seconds = self.totals[stage]
+            lines.append(f"{stage:<12}{calls:>8}{seconds:>10.3f}{seconds / calls * 1000:>14.2f}"
+                         f"{seconds / total:>8.1%}")
+        return '\n'.join(lines)
+
+    def to_json(self):
+        data = self.snapshot()
+        return {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'stages': {stage: {'calls': calls, 'seconds': seconds}
+                       for stage, (calls, seconds) in data['totals'].items()},
+            'files': {file: {stage: {'calls': calls, 'seconds': seconds}
+                             for stage, (calls, seconds) in stages.items()}
+                      for file, stages in data['files'].items()},
+        }
+
+    def to_prometheus(self):
+        """قالب textfile پرومتئوس (بدون برچسب فایل تا تعداد سری‌ها محدود بماند)"""
+        lines = [
+            '# HELP exall_stage_seconds_total Wall time spent in each processing stage.',
+            '# TYPE exall_stage_seconds_total counter',
+        ]
+        for stage in self.ordered_stages():
+            lines.append(f'exall_stage_seconds_total{{stage="{stage}"}} {self.totals[stage][1]:.6f}')
+        lines += [
+            '# HELP exall_stage_calls_total Number of times each processing stage ran.',
+            '# TYPE exall_stage_calls_total counter',
+        ]
+        for stage in self.ordered_stages():
+            lines.append(f'exall_stage_calls_total{{stage="{stage}"}} {self.totals[stage][0]}')
+        lines += [
+            '# HELP exall_files_total Number of files with recorded stages.',
+            '# TYPE exall_files_total counter',
+            f'exall_files_total {len(self.files)}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path=None):
+        """ذخیره آمار در مسیر داده شده یا EXALL_METRICS_FILE؛ خروجی مسیر یا None"""
+        path = path or os.getenv('EXALL_METRICS_FILE')
+        if not path:
+            return None
+
+        from workbook_cache import atomic_write
+
+        path = Path(path)
+        if path.suffix == '.prom':
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_json(), ensure_ascii=False, indent=2)
+
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        atomic_write(path, write)
+        return path
+
+    def report(self):
+        """چاپ خلاصه مراحل در پایان دسته و ذخیره آمار در صورت تنظیم"""
+        if not self.totals:
+            return
+        print(self.summary())
+        try:
+            path = self.export()
+            if path:
+                print(f"آمار مراحل در {path} ذخیره شد")
+        except Exception as e:
+            print(f"خطا در ذخیره آمار مراحل: {str(e)}")
+
+
+# زمان‌سنج مشترک همه تحلیلگرهای این پردازش
+timer = StageTimer()
+
+
+def timed(stage):
+    """دکوراتور ثبت زمان یک تابع به عنوان مرحله stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer.stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """نمونه‌برداری دوره‌ای از پشته یک نخ و شمارش پشته‌های فشرده (folded)"""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_batch(name, mode=None, out_dir=None):
+    """پروفایل یک دسته با cProfile یا نمونه‌برداری، اگر EXALL_PROFILE تنظیم شده باشد
+
+    فقط پردازش جاری پروفایل می‌شود؛ برای پروفایل کامل استخراج، دسته را با یک
+    پردازش (بدون کارگر موازی) اجرا کنید.
+    """
+    mode = (mode or os.getenv('EXALL_PROFILE', '')).lower()
+    if mode in ('', '0', 'off'):
+        yield None
+        return
+
+    out_dir = Path(out_dir or os.getenv('EXALL_PROFILE_DIR', 'profiles'))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            path = stem.with_suffix('.prof')
+            profiler.dump_stats(path)
+            print(f"پروفایل دسته در {path} ذخیره شد")
+    elif mode == 'sample':
+        profiler = SamplingProfiler(float(os.getenv('EXALL_PROFILE_INTERVAL', '0.005')))
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            path = stem.with_suffix('.folded')
+            profiler.write(path)
+            print(f"پروفایل نمونه‌برداری دسته در {path} ذخیره شد")
+    else:
+        raise ValueError(f"حالت پروفایل ناشناخته: {mode} (cprofile یا sample)")
@@ -0,0 +1,113 @@
+"""تطبیق تقریبی برچسب سلول‌ها با نمایه n-gram حرفی
+
+برچسب‌ها (متن سلول‌های یک شیت) نرمال‌سازی می‌شوند (ی و ک عربی، همزه‌ها، ارقام
+فارسی، حذف نیم‌فاصله، فاصله، اعراب و علائم) و n-gram های حرفی هر برچسب در یک
+نمایه معکوس ثبت می‌شود. هر پرسش فقط برچسب‌هایی را بررسی می‌کند که دست کم یک
+n-gram مشترک با آن دارند و امتیاز شباهت ضریب Dice مجموعه n-gram هاست (۱ برای
+برچسب‌های یکسان پس از نرمال‌سازی). هزینه پرسش به اندازه شیت بستگی ندارد.
+
+تحلیلگرها وقتی کلیدواژه‌های یک متغیر هیچ مقداری پیدا نکنند برچسب‌های مشابه
+آن‌ها را جستجو می‌کنند؛ این کار با متغیر محیطی EXALL_FUZZY (یا exall --fuzzy)
+فعال می‌شود: 1 برای آستانه پیش‌فرض یا کمترین امتیاز بین 0 و 1 (پیش‌فرض خاموش).
+
+    matcher = LabelMatcher(cell_texts)
+    matcher.search(['حساب‌های دریافتنی تجاری'], top_k=5, min_score=0.8)
+    # [('حسابهای دریافتنی تجاری', 1.0), ...]
+"""
+import os
+import heapq
+
+DEFAULT_THRESHOLD = 0.8
+
+# یکسان‌سازی حروف و ارقام هم‌ارز؛ حروف حذف شونده به None نگاشت می‌شوند
+_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ؤ': 'و', 'ـ': None,
+    **{persian: str(digit) for digit, persian in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{arabic: str(digit) for digit, arabic in enumerate('٠١٢٣٤٥٦٧٨٩')},
+})
+
+
+def fuzzy_threshold():
+    """کمترین امتیاز تطبیق تقریبی از EXALL_FUZZY؛ None اگر غیرفعال باشد"""
+    value = os.getenv('EXALL_FUZZY', '').strip()
+    if value in ('', '0'):
+        return None
+    if value == '1':
+        return DEFAULT_THRESHOLD
+    threshold = float(value)
+    if not 0 < threshold <= 1:
+        raise ValueError(f"آستانه تطبیق تقریبی باید بین 0 و 1 باشد: {value}")
+    return threshold
+
+
+def normalize_label(text):
+    """شکل فشرده برچسب برای مقایسه: فقط حروف و ارقام یکسان‌سازی شده"""
+    text = str(text).translate(_TRANSLATION)
+    return ''.join(char for char in text if char.isalnum())
+
+
+class LabelMatcher:
+    """نمایه n-gram برچسب‌ها برای یافتن نزدیک‌ترین برچسب‌ها به هر پرسش"""
+
+    def __init__(self, labels=(), n=3):
+        self.n = n
+        self.labels = []  # برچسب‌های اصلی هر شکل نرمال‌شده
+        self.sizes = []  # تعداد n-gram های هر شکل نرمال‌شده
+        self.postings = {}  # n-gram -> شناسه برچسب‌ها
+        self._ids = {}
+        for label in labels:
+            self.add(label)
+
+    def grams(self, key):
+        """مجموعه n-gram های شکل نرمال‌شده با نشانه ابتدا و انتها"""
+        padded = f"^{key}$"
+        if len(padded) <= self.n:
+            return {padded}
+        return {padded[i:i + self.n] for i in range(len(padded) - self.n + 1)}
+
+    def add(self, label):
+        """افزودن برچسب؛ برچسب‌های بدون حرف (اعداد، سلول‌های خالی) نمایه نمی‌شوند"""
+        key = normalize_label(label)
+        if not any(char.isalpha() for char in key):
+            return
+        label_id = self._ids.get(key)
+        if label_id is not None:
+            if label not in self.labels[label_id]:
+                self.labels[label_id].append(label)
+            return
+
+        label_id = self._ids[key] = len(self.labels)
+        grams = self.grams(key)
+        self.labels.append([label])
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(label_id)
+
+    def search(self, queries, top_k=5, min_score=0.0):
+        """بهترین برچسب‌ها برای هر یک از پرسش‌ها: [(برچسب، امتیاز)] به ترتیب امتیاز
+
+        امتیاز هر برچسب بیشترین شباهت آن به یکی از پرسش‌هاست؛ در امتیاز برابر
+        برچسبی که زودتر اضافه شده مقدم است.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+
+        best = {}
+        for query in queries:
+            grams = self.grams(normalize_label(query))
+            shared = {}
+            for gram in grams:
+                for label_id in self.postings.get(gram, ()):
+                    shared[label_id] = shared.get(label_id, 0) + 1
+            for label_id, count in shared.items():
+                score = 2 * count / (len(grams) + self.sizes[label_id])
+                if score >= min_score and score > best.get(label_id, 0):
+                    best[label_id] = score
+
+        ranked = heapq.nlargest(top_k, best.items(), key=lambda item: (item[1], -item[0]))
+        return [(label, score) for label_id, score in ranked for label in self.labels[label_id]]
+
+    def best_matches(self, mapping, top_k=5, min_score=0.0):
+        """بهترین برچسب‌های هر متغیر از نگاشت {متغیر: کلیدواژه‌ها}"""
+        return {name: self.search(keywords, top_k, min_score) for name, keywords in mapping.items()}
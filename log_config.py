@@ -0,0 +1,105 @@
+"""تنظیم لاگ سطح‌بندی شده تحلیلگرها
+
+همه تحلیلگرها در زیرشاخه‌های لاگر exall می‌نویسند (مثلاً exall.pisi):
+
+    DEBUG    جزئیات هر تطبیق، انتخاب مقدار، محاسبه و هشدار هر نسبت
+    INFO     پیشرفت هر فایل و خلاصه مقادیر (پیش‌فرض)
+    WARNING  فایل‌های خالی یا ناقص
+    ERROR    خطای خواندن، جستجو یا ذخیره
+
+تنظیمات با متغیرهای محیطی (پردازش‌های کارگر هم همین‌ها را می‌خوانند):
+
+    EXALL_LOG_LEVEL    DEBUG، INFO، WARNING یا ERROR
+    EXALL_QUIET        1 برای حالت ساکت (فقط هشدارها و خطاها)
+    EXALL_LOG_FORMAT   text (پیش‌فرض، فقط متن پیام) یا json (یک شیء در هر خط)
+
+در حالت ساکت فراخوانی‌های debug و info داخل حلقه‌ها فقط یک بررسی سطح هزینه
+دارند؛ برای پیام‌های چندخطی از logger.isEnabledFor استفاده شده است.
+"""
+import os
+import sys
+import json
+import logging
+from datetime import datetime
+
+ROOT_LOGGER = 'exall'
+
+# ویژگی‌های استاندارد LogRecord؛ بقیه از extra می‌آیند و در قالب json نوشته می‌شوند
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_logger(name):
+    """لاگر یک ماژول زیر exall (نام ماژول مستقل از اجرای مستقیم اسکریپت)"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class JsonFormatter(logging.Formatter):
+    """یک شیء JSON در هر خط با زمان، سطح، لاگر، پیام و فیلدهای extra"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """نوشتن در sys.stdout جاری تا redirect_stdout روی لاگ هم اثر کند"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def resolve_level(level=None, quiet=None):
+    if quiet is None:
+        quiet = os.getenv('EXALL_QUIET', '').lower() in ('1', 'true', 'yes')
+    if quiet:
+        return logging.WARNING
+    level = level or os.getenv('EXALL_LOG_LEVEL') or 'INFO'
+    if isinstance(level, int):
+        return level
+    resolved = logging.getLevelName(str(level).upper())
+    if not isinstance(resolved, int):
+        raise ValueError(f"سطح لاگ ناشناخته: {level}")
+    return resolved
+
+
+def configure_logging(level=None, fmt=None, quiet=None):
+    """تنظیم لاگر exall؛ آرگومان‌های داده نشده از متغیرهای محیطی خوانده می‌شوند
+
+    فراخوانی دوباره تنظیم قبلی را جایگزین می‌کند. خروجی لاگر exall به لاگر
+    ریشه نمی‌رسد تا لاگ کتابخانه‌ها (matplotlib و ...) جدا بماند.
+    """
+    fmt = (fmt or os.getenv('EXALL_LOG_FORMAT') or 'text').lower()
+    if fmt not in ('text', 'json'):
+        raise ValueError(f"قالب لاگ ناشناخته: {fmt} (text یا json)")
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(resolve_level(level, quiet))
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    handler = StdoutHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,129 @@
+"""فهرست تغییرات فایل‌های یک پوشه برای پردازش افزایشی
+
+برای هر فایل پردازش شده اندازه، زمان تغییر، هش محتوا و نتیجه استخراج آن در
+یک فایل JSON کنار فایل‌های ورودی ذخیره می‌شود (.exall_manifest_<تحلیلگر>.json).
+در اجرای بعدی فایل‌هایی که اندازه و زمان تغییرشان ثابت مانده بدون خواندن و
+هش کردن از فهرست برداشته می‌شوند؛ اگر فقط زمان تغییر عوض شده باشد هش بررسی
+می‌شود و تنها فایل‌های جدید یا تغییر کرده دوباره پردازش می‌شوند.
+
+فضای نام (namespace) شامل نسخه منطق استخراج و الگوهای جستجوست؛ با تغییر آن کل
+فهرست نادیده گرفته می‌شود. با EXALL_INCREMENTAL=0 (یا exall --full) همه فایل‌ها
+دوباره پردازش و فهرست از نو ساخته می‌شود.
+
+    manifest = Manifest.for_folder(folder, 'pisi', namespace)
+    results, pending = manifest.partition(files)
+    for file in pending:
+        manifest.record(file, process(file))
+    manifest.save()
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from workbook_cache import file_hash, atomic_write
+from log_config import get_logger
+
+logger = get_logger('manifest')
+
+MANIFEST_VERSION = 1
+
+
+def incremental_enabled():
+    return os.getenv('EXALL_INCREMENTAL', '1') != '0'
+
+
+def namespace_key(*parts):
+    """کلید کوتاه فضای نام از اجزای قابل تبدیل به JSON (نسخه، الگوها، ...)"""
+    key = json.dumps([MANIFEST_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+class Manifest:
+    def __init__(self, path, namespace, base_folder=None, enabled=None):
+        self.path = Path(path)
+        self.namespace = namespace
+        self.base_folder = Path(base_folder) if base_folder else self.path.parent
+        self.enabled = incremental_enabled() if enabled is None else enabled
+        self.entries = self._load() if self.enabled else {}
+        self.reused = 0
+        self.processed = 0
+
+    @classmethod
+    def for_folder(cls, folder, analyzer, namespace, enabled=None):
+        folder = Path(folder)
+        return cls(folder / f'.exall_manifest_{analyzer}.json', namespace, folder, enabled)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception:
+            return {}
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('namespace') != self.namespace:
+            return {}
+        return manifest.get('files', {})
+
+    def key(self, file_path):
+        """نام فایل نسبت به پوشه پایه (مسیر کامل برای فایل‌های بیرون از آن)"""
+        path = Path(file_path).resolve()
+        try:
+            return path.relative_to(self.base_folder.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def lookup(self, file_path):
+        """(یافت شد، نتیجه ذخیره شده) برای فایلی که از آخرین پردازش تغییر نکرده است"""
+        entry = self.entries.get(self.key(file_path))
+        if entry is None:
+            return False, None
+
+        stat = os.stat(file_path)
+        if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return True, entry['result']
+
+        # زمان تغییر عوض شده ولی محتوا ممکن است همان باشد (کپی یا ذخیره دوباره)
+        if entry['size'] == stat.st_size and entry['hash'] == file_hash(file_path):
+            entry['mtime_ns'] = stat.st_mtime_ns
+            return True, entry['result']
+        return False, None
+
+    def partition(self, files):
+        """(نتایج فایل‌های تغییر نکرده {فایل: نتیجه}، فهرست فایل‌های جدید یا تغییر کرده)"""
+        results, pending = {}, []
+        for file_path in files:
+            found, result = self.lookup(file_path) if self.enabled else (False, None)
+            if found:
+                results[file_path] = result
+            else:
+                pending.append(file_path)
+        self.reused += len(results)
+        return results, pending
+
+    def record(self, file_path, result):
+        """ثبت نتیجه پردازش موفق یک فایل"""
+        stat = os.stat(file_path)
+        self.entries[self.key(file_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': file_hash(file_path),
+            'result': result,
+        }
+        self.processed += 1
+
+    def save(self):
+        """ذخیره اتمی فهرست؛ ورودی فایل‌های حذف شده کنار گذاشته می‌شود"""
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if (self.base_folder / key).exists()
+        }
+        manifest = {'version': MANIFEST_VERSION, 'namespace': self.namespace, 'files': self.entries}
+
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+        try:
+            atomic_write(self.path, write)
+        except Exception as e:
+            logger.error("خطا در ذخیره فهرست تغییرات %s: %s", self.path, e)
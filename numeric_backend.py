@@ -0,0 +1,331 @@
+"""نوع عددی قابل انتخاب برای مقادیر و نسبت‌ها
+
+سه پیاده‌سازی با رابط یکسان:
+
+    float     float64؛ سریع‌ترین و برداری (خطای گرد کردن دودویی در رقم‌های آخر)
+    fixed     ممیز ثابت با عدد صحیح مقیاس شده (پیش‌فرض ۲ رقم اعشار، fixed:N برای
+              N رقم)؛ مبالغ ریالی و تبدیل واحد به میلیون دقیق است و نسبت‌ها به
+              صورت کسر دقیق محاسبه و سپس گرد می‌شوند. محاسبه ستونی با int64 انجام
+              می‌شود و اگر حاصل‌ضرب‌ها از بازه int64 بیرون بزنند با اعداد صحیح
+              پایتون (بدون سرریز)
+    decimal   Decimal با دقت ۲۸ رقم و quantize هر نسبت (مسیر قبلی test10 و test12)
+
+انتخاب با آرگومان numeric تحلیلگرها یا متغیر محیطی EXALL_NUMERIC؛ پیش‌فرض
+test10 و test12 همان decimal و پیش‌فرض pisi و hai همان float است.
+
+    backend = get_backend('fixed')
+    value = backend.number('1234.5')                # از متن عددی پاکسازی شده
+    millions = backend.scale(value, 1_000_000)
+    ratios = backend.evaluate(engine, records)      # {کلید: {نسبت: مقدار}}
+"""
+import os
+import math
+import numbers
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from fractions import Fraction
+
+import numpy as np
+
+BACKENDS = ('float', 'fixed', 'decimal')
+
+# بزرگ‌ترین قدر مطلق مجاز حاصل‌ضرب‌ها در مسیر int64 (با حاشیه برای جمع جمله‌ها)
+_INT64_LIMIT = 2 ** 62
+_FLOAT_EXACT = 2 ** 53
+
+
+class FixedPoint:
+    """مقدار ممیز ثابت: عدد صحیح units بر حسب 10^-digits واحد"""
+
+    __slots__ = ('units', 'digits')
+
+    def __init__(self, units, digits):
+        self.units = int(units)
+        self.digits = digits
+
+    def __float__(self):
+        return self.units / 10 ** self.digits
+
+    def __bool__(self):
+        return self.units != 0
+
+    def __eq__(self, other):
+        if isinstance(other, FixedPoint):
+            return self.to_decimal() == other.to_decimal()
+        if isinstance(other, (int, Decimal)):
+            return self.to_decimal() == other
+        if isinstance(other, float):
+            return float(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.to_decimal())
+
+    def __neg__(self):
+        return FixedPoint(-self.units, self.digits)
+
+    def to_decimal(self):
+        return Decimal(self.units).scaleb(-self.digits)
+
+    def __repr__(self):
+        return f"FixedPoint('{self.to_decimal()}')"
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+
+numbers.Number.register(FixedPoint)
+
+
+def round_half_up(numerator, denominator):
+    """گرد کردن کسر صحیح numerator/denominator به نزدیک‌ترین عدد صحیح (نیمه دور از صفر)"""
+    sign = -1 if (numerator < 0) != (denominator < 0) else 1
+    numerator, denominator = abs(numerator), abs(denominator)
+    return sign * ((2 * numerator + denominator) // (2 * denominator))
+
+
+class FloatBackend:
+    name = 'float'
+    zero = 0.0
+
+    def number(self, text):
+        """عدد از متن عددی پاکسازی شده؛ None اگر قابل تبدیل نباشد"""
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+    def scale(self, value, divisor):
+        return value / divisor
+
+    def exact(self, text):
+        """بازیابی دقیق مقداری که با str ذخیره شده است"""
+        return float(text)
+
+    def evaluate(self, engine, records):
+        return engine.evaluate_records(records)
+
+    def evaluate_one(self, engine, values):
+        return engine.evaluate_one(values)
+
+
+class DecimalBackend(FloatBackend):
+    name = 'decimal'
+    zero = Decimal('0')
+
+    def number(self, text):
+        try:
+            return Decimal(text)
+        except (InvalidOperation, ValueError):
+            return None
+
+    def scale(self, value, divisor):
+        return value / Decimal(divisor)
+
+    def exact(self, text):
+        return Decimal(text)
+
+    @staticmethod
+    def to_decimal(value):
+        if value is None:
+            return Decimal('0')
+        if isinstance(value, Decimal):
+            return value if value.is_finite() else Decimal('0')
+        if isinstance(value, FixedPoint):
+            return value.to_decimal()
+        value = float(value)
+        return Decimal(repr(value)) if math.isfinite(value) else Decimal('0')
+
+    def evaluate_one(self, engine, values):
+        inputs = {name: self.to_decimal(values.get(name)) for name in engine.inputs}
+
+        def combine(terms):
+            return sum((Decimal(repr(coefficient)) * inputs[name] for name, coefficient in terms),
+                       Decimal('0'))
+
+        fill = None if math.isnan(engine.fill) else Decimal(repr(float(engine.fill)))
+        ratios = {}
+        for spec in engine.specs:
+            denominator = combine(spec.denominator)
+            if any(inputs[name] == 0 for name in spec.requires):
+                continue
+            if engine.positive_denominator and not denominator > 0:
+                continue
+
+            bounds, min_abs, places = engine.settings(spec)
+            ratio = None
+            if denominator != 0:
+                ratio = combine(spec.numerator) / denominator * Decimal(repr(spec.multiplier))
+                if bounds is not None and not (Decimal(repr(float(bounds[0]))) <= ratio
+                                               <= Decimal(repr(float(bounds[1])))):
+                    ratio = None
+                elif min_abs and abs(ratio) < Decimal(repr(float(min_abs))):
+                    ratio = None
+
+            if ratio is None:
+                ratio = fill
+            elif places is not None:
+                ratio = ratio.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+            if ratio is not None:
+                ratios[spec.name] = ratio
+        return ratios
+
+    def evaluate(self, engine, records):
+        return {key: self.evaluate_one(engine, values) for key, values in records.items()}
+
+
+class FixedBackend(FloatBackend):
+    name = 'fixed'
+
+    def __init__(self, digits=2):
+        self.digits = digits
+        self.zero = FixedPoint(0, digits)
+
+    @staticmethod
+    def to_units(value, digits):
+        """مقدار به واحدهای 10^-digits (صحیح، گرد شده نیمه دور از صفر)"""
+        if value is None:
+            return 0
+        if isinstance(value, FixedPoint):
+            if value.digits <= digits:
+                return value.units * 10 ** (digits - value.digits)
+            value = value.to_decimal()
+        if not isinstance(value, Decimal):
+            value = float(value)
+            if not math.isfinite(value):
+                return 0
+            value = Decimal(repr(value))
+        if not value.is_finite():
+            return 0
+        return int(value.scaleb(digits).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def number(self, text):
+        try:
+            return FixedPoint(self.to_units(Decimal(text), self.digits), self.digits)
+        except (InvalidOperation, ValueError):
+            return None
+
+    def exact(self, text):
+        """بازیابی با همان تعداد رقم اعشار متن (بدون گرد کردن)"""
+        value = Decimal(text)
+        digits = max(-value.as_tuple().exponent, 0)
+        return FixedPoint(int(value.scaleb(digits)), digits)
+
+    def scale(self, value, divisor):
+        """تقسیم بر divisor؛ برای توان‌های ۱۰ فقط تعداد رقم اعشار افزایش می‌یابد (دقیق)"""
+        divisor = int(divisor)
+        power = len(str(divisor)) - 1
+        if divisor == 10 ** power:
+            return FixedPoint(value.units, value.digits + power)
+        return FixedPoint(round_half_up(value.units, divisor), value.digits)
+
+    def evaluate_one(self, engine, values):
+        return self.evaluate(engine, {None: values})[None]
+
+    def evaluate(self, engine, records):
+        """نسبت‌های دقیق همه رکوردها با عملیات ستونی روی اعداد صحیح"""
+        keys = list(records)
+        # نسبت‌ها به مقیاس مشترک وابسته نیستند؛ همه مقادیر به بیشترین رقم اعشار برده می‌شوند
+        digits = max([self.digits] + [value.digits for values in records.values()
+                                      for value in values.values() if isinstance(value, FixedPoint)])
+        units = {name: [self.to_units(records[key].get(name), digits) for key in keys]
+                 for name in engine.inputs}
+        results = {spec.name: self._evaluate_spec(engine, spec, units, len(keys)) for spec in engine.specs}
+
+        output = {}
+        for i, key in enumerate(keys):
+            output[key] = {name: float(values[i]) for name, values in results.items()
+                           if not math.isnan(values[i])}
+        return output
+
+    def _evaluate_spec(self, engine, spec, units, size):
+        bounds, min_abs, places = engine.settings(spec)
+        multiplier = Fraction(repr(spec.multiplier))
+        scale = 10 ** places if places is not None else 1
+        terms = [(name, Fraction(repr(coefficient))) for name, coefficient in spec.numerator + spec.denominator]
+        # ضرایب و ضریب نسبت کسری به مخرج مشترک برده می‌شوند تا همه چیز صحیح بماند
+        common = math.lcm(multiplier.denominator, *(coefficient.denominator for _, coefficient in terms))
+
+        limits = [Fraction(repr(float(b))) for b in (bounds or ())]
+        if min_abs:
+            limits.append(Fraction(repr(float(min_abs))))
+        # مقایسه با مرزها صورت و مخرج را در صورت و مخرج مرز ضرب می‌کند
+        widest = max([1] + [max(abs(limit.numerator), limit.denominator) for limit in limits])
+
+        magnitude = max([abs(v) for values in units.values() for v in values] + [1])
+        factor = (common * max(abs(multiplier.numerator), multiplier.denominator)
+                  * max(scale, widest) * 2 * len(terms))
+        dtype = np.int64 if magnitude * factor < _INT64_LIMIT else object
+
+        def column(name):
+            return np.array(units[name], dtype=dtype)
+
+        def combine(expression):
+            total = np.zeros(size, dtype=dtype)
+            for name, coefficient in expression:
+                total = total + column(name) * int(coefficient * common)
+            return total
+
+        numerator = combine(spec.numerator) * multiplier.numerator
+        denominator = combine(spec.denominator) * multiplier.denominator
+
+        applicable = np.ones(size, dtype=bool)
+        for name in spec.requires:
+            applicable &= column(name) != 0
+        if engine.positive_denominator:
+            applicable &= denominator > 0
+
+        valid = denominator != 0
+        safe_denominator = np.where(valid, denominator, 1)
+        sign = np.where(safe_denominator < 0, -1, 1)
+        # مقایسه نسبت با مرزها بدون تقسیم: ratio >= b معادل numerator*sign*b.den >= b.num*|denominator|
+        if bounds is not None:
+            low, high = Fraction(repr(float(bounds[0]))), Fraction(repr(float(bounds[1])))
+            signed = numerator * sign
+            absolute = safe_denominator * sign
+            valid &= signed * low.denominator >= absolute * low.numerator
+            valid &= signed * high.denominator <= absolute * high.numerator
+        if min_abs:
+            limit = Fraction(repr(float(min_abs)))
+            valid &= abs(numerator) * limit.denominator >= abs(safe_denominator) * limit.numerator
+
+        # تبدیل نهایی به float با گرد کردن درست؛ int64 فقط تا 2^53 بدون خطا به float64 می‌رود
+        if places is None:
+            if dtype is object or max(np.abs(numerator).max(initial=0), np.abs(safe_denominator).max()) >= _FLOAT_EXACT:
+                ratio = np.array([int(n) / int(d) for n, d in zip(numerator, safe_denominator)], dtype=np.float64)
+            else:
+                ratio = numerator.astype(np.float64) / safe_denominator.astype(np.float64)
+        else:
+            if dtype is object:
+                rounded = np.array([round_half_up(n * scale, d) for n, d in zip(numerator, safe_denominator)],
+                                   dtype=object)
+            else:
+                rounded = self._round_int64(numerator * scale, safe_denominator)
+            if dtype is object or np.abs(rounded).max(initial=0) >= _FLOAT_EXACT:
+                ratio = np.array([int(q) / scale for q in rounded], dtype=np.float64)
+            else:
+                ratio = rounded.astype(np.float64) / scale
+
+        ratio = np.where(valid, ratio, engine.fill)
+        return np.where(applicable, ratio, np.nan)
+
+    @staticmethod
+    def _round_int64(numerator, denominator):
+        sign = np.where((numerator < 0) != (denominator < 0), -1, 1)
+        numerator, denominator = np.abs(numerator), np.abs(denominator)
+        return sign * ((2 * numerator + denominator) // (2 * denominator))
+
+
+def get_backend(name=None, default='float'):
+    """نوع عددی با نام داده شده، یا EXALL_NUMERIC، یا پیش‌فرض تحلیلگر"""
+    if name is not None and not isinstance(name, str):
+        return name
+    name = (name or os.getenv('EXALL_NUMERIC') or default).lower()
+    if name == 'float':
+        return FloatBackend()
+    if name == 'decimal':
+        return DecimalBackend()
+    if name.startswith('fixed'):
+        # fixed یا fixed:N برای N رقم اعشار
+        _, _, digits = name.partition(':')
+        return FixedBackend(int(digits) if digits else 2)
+    raise ValueError(f"نوع عددی ناشناخته: {name} ({'، '.join(BACKENDS)})")
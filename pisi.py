@@ -1,756 +1,957 @@
-import os
-import pandas as pd
-import numpy as np
-import warnings
-from datetime import datetime
-from pathlib import Path
-import glob
-
-# غیرفعال کردن هشدارها
-warnings.filterwarnings('ignore')
-
-
-class FinancialAnalyzer:
-    def __init__(self, base_folder):
-        """مقداردهی اولیه"""
-        self.base_folder = Path(base_folder)
-        self.output_folder = self.base_folder / 'reports'
-        self.output_folder.mkdir(exist_ok=True)
-
-        # الگوهای جستجو برای یافتن مقادیر
-        self.search_patterns = {
-            'دارایی جاری': [
-                'جمع دارایی‌های جاری', 'جمع داراییهای جاری', 'دارایی‌های جاری',
-                'داراییهای جاری', 'دارایی های جاری', 'جمع دارایی های جاری',
-                'دارایی جاری', 'داراییهای جاری', 'دارائیهای جاری', 'دارائی های جاری',
-                'جمع داراییهای جاری', 'جمع دارائیهای جاری', 'مجموع داراییهای جاری',
-                'جمع حسابهای دارایی جاری', 'کل دارایی های جاری', 'مجموع دارایی‌های جاری',
-                'جمع کل دارایی‌های جاری', 'جمع کل داراییهای جاری', 'دارایی‌های جاری - جمع',
-                'جمع داراییهای جاری و غیر جاری'
-            ],
-            'کل دارایی ها': [
-                'جمع دارایی‌ها', 'جمع داراییها', 'جمع کل دارایی‌ها',
-                'کل دارایی‌ها', 'دارایی ها', 'جمع دارایی ها',
-                'جمع کل داراییها', 'جمع کل دارائیها', 'کل داراییها',
-                'جمع داراییها', 'جمع دارائیها', 'مجموع کل داراییها',
-                'جمع حسابهای دارایی', 'مجموع داراییها', 'دارایی های کل',
-                'جمع کل حسابهای دارایی', 'جمع دارایی های شرکت',
-                'مجموع دارایی‌ها', 'جمع داراییهای جاری و غیر جاری',
-                'دارایی‌ها - جمع کل', 'جمع کل'
-            ],
-            'بدهی جاری': [
-                'جمع بدهی‌های جاری', 'جمع بدهیهای جاری', 'بدهی‌های جاری',
-                'بدهیهای جاری', 'بدهی های جاری', 'جمع بدهی های جاری',
-                'بدهی جاری', 'بدهیهای جاری', 'بدهی‌های جاری', 'جمع کل بدهی های جاری',
-                'مجموع بدهیهای جاری', 'کل بدهیهای جاری', 'جمع حسابهای بدهی جاری',
-                'مجموع بدهی‌های جاری', 'جمع کل بدهی‌های جاری',
-                'بدهی‌های جاری - جمع', 'جمع بدهی‌های کوتاه مدت'
-            ],
-            'کل بدهی ها': [
-                'جمع بدهی‌ها', 'جمع بدهیها', 'جمع کل بدهی‌ها',
-                'کل بدهی‌ها', 'بدهی ها', 'جمع بدهی ها',
-                'جمع کل بدهیها', 'مجموع بدهیها', 'کل بدهیها',
-                'جمع بدهی‌های جاری و غیرجاری', 'مجموع کل بدهی ها',
-                'جمع حسابهای بدهی', 'بدهی های کل', 'جمع کل حسابهای بدهی',
-                'مجموع بدهی‌ها', 'بدهی‌ها - جمع کل', 'جمع بدهی های شرکت'
-            ],
-            'فروش': [
-                'درآمدهای عملیاتی', 'درآمد عملیاتی', 'فروش خالص',
-                'فروش', 'درآمد حاصل از فروش', 'فروش و درآمد ارائه خدمات',
-                'جمع درآمدهای عملیاتی', 'درآمد حاصل از فروش کالا',
-                'فروش کالا و خدمات', 'درآمد عملیاتی - خالص',
-                'فروش خالص و درآمد ارائه خدمات', 'درآمد خالص',
-                'درآمد عملیاتی خالص', 'فروش و درآمد خالص',
-                'درآمد حاصل از فروش و ارائه خدمات'
-            ],
-            'سود ناخالص': [
-                'سود ناخالص', 'سود (زیان) ناخالص', 'سود و زیان ناخالص',
-                'سود(زیان)ناخالص', 'سود/زیان ناخالص', 'سود یا زیان ناخالص',
-                'سود (زیان) ناخالص فروش', 'سود ناخالص عملیاتی',
-                'سود و زیان ناخالص عملیاتی', 'ناخالص سود و زیان'
-            ],
-            'سود عملیاتی': [
-                'سود عملیاتی', 'سود (زیان) عملیاتی', 'سود و زیان عملیاتی',
-                'سود(زیان)عملیاتی', 'سود/زیان عملیاتی', 'سود یا زیان عملیاتی',
-                'سود و زیان خالص عملیات', 'سود خالص عملیاتی',
-                'سود عملیاتی خالص', 'سود و زیان عملیاتی خالص'
-            ],
-            'سود خالص': [
-                'سود خالص', 'سود (زیان) خالص', 'سود خالص دوره',
-                'سود(زیان)خالص', 'سود/زیان خالص', 'سود یا زیان خالص',
-                'سود خالص پس از کسر مالیات', 'سود و زیان خالص',
-                'سود (زیان) خالص دوره', 'سود خالص سال',
-                'سود و زیان خالص دوره', 'سود دوره خالص'
-            ],
-            'موجودی کالا': [
-                'موجودی مواد و کالا', 'موجودی کالا', 'موجودی‌های مواد و کالا',
-                'موجودی کالا و مواد', 'موجودیهای مواد و کالا',
-                'موجودی مواد، کالا و قطعات', 'موجودی مواد',
-                'موجودی کالای ساخته شده', 'موجودی کالای در جریان ساخت',
-                'موجودی مواد اولیه', 'موجودی قطعات و ملزومات',
-                'موجودی کالای در راه', 'موجودی مواد و کالای ساخته شده'
-            ],
-            'حساب های دریافتنی': [
-                'حساب‌های دریافتنی تجاری', 'حسابهای دریافتنی', 'دریافتنی‌های تجاری',
-                'حساب های دریافتنی تجاری', 'دریافتنی های تجاری',
-                'حسابها و اسناد دریافتنی تجاری', 'حساب‌های دریافتنی',
-                'حسابهای دریافتنی عملیاتی', 'دریافتنی های عملیاتی',
-                'حساب و اسناد دریافتنی تجاری', 'مطالبات تجاری',
-                'حسابهای دریافتنی - خالص', 'دریافتنی های تجاری و غیرتجاری'
-            ]
-        }
-    def clean_number(self, value):
-        """تمیز کردن و تبدیل مقادیر عددی"""
-        try:
-            if isinstance(value, (int, float)):
-                return float(value)
-
-            value = str(value).strip()
-            value = value.replace(',', '').replace('٬', '')
-            value = value.replace('(', '-').replace(')', '')
-            value = value.replace('−', '-').replace('–', '-')
-
-            # حذف کاراکترهای غیر عددی
-            value = ''.join(c for c in value if c.isdigit() or c in '.-')
-
-            if value and value not in ['-', '.']:
-                return float(value)
-            return 0
-        except:
-            return 0
-
-    def find_value_in_df(self, df, keywords):
-        """جستجوی مقادیر در دیتافریم با دقت بیشتر"""
-        try:
-            def normalize_text(text):
-                """نرمال‌سازی متن فارسی"""
-                text = str(text).strip()
-                persians = {
-                    '‌': ' ', 'ي': 'ی', 'ك': 'ک', '\u200c': ' ',
-                    '،': ' ', '؛': ' ', '\n': ' ', '\r': ' ', '\t': ' ',
-                    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-                    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'
-                }
-                for old, new in persians.items():
-                    text = text.replace(old, new)
-                return ' '.join(text.split())
-
-            def find_number_in_row(row, col_idx, keyword):
-                """یافتن عدد معتبر در سطر"""
-                # الگوی جستجو در ستون‌های مجاور
-                check_order = [
-                    1,  # ستون بعدی
-                    2,  # دو ستون بعد
-                    -1,  # ستون قبلی
-                    0,  # ستون فعلی
-                    3,  # سه ستون بعد
-                    -2,  # دو ستون قبل
-                    4  # چهار ستون بعد
-                ]
-
-                found_values = []
-                for offset in check_order:
-                    target_idx = col_idx + offset
-                    if 0 <= target_idx < len(row):
-                        value = self.clean_number(row[target_idx])
-                        if value > 0 and value < 1e12:  # محدوده معقول
-                            found_values.append({
-                                'value': value,
-                                'distance': abs(offset),
-                                'position': target_idx
-                            })
-
-                if found_values:
-                    # اولویت با نزدیک‌ترین مقدار معتبر
-                    found_values.sort(key=lambda x: (x['distance'], -x['value']))
-                    return found_values[0]['value']
-                return None
-
-            # آماده‌سازی دیتافریم
-            df = df.fillna('')
-            df = df.replace('[\$,)]', '', regex=True)
-            df = df.replace('[(]', '-', regex=True)
-            df = df.astype(str)
-
-            best_value = None
-            best_location = None
-            keyword_matches = []
-
-            # جستجو برای هر کلیدواژه
-            for keyword in keywords:
-                normalized_keyword = normalize_text(keyword)
-
-                # بررسی هر سطر
-                for idx, row in df.iterrows():
-                    for col in df.columns:
-                        cell_value = normalize_text(row[col])
-
-                        # اگر کلیدواژه در سلول پیدا شد
-                        if normalized_keyword in cell_value:
-                            col_idx = df.columns.get_loc(col)
-                            value = find_number_in_row(row, col_idx, keyword)
-
-                            if value is not None:
-                                keyword_matches.append({
-                                    'value': value,
-                                    'location': f"سطر {idx + 1}, ستون {col}",
-                                    'keyword': keyword
-                                })
-
-            if keyword_matches:
-                # حذف مقادیر تکراری
-                unique_values = []
-                seen = set()
-                for match in keyword_matches:
-                    if match['value'] not in seen:
-                        unique_values.append(match)
-                        seen.add(match['value'])
-
-                if len(unique_values) == 1:
-                    best_match = unique_values[0]
-                    print(f"\nمقدار یافت شده برای '{best_match['keyword']}': "
-                          f"{best_match['value']:,.0f} در {best_match['location']}")
-                    return best_match['value']
-
-                elif len(unique_values) > 1:
-                    # مرتب‌سازی بر اساس مقدار
-                    values = [match['value'] for match in unique_values]
-                    values.sort()
-
-                    # بررسی پراکندگی مقادیر
-                    if len(values) >= 3:
-                        # حذف مقادیر پرت با IQR
-                        q1 = np.percentile(values, 25)
-                        q3 = np.percentile(values, 75)
-                        iqr = q3 - q1
-                        lower_bound = q1 - (1.5 * iqr)
-                        upper_bound = q3 + (1.5 * iqr)
-                        filtered_values = [v for v in values if lower_bound <= v <= upper_bound]
-                    else:
-                        filtered_values = values
-
-                    if filtered_values:
-                        # انتخاب مقدار مناسب
-                        max_value = max(filtered_values)
-                        min_value = min(filtered_values)
-                        ratio = max_value / min_value if min_value > 0 else float('inf')
-
-                        if ratio > 10:  # اختلاف زیاد
-                            selected_value = np.median(filtered_values)
-                            print(f"\nاستفاده از میانه به دلیل پراکندگی زیاد (نسبت: {ratio:.2f})")
-                        else:
-                            selected_value = max_value
-                            print(f"\nاستفاده از مقدار حداکثر (نسبت: {ratio:.2f})")
-
-                        # نمایش مقدار انتخاب شده
-                        matching_location = next(
-                            match['location'] for match in unique_values
-                            if match['value'] == selected_value
-                        )
-                        print(f"مقدار نهایی: {selected_value:,.0f} در {matching_location}")
-                        return selected_value
-
-            print("هیچ مقدار معتبری یافت نشد")
-            return 0
-
-        except Exception as e:
-            print(f"خطا در جستجوی مقدار: {str(e)}")
-            return 0
-
-    def clean_number(self, value):
-        """تبدیل مقادیر به عدد با دقت بالا"""
-        try:
-            if isinstance(value, (int, float)):
-                return float(value)
-
-            # تبدیل به رشته و پاکسازی
-            value = str(value).strip()
-
-            # حذف کاراکترهای اضافی
-            value = value.replace(',', '')
-            value = value.replace('٬', '')
-            value = value.replace('(', '-')
-            value = value.replace(')', '')
-
-            # تبدیل اعداد فارسی
-            persian_nums = {'۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
-                            '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'}
-            for persian, latin in persian_nums.items():
-                value = value.replace(persian, latin)
-
-            # حذف همه کاراکترها به جز اعداد و علائم خاص
-            value = ''.join(c for c in value if c.isdigit() or c in '.-')
-
-            if value and value not in ['-', '.']:
-                return float(value)
-            return 0
-
-        except:
-
-            return 0
-
-    def read_financial_data(self, file_path):
-        """خواندن داده‌های مالی از فایل اکسل با دقت بیشتر"""
-        try:
-            # خواندن فایل اکسل با روش‌های مختلف
-            df = None
-            try:
-                df = pd.read_excel(file_path, header=None)
-                if df.empty:
-                    df = pd.read_excel(file_path, header=0)
-            except:
-                try:
-                    df = pd.read_excel(file_path, header=0)
-                except Exception as e:
-                    print(f"خطا در خواندن فایل {file_path}: {str(e)}")
-                    return None
-
-            if df is None or df.empty:
-                print(f"فایل {file_path} خالی است یا قابل خواندن نیست.")
-                return None
-
-            # پاکسازی و آماده‌سازی داده‌ها
-            df = df.dropna(axis=1, how='all')  # حذف ستون‌های خالی
-            df = df.fillna('')  # پر کردن مقادیر NaN با مقدار خالی
-
-            # استخراج سال از نام فایل
-            try:
-                file_name = str(file_path)
-                if '\\' in file_name:
-                    year = file_name.split('_')[0].split('\\')[-1]
-                else:
-                    year = file_name.split('/')[-1].split('_')[0]
-            except:
-                print("خطا در استخراج سال از نام فایل")
-                return None
-
-            # دیکشنری برای ذخیره داده‌ها
-            data = {'سال': year}
-            found_data = False
-
-            # جستجوی مقادیر با روش‌های مختلف
-            for metric, patterns in self.search_patterns.items():
-                max_value = 0
-                value_found = False
-
-                # روش‌های مختلف جستجو
-                search_attempts = [
-                    (df, "اصلی"),
-                    (df.transpose(), "ترانسپوز"),
-                    (df.astype(str), "متنی")
-                ]
-
-                for search_df, method in search_attempts:
-                    if not value_found:
-                        value = self.find_value_in_df(search_df, patterns)
-                        if value > 0:
-                            max_value = max(max_value, value)
-                            value_found = True
-                            found_data = True
-                            print(f"{metric} (روش {method}): {max_value:,.0f}")
-
-                # ذخیره مقدار نهایی
-                data[metric] = max_value
-
-            # بررسی صحت داده‌ها
-            required_fields = [
-                'دارایی جاری', 'کل دارایی ها', 'بدهی جاری',
-                'کل بدهی ها', 'فروش', 'سود ناخالص',
-                'سود عملیاتی', 'سود خالص', 'موجودی کالا'
-            ]
-
-            missing_fields = [field for field in required_fields if data.get(field, 0) == 0]
-
-            if missing_fields:
-                print("\nفیلدهای یافت نشده:")
-                for field in missing_fields:
-                    print(f"- {field}")
-
-            if not found_data:
-                print("هیچ داده معتبری در فایل یافت نشد!")
-                return None
-
-            # چاپ خلاصه داده‌های یافت شده
-            print("\nخلاصه داده‌های یافت شده:")
-            for metric, value in data.items():
-                if metric != 'سال' and value > 0:
-                    print(f"{metric}: {value:,.0f}")
-
-            return data
-
-        except Exception as e:
-            print(f"خطای کلی در پردازش فایل {file_path}:")
-            print(str(e))
-            import traceback
-            print(traceback.format_exc())
-            return None
-
-    def calculate_ratios(self, data):
-        """محاسبه نسبت‌های مالی با دقت بالا"""
-        try:
-            def safe_divide(num, denom, multiplier=1, metric_name=""):
-                """محاسبه نسبت با کنترل دقیق خطا"""
-                try:
-                    if not isinstance(num, (int, float)) or not isinstance(denom, (int, float)):
-                        print(f"خطا در {metric_name}: مقادیر ورودی باید عددی باشند")
-                        return None
-
-                    if denom == 0:
-                        print(f"خطا در {metric_name}: مخرج صفر است")
-                        return None
-
-                    ratio = (float(num) / float(denom)) * multiplier
-
-                    # کنترل محدوده منطقی
-                    if abs(ratio) < 0.000001:
-                        print(f"هشدار در {metric_name}: مقدار محاسبه شده بسیار کوچک است")
-                        return None
-                    if abs(ratio) > 1000:
-                        print(f"هشدار در {metric_name}: مقدار محاسبه شده بسیار بزرگ است")
-                        return None
-
-                    return round(ratio, 6)
-                except Exception as e:
-                    print(f"خطا در محاسبه {metric_name}: {str(e)}")
-                    return None
-
-            # تبدیل داده‌های ورودی
-            metrics = {
-                'current_assets': float(data.get('دارایی جاری', 0)),
-                'total_assets': float(data.get('کل دارایی ها', 0)),
-                'current_liab': float(data.get('بدهی جاری', 0)),
-                'total_liab': float(data.get('کل بدهی ها', 0)),
-                'inventory': float(data.get('موجودی کالا', 0)),
-                'sales': float(data.get('فروش', 0)),
-                'gross_profit': float(data.get('سود ناخالص', 0)),
-                'operating_profit': float(data.get('سود عملیاتی', 0)),
-                'net_profit': float(data.get('سود خالص', 0))
-            }
-
-            # نمایش مقادیر ورودی
-            print("\n=== مقادیر ورودی ===")
-            for name, value in metrics.items():
-                print(f"{name}: {value:,.0f}")
-
-            ratios = {}
-
-            # محاسبه نسبت‌های نقدینگی
-            print("\n=== محاسبه نسبت‌های نقدینگی ===")
-            if metrics['current_liab'] > 0:
-                # نسبت جاری
-                current_ratio = safe_divide(
-                    metrics['current_assets'],
-                    metrics['current_liab'],
-                    1,
-                    "نسبت جاری"
-                )
-                if current_ratio is not None:
-                    ratios['نسبت جاری'] = current_ratio
-                    print(f"نسبت جاری: {current_ratio:.6f}")
-                    # تحلیل نسبت جاری
-                    if current_ratio < 1:
-                        print("هشدار: نسبت جاری کمتر از 1 است - نشان‌دهنده مشکل در نقدینگی")
-                    elif current_ratio > 3:
-                        print("هشدار: نسبت جاری بیش از حد بالاست - احتمال عدم استفاده بهینه از دارایی‌ها")
-
-                # نسبت آنی
-                quick_assets = metrics['current_assets'] - metrics['inventory']
-                quick_ratio = safe_divide(
-                    quick_assets,
-                    metrics['current_liab'],
-                    1,
-                    "نسبت آنی"
-                )
-                if quick_ratio is not None:
-                    ratios['نسبت آنی'] = quick_ratio
-                    print(f"نسبت آنی: {quick_ratio:.6f}")
-                    # تحلیل نسبت آنی
-                    if quick_ratio < 0.5:
-                        print("هشدار: نسبت آنی پایین است - ممکن است نشان‌دهنده مشکل نقدینگی باشد")
-
-            # محاسبه نسبت‌های سودآوری
-            print("\n=== محاسبه نسبت‌های سودآوری ===")
-            if metrics['sales'] > 0:
-                # حاشیه سود ناخالص
-                gross_margin = safe_divide(
-                    metrics['gross_profit'],
-                    metrics['sales'],
-                    100,
-                    "حاشیه سود ناخالص"
-                )
-                if gross_margin is not None:
-                    ratios['حاشیه سود ناخالص'] = gross_margin
-                    print(f"حاشیه سود ناخالص: {gross_margin:.6f}%")
-
-                # حاشیه سود عملیاتی
-                operating_margin = safe_divide(
-                    metrics['operating_profit'],
-                    metrics['sales'],
-                    100,
-                    "حاشیه سود عملیاتی"
-                )
-                if operating_margin is not None:
-                    ratios['حاشیه سود عملیاتی'] = operating_margin
-                    print(f"حاشیه سود عملیاتی: {operating_margin:.6f}%")
-
-                # حاشیه سود خالص
-                net_margin = safe_divide(
-                    metrics['net_profit'],
-                    metrics['sales'],
-                    100,
-                    "حاشیه سود خالص"
-                )
-                if net_margin is not None:
-                    ratios['حاشیه سود خالص'] = net_margin
-                    print(f"حاشیه سود خالص: {net_margin:.6f}%")
-                    # تحلیل حاشیه سود
-                    if net_margin < 0:
-                        print("هشدار: حاشیه سود خالص منفی است")
-                    elif net_margin > 50:
-                        print("توجه: حاشیه سود خالص بسیار بالاست")
-
-            # محاسبه نسبت‌های اهرمی
-            print("\n=== محاسبه نسبت‌های اهرمی ===")
-            if metrics['total_assets'] > 0:
-                debt_ratio = safe_divide(
-                    metrics['total_liab'],
-                    metrics['total_assets'],
-                    100,
-                    "نسبت بدهی"
-                )
-                if debt_ratio is not None:
-                    ratios['نسبت بدهی'] = debt_ratio
-                    print(f"نسبت بدهی: {debt_ratio:.6f}%")
-                    # تحلیل نسبت بدهی
-                    if debt_ratio > 70:
-                        print("هشدار: نسبت بدهی بالاست - ریسک مالی زیاد")
-
-            # خلاصه نتایج
-            print(f"\n=== خلاصه نتایج ===")
-            print(f"تعداد نسبت‌های محاسبه شده: {len(ratios)}")
-            if len(ratios) == 0:
-                print("هشدار: هیچ نسبتی محاسبه نشد!")
-            elif len(ratios) < 4:
-                print("هشدار: تعداد نسبت‌های محاسبه شده کمتر از حد انتظار است")
-
-            return ratios
-
-        except Exception as e:
-            print(f"\nخطای کلی در محاسبه نسبت‌ها: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return {}
-
-    def save_results(self, results, output_path):
-        """ذخیره نتایج در اکسل با فرمت عمودی و شرکت‌ها در هدر"""
-        try:
-            with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
-                workbook = writer.book
-
-                # تعریف فرمت‌ها
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'bg_color': '#D8E4BC',
-                    'border': 1,
-                    'text_wrap': True
-                })
-
-                number_format = workbook.add_format({
-                    'num_format': '#,##0.000000',
-                    'align': 'center',
-                    'border': 1
-                })
-
-                # تعریف متغیرها و نسبت‌ها
-                ratios = [
-                    'نسبت جاری',
-                    'نسبت آنی',
-                    'حاشیه سود ناخالص',
-                    'حاشیه سود عملیاتی',
-                    'حاشیه سود خالص',
-                    'نسبت بدهی'
-                ]
-
-                years = ['1398', '1399', '1400', '1401', '1402']
-                companies = sorted(results.keys())
-
-                # ایجاد شیت نسبت‌های مالی
-                worksheet = workbook.add_worksheet('نسبت‌های مالی')
-
-                # تنظیم عرض ستون‌ها
-                worksheet.set_column(0, 0, 25)  # ستون شاخص
-                worksheet.set_column(1, 30, 15)  # ستون‌های داده
-
-                # نوشتن هدر شرکت‌ها
-                current_col = 1
-                for company in companies:
-                    # ادغام سلول‌ها برای نام شرکت
-                    worksheet.merge_range(0, current_col, 0, current_col + 4, company, header_format)
-
-                    # نوشتن سال‌ها
-                    for i, year in enumerate(years):
-                        worksheet.write(1, current_col + i, year, header_format)
-
-                    current_col += 5
-
-                # نوشتن نام نسبت‌ها
-                for i, ratio in enumerate(ratios):
-                    worksheet.write(i + 2, 0, ratio, header_format)
-
-                # نوشتن داده‌ها
-                # در تابع save_results، قسمت نوشتن داده‌ها را اینطور تغییر دهید:
-
-                # نوشتن داده‌ها
-                current_col = 1
-                for company in companies:
-                    for year_idx, year in enumerate(years):
-                        if year in results[company]:
-                            ratios_data = results[company][year].get('نسبت‌ها', {})
-                            for ratio_idx, ratio in enumerate(ratios):
-                                value = ratios_data.get(ratio)
-                                if value is not None and value != 0:
-                                    worksheet.write_number(ratio_idx + 2, current_col + year_idx, value, number_format)
-                                else:
-                                    worksheet.write_blank(ratio_idx + 2, current_col + year_idx, None, number_format)
-
-                    current_col += 5
-
-                # تنظیم فریز پنل
-                worksheet.freeze_panes(2, 1)
-
-                print(f"\nنتایج با موفقیت در فایل زیر ذخیره شد:\n{output_path}")
-
-                # چاپ مقادیر برای اطمینان از صحت داده‌ها
-                print("\nمقادیر ذخیره شده:")
-                for company in companies:
-                    print(f"\nشرکت {company}:")
-                    for year in years:
-                        if year in results[company]:
-                            ratios_data = results[company][year].get('نسبت‌ها', {})
-                            print(f"\nسال {year}:")
-                            for ratio in ratios:
-                                value = ratios_data.get(ratio, 0)
-                                print(f"{ratio}: {value:.6f}")
-
-                return True
-
-        except Exception as e:
-            print(f"خطا در ذخیره نتایج: {str(e)}")
-            return False
-
-
-def main():
-    print("\n=== سیستم تحلیل مالی ===")
-    print(f"زمان اجرا: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"کاربر: {os.getenv('USERNAME', 'unknown')}")
-
-    try:
-        # تنظیم مسیر خروجی
-        output_base_path = Path("C:\\retina_env\\BOT\\sorat\\reports")
-        output_base_path.mkdir(parents=True, exist_ok=True)
-
-        # دریافت مسیر ورودی
-        folder_path = input("\nلطفاً مسیر پوشه حاوی فایل‌های اکسل را وارد کنید: ").strip()
-        if not os.path.exists(folder_path):
-            print("خطا: مسیر وارد شده وجود ندارد!")
-            return
-
-        # ایجاد آنالایزر
-        analyzer = FinancialAnalyzer(folder_path)
-
-        # دریافت نام شرکت‌ها
-        companies = []
-        print("\nلطفاً نام شرکت‌ها را وارد کنید (برای پایان، Enter خالی بزنید):")
-        while len(companies) < 5:
-            company = input(f"نام شرکت {len(companies) + 1}: ").strip()
-            if not company:
-                break
-            companies.append(company)
-
-        if not companies:
-            print("هیچ شرکتی برای تحلیل وارد نشده است!")
-            return
-
-        # پردازش هر شرکت
-        all_results = {}
-        for company in companies:
-            print(f"\nپردازش شرکت {company}:")
-            files = list(Path(folder_path).glob(f'*{company}*.xlsx'))
-            files.sort()  # مرتب‌سازی فایل‌ها بر اساس نام
-
-            if not files:
-                print(f"هیچ فایلی برای شرکت {company} یافت نشد!")
-                continue
-
-            company_data = {}
-            for file in files:
-                try:
-                    print(f"\nپردازش فایل: {file.name}")
-
-                    # خواندن داده‌های مالی
-                    data = analyzer.read_financial_data(file)
-                    if data and isinstance(data, dict):
-                        year = data.get('سال')
-                        if year:
-                            # محاسبه نسبت‌ها
-                            ratios = analyzer.calculate_ratios(data)
-                            if ratios:  # اگر نسبت‌ها محاسبه شدند
-                                print(f"\nنسبت‌های محاسبه شده برای سال {year}:")
-                                for ratio_name, ratio_value in ratios.items():
-                                    print(f"{ratio_name}: {ratio_value:.6f}")
-
-                                company_data[year] = {
-                                    'متغیرها': data,
-                                    'نسبت‌ها': ratios
-                                }
-                            else:
-                                print(f"خطا: نسبت‌ها برای سال {year} محاسبه نشدند")
-                        else:
-                            print("خطا: سال در داده‌ها یافت نشد")
-                    else:
-                        print("خطا: داده‌های معتبر خوانده نشد")
-
-                except Exception as e:
-                    print(f"خطا در پردازش فایل {file.name}: {str(e)}")
-                    continue
-
-            if company_data:
-                all_results[company] = company_data
-                print(f"\nداده‌های شرکت {company} با موفقیت پردازش شد.")
-            else:
-                print(f"\nهیچ داده معتبری برای شرکت {company} یافت نشد.")
-
-        # ذخیره نتایج
-        if all_results:
-            # ایجاد پوشه با تاریخ امروز
-            today_folder = output_base_path / datetime.now().strftime('%Y-%m-%d')
-            today_folder.mkdir(exist_ok=True)
-
-            # ایجاد نام فایل
-            timestamp = datetime.now().strftime('%H%M%S')
-            file_name = f"نتایج_مالی_{timestamp}.xlsx"
-            output_file = today_folder / file_name
-
-            # ذخیره فایل
-            success = analyzer.save_results(all_results, output_file)
-
-            if success:
-                print(f"\nفایل با موفقیت در مسیر زیر ذخیره شد:")
-                print(f"{output_file}")
-            else:
-                print("\nخطا در ذخیره فایل!")
-        else:
-            print("\nهیچ داده‌ای برای ذخیره‌سازی یافت نشد!")
-
-    except Exception as e:
-        print(f"\nخطای غیرمنتظره: {str(e)}")
-        import traceback
-        print(traceback.format_exc())
-    finally:
-        print("\nپایان برنامه")
-
-
-if __name__ == "__main__":
+import os
+import logging
+import numpy as np
+import warnings
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from workbook_cache import WorkbookCache, ExtractionCache
+from instrumentation import timer, timed, profile_batch
+from log_config import get_logger, configure_logging
+from ratio_engine import RatioSpec, RatioEngine
+from numeric_backend import get_backend
+from report_writer import WideReportWriter
+from columnar_export import cell_reference, export_formats, export_results
+from manifest import Manifest, namespace_key
+from label_matcher import LabelMatcher, fuzzy_threshold
+
+# غیرفعال کردن هشدارها
+warnings.filterwarnings('ignore')
+
+logger = get_logger('pisi')
+
+# نسبت‌ها فقط با مخرج مثبت محاسبه و با قدر مطلق خارج از بازه ۰.۰۰۰۰۰۱ تا ۱۰۰۰ کنار گذاشته می‌شوند
+RATIO_SPECS = [
+    RatioSpec('نسبت جاری', 'دارایی جاری', 'بدهی جاری'),
+    RatioSpec('نسبت آنی', [('دارایی جاری', 1), ('موجودی کالا', -1)], 'بدهی جاری'),
+    RatioSpec('حاشیه سود ناخالص', 'سود ناخالص', 'فروش', multiplier=100),
+    RatioSpec('حاشیه سود عملیاتی', 'سود عملیاتی', 'فروش', multiplier=100),
+    RatioSpec('حاشیه سود خالص', 'سود خالص', 'فروش', multiplier=100),
+    RatioSpec('نسبت بدهی', 'کل بدهی ها', 'کل دارایی ها', multiplier=100),
+]
+ratio_engine = RatioEngine(RATIO_SPECS, valid=(-1000, 1000), min_abs=0.000001, places=6,
+                           positive_denominator=True)
+
+# هشدارهای تحلیلی هر نسبت: (نسبت، شرط، پیام)
+RATIO_WARNINGS = [
+    ('نسبت جاری', lambda r: r < 1, "نسبت جاری کمتر از 1 است - نشان‌دهنده مشکل در نقدینگی"),
+    ('نسبت جاری', lambda r: r > 3, "نسبت جاری بیش از حد بالاست - احتمال عدم استفاده بهینه از دارایی‌ها"),
+    ('نسبت آنی', lambda r: r < 0.5, "نسبت آنی پایین است - ممکن است نشان‌دهنده مشکل نقدینگی باشد"),
+    ('حاشیه سود خالص', lambda r: r < 0, "حاشیه سود خالص منفی است"),
+    ('حاشیه سود خالص', lambda r: r > 50, "حاشیه سود خالص بسیار بالاست"),
+    ('نسبت بدهی', lambda r: r > 70, "نسبت بدهی بالاست - ریسک مالی زیاد"),
+]
+
+
+def as_float(ratios):
+    return {name: float(value) for name, value in ratios.items()}
+
+
+def log_ratios(ratios, label=''):
+    """گزارش نسبت‌ها و هشدارهای تحلیلی آن‌ها در سطح DEBUG"""
+    if not ratios:
+        logger.warning("هشدار: هیچ نسبتی محاسبه نشد! %s", label)
+        return
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    lines = [f"{name}: {value:.6f}" for name, value in ratios.items()]
+    lines += [f"هشدار: {message}" for name, test, message in RATIO_WARNINGS
+              if name in ratios and test(ratios[name])]
+    logger.debug("نسبت‌های محاسبه شده %s:\n%s", label, '\n'.join(lines),
+                 extra={'ratios': ratios})
+
+
+def normalize_text(text):
+    """نرمال‌سازی متن فارسی"""
+    text = str(text).strip()
+    persians = {
+        '‌': ' ', 'ي': 'ی', 'ك': 'ک', '\u200c': ' ',
+        '،': ' ', '؛': ' ', '\n': ' ', '\r': ' ', '\t': ' ',
+        '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+        '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'
+    }
+    for old, new in persians.items():
+        text = text.replace(old, new)
+    return ' '.join(text.split())
+
+
+class CellIndex:
+    """نمایه معکوس سلول‌های یک شیت برای جستجوی سریع کلیدواژه‌ها"""
+
+    # ترتیب بررسی ستون‌های مجاور، گروه‌بندی شده بر اساس فاصله
+    neighbour_groups = [
+        [0],  # ستون فعلی
+        [1, -1],  # ستون بعدی و قبلی
+        [2, -2],  # دو ستون بعد و قبل
+        [3],  # سه ستون بعد
+        [4]  # چهار ستون بعد
+    ]
+
+    def __init__(self, df, clean_number):
+        # آماده‌سازی دیتافریم
+        df = df.fillna('')
+        df = df.replace(r'[\$,)]', '', regex=True)
+        df = df.replace('[(]', '-', regex=True)
+        df = df.astype(str)
+
+        self.row_labels = list(df.index)
+        self.col_labels = list(df.columns)
+        self.values = df.to_numpy(dtype=object)
+
+        # هر متن یکتا فقط یک بار نرمال‌سازی و به عدد تبدیل می‌شود
+        self.texts = []  # متن‌های نرمال‌شده یکتا
+        self.cells = []  # مختصات سلول‌های هر متن
+        self.numbers = np.zeros(self.values.shape, dtype=np.float64)
+        text_ids = {}
+        normalized = {}
+        parsed = {}
+        for i, row in enumerate(self.values):
+            for j, raw in enumerate(row):
+                number = parsed.get(raw)
+                if number is None:
+                    number = parsed[raw] = clean_number(raw)
+                self.numbers[i, j] = number
+
+                text = normalized.get(raw)
+                if text is None:
+                    text = normalized[raw] = normalize_text(raw)
+                text_id = text_ids.get(text)
+                if text_id is None:
+                    text_id = text_ids[text] = len(self.texts)
+                    self.texts.append(text)
+                    self.cells.append([])
+                self.cells[text_id].append((i, j))
+
+        # نگاشت هر واژه به متن‌هایی که آن را دارند
+        self.tokens = {}
+        for text_id, text in enumerate(self.texts):
+            for token in set(text.split()):
+                self.tokens.setdefault(token, set()).add(text_id)
+        self._probes = {}
+        self._matcher = None
+
+        # ماسک اعداد معتبر در محدوده معقول
+        self.valid = (self.numbers > 0) & (self.numbers < 1e12)
+        self._nearest = {}
+
+    def nearest_numbers(self, axis=1):
+        """نزدیک‌ترین عدد معتبر هم‌سطر (axis=1) یا هم‌ستون (axis=0) برای هر سلول"""
+        if axis not in self._nearest:
+            candidates = np.where(self.valid, self.numbers, -np.inf)
+            if axis == 0:
+                candidates = candidates.T
+
+            rows, cols = candidates.shape
+            nearest = np.full((rows, cols), np.nan)
+
+            for group in self.neighbour_groups:
+                # در فاصله برابر، مقدار بزرگ‌تر اولویت دارد
+                group_best = np.full((rows, cols), -np.inf)
+                for offset in group:
+                    if abs(offset) >= cols:
+                        continue
+                    shifted = np.full((rows, cols), -np.inf)
+                    if offset >= 0:
+                        shifted[:, :cols - offset] = candidates[:, offset:]
+                    else:
+                        shifted[:, -offset:] = candidates[:, :cols + offset]
+                    group_best = np.maximum(group_best, shifted)
+
+                fill = np.isnan(nearest) & np.isfinite(group_best)
+                nearest[fill] = group_best[fill]
+
+            self._nearest[axis] = nearest.T if axis == 0 else nearest
+        return self._nearest[axis]
+
+    def number_near(self, i, j, axis=1):
+        """عدد معتبر نزدیک به سلول (i, j) در همان سطر یا ستون"""
+        value = self.nearest_numbers(axis)[i, j]
+        return None if np.isnan(value) else float(value)
+
+    def number_cell(self, i, j, axis=1):
+        """مختصات (سطر، ستون) عددی که number_near برای سلول (i, j) برمی‌گرداند"""
+        values = self.numbers[i] if axis == 1 else self.numbers[:, j]
+        valid = self.valid[i] if axis == 1 else self.valid[:, j]
+        position = j if axis == 1 else i
+
+        for group in self.neighbour_groups:
+            best = None
+            for offset in group:
+                k = position + offset
+                if 0 <= k < len(values) and valid[k] and (best is None or values[k] > values[best]):
+                    best = k
+            if best is not None:
+                return (i, best) if axis == 1 else (best, j)
+        return None
+
+    def cell_reference(self, i, j):
+        """نشانی A1 سلول (i, j) در شیت اصلی"""
+        return cell_reference(self.row_labels[i], self.col_labels[j])
+
+    def _candidates(self, probe):
+        """شناسه متن‌هایی که یکی از واژه‌هایشان probe را در بر دارد"""
+        text_ids = self._probes.get(probe)
+        if text_ids is None:
+            text_ids = set()
+            for token, ids in self.tokens.items():
+                if probe in token:
+                    text_ids |= ids
+            self._probes[probe] = text_ids
+        return text_ids
+
+    def lookup(self, keyword):
+        """مختصات سلول‌های حاوی کلیدواژه به ترتیب سطر و ستون"""
+        normalized_keyword = normalize_text(keyword)
+        if normalized_keyword:
+            # کلیدواژه بدون فاصله فقط می‌تواند درون یک واژه از سلول باشد
+            probe = max(normalized_keyword.split(), key=len)
+            text_ids = self._candidates(probe)
+        else:
+            text_ids = range(len(self.texts))
+
+        hits = []
+        for text_id in text_ids:
+            if normalized_keyword in self.texts[text_id]:
+                hits.extend(self.cells[text_id])
+        hits.sort()
+        return hits
+
+    def similar_labels(self, keywords, min_score, top_k=5):
+        """متن‌های سلول شبیه کلیدواژه‌ها: [(متن، امتیاز)]؛ نمایه n-gram یک بار ساخته می‌شود"""
+        if self._matcher is None:
+            self._matcher = LabelMatcher(self.texts)
+        return self._matcher.search(keywords, top_k, min_score)
+
+    def location(self, i, j):
+        """متن موقعیت سلول برای گزارش"""
+        return f"سطر {self.row_labels[i] + 1}, ستون {self.col_labels[j]}"
+
+
+class FinancialAnalyzer:
+    def __init__(self, base_folder, numeric=None):
+        """مقداردهی اولیه"""
+        self.base_folder = Path(base_folder)
+        self.output_folder = self.base_folder / 'reports'
+        self.output_folder.mkdir(exist_ok=True)
+        # نوع عددی محاسبه نسبت‌ها (float، fixed یا decimal)؛ خروجی همیشه float است
+        self.numeric = get_backend(numeric, 'float')
+
+        # کش شیت‌های تجزیه شده و نتایج استخراج با کلید هش محتوای فایل
+        self.workbook_cache = WorkbookCache()
+        self.extraction_cache = ExtractionCache(self.workbook_cache)
+
+        # جستجوی برچسب‌های مشابه برای متغیرهای یافت نشده (EXALL_FUZZY)؛ بخشی از کلید کش است
+        self.fuzzy = fuzzy_threshold()
+        if self.fuzzy:
+            self.cache_namespace += f'+fuzzy{self.fuzzy}'
+
+        # الگوهای جستجو برای یافتن مقادیر
+        self.search_patterns = {
+            'دارایی جاری': [
+                'جمع دارایی‌های جاری', 'جمع داراییهای جاری', 'دارایی‌های جاری',
+                'داراییهای جاری', 'دارایی های جاری', 'جمع دارایی های جاری',
+                'دارایی جاری', 'داراییهای جاری', 'دارائیهای جاری', 'دارائی های جاری',
+                'جمع داراییهای جاری', 'جمع دارائیهای جاری', 'مجموع داراییهای جاری',
+                'جمع حسابهای دارایی جاری', 'کل دارایی های جاری', 'مجموع دارایی‌های جاری',
+                'جمع کل دارایی‌های جاری', 'جمع کل داراییهای جاری', 'دارایی‌های جاری - جمع',
+                'جمع داراییهای جاری و غیر جاری'
+            ],
+            'کل دارایی ها': [
+                'جمع دارایی‌ها', 'جمع داراییها', 'جمع کل دارایی‌ها',
+                'کل دارایی‌ها', 'دارایی ها', 'جمع دارایی ها',
+                'جمع کل داراییها', 'جمع کل دارائیها', 'کل داراییها',
+                'جمع داراییها', 'جمع دارائیها', 'مجموع کل داراییها',
+                'جمع حسابهای دارایی', 'مجموع داراییها', 'دارایی های کل',
+                'جمع کل حسابهای دارایی', 'جمع دارایی های شرکت',
+                'مجموع دارایی‌ها', 'جمع داراییهای جاری و غیر جاری',
+                'دارایی‌ها - جمع کل', 'جمع کل'
+            ],
+            'بدهی جاری': [
+                'جمع بدهی‌های جاری', 'جمع بدهیهای جاری', 'بدهی‌های جاری',
+                'بدهیهای جاری', 'بدهی های جاری', 'جمع بدهی های جاری',
+                'بدهی جاری', 'بدهیهای جاری', 'بدهی‌های جاری', 'جمع کل بدهی های جاری',
+                'مجموع بدهیهای جاری', 'کل بدهیهای جاری', 'جمع حسابهای بدهی جاری',
+                'مجموع بدهی‌های جاری', 'جمع کل بدهی‌های جاری',
+                'بدهی‌های جاری - جمع', 'جمع بدهی‌های کوتاه مدت'
+            ],
+            'کل بدهی ها': [
+                'جمع بدهی‌ها', 'جمع بدهیها', 'جمع کل بدهی‌ها',
+                'کل بدهی‌ها', 'بدهی ها', 'جمع بدهی ها',
+                'جمع کل بدهیها', 'مجموع بدهیها', 'کل بدهیها',
+                'جمع بدهی‌های جاری و غیرجاری', 'مجموع کل بدهی ها',
+                'جمع حسابهای بدهی', 'بدهی های کل', 'جمع کل حسابهای بدهی',
+                'مجموع بدهی‌ها', 'بدهی‌ها - جمع کل', 'جمع بدهی های شرکت'
+            ],
+            'فروش': [
+                'درآمدهای عملیاتی', 'درآمد عملیاتی', 'فروش خالص',
+                'فروش', 'درآمد حاصل از فروش', 'فروش و درآمد ارائه خدمات',
+                'جمع درآمدهای عملیاتی', 'درآمد حاصل از فروش کالا',
+                'فروش کالا و خدمات', 'درآمد عملیاتی - خالص',
+                'فروش خالص و درآمد ارائه خدمات', 'درآمد خالص',
+                'درآمد عملیاتی خالص', 'فروش و درآمد خالص',
+                'درآمد حاصل از فروش و ارائه خدمات'
+            ],
+            'سود ناخالص': [
+                'سود ناخالص', 'سود (زیان) ناخالص', 'سود و زیان ناخالص',
+                'سود(زیان)ناخالص', 'سود/زیان ناخالص', 'سود یا زیان ناخالص',
+                'سود (زیان) ناخالص فروش', 'سود ناخالص عملیاتی',
+                'سود و زیان ناخالص عملیاتی', 'ناخالص سود و زیان'
+            ],
+            'سود عملیاتی': [
+                'سود عملیاتی', 'سود (زیان) عملیاتی', 'سود و زیان عملیاتی',
+                'سود(زیان)عملیاتی', 'سود/زیان عملیاتی', 'سود یا زیان عملیاتی',
+                'سود و زیان خالص عملیات', 'سود خالص عملیاتی',
+                'سود عملیاتی خالص', 'سود و زیان عملیاتی خالص'
+            ],
+            'سود خالص': [
+                'سود خالص', 'سود (زیان) خالص', 'سود خالص دوره',
+                'سود(زیان)خالص', 'سود/زیان خالص', 'سود یا زیان خالص',
+                'سود خالص پس از کسر مالیات', 'سود و زیان خالص',
+                'سود (زیان) خالص دوره', 'سود خالص سال',
+                'سود و زیان خالص دوره', 'سود دوره خالص'
+            ],
+            'موجودی کالا': [
+                'موجودی مواد و کالا', 'موجودی کالا', 'موجودی‌های مواد و کالا',
+                'موجودی کالا و مواد', 'موجودیهای مواد و کالا',
+                'موجودی مواد، کالا و قطعات', 'موجودی مواد',
+                'موجودی کالای ساخته شده', 'موجودی کالای در جریان ساخت',
+                'موجودی مواد اولیه', 'موجودی قطعات و ملزومات',
+                'موجودی کالای در راه', 'موجودی مواد و کالای ساخته شده'
+            ],
+            'حساب های دریافتنی': [
+                'حساب‌های دریافتنی تجاری', 'حسابهای دریافتنی', 'دریافتنی‌های تجاری',
+                'حساب های دریافتنی تجاری', 'دریافتنی های تجاری',
+                'حسابها و اسناد دریافتنی تجاری', 'حساب‌های دریافتنی',
+                'حسابهای دریافتنی عملیاتی', 'دریافتنی های عملیاتی',
+                'حساب و اسناد دریافتنی تجاری', 'مطالبات تجاری',
+                'حسابهای دریافتنی - خالص', 'دریافتنی های تجاری و غیرتجاری'
+            ]
+        }
+    def clean_number(self, value):
+        """تمیز کردن و تبدیل مقادیر عددی"""
+        try:
+            if isinstance(value, (int, float)):
+                return float(value)
+
+            value = str(value).strip()
+            value = value.replace(',', '').replace('٬', '')
+            value = value.replace('(', '-').replace(')', '')
+            value = value.replace('−', '-').replace('–', '-')
+
+            # حذف کاراکترهای غیر عددی
+            value = ''.join(c for c in value if c.isdigit() or c in '.-')
+
+            if value and value not in ['-', '.']:
+                return float(value)
+            return 0
+        except:
+            return 0
+
+    # جهت‌های جستجوی همسایه‌ها به ترتیب اولویت
+    orientations = [
+        (1, "سطری"),
+        (0, "ستونی")
+    ]
+
+    def search_keywords(self, index, keywords, axes=(1, 0)):
+        """یک بار جستجوی کلیدواژه‌ها و ثبت عدد همسایه در هر جهت"""
+        matches = {axis: [] for axis in axes}
+
+        # جستجو برای هر کلیدواژه در نمایه
+        for keyword in keywords:
+            for row_idx, col_idx in index.lookup(keyword):
+                for axis, keyword_matches in matches.items():
+                    value = index.number_near(row_idx, col_idx, axis)
+
+                    if value is not None:
+                        keyword_matches.append({
+                            'value': value,
+                            'location': index.location(row_idx, col_idx),
+                            'keyword': keyword,
+                            'cell': (row_idx, col_idx, axis)
+                        })
+        return matches
+
+    def locate_value(self, index, keywords):
+        """یافتن مقدار با یک بار جستجو؛ خروجی (مقدار، جهت، نشانی سلول عدد)"""
+        matches = self.search_keywords(index, keywords)
+        for axis, method in self.orientations:
+            value, match = self.select_match(matches[axis])
+            if value > 0:
+                cell = index.number_cell(*match['cell']) if match else None
+                return value, method, index.cell_reference(*cell) if cell else None
+        return 0, None, None
+
+    def locate_similar(self, index, keywords):
+        """locate_value با متن سلول‌های شبیه کلیدواژه‌ها (امتیاز حداقل self.fuzzy)"""
+        labels = index.similar_labels(keywords, self.fuzzy)
+        if not labels:
+            return 0, None, None
+        logger.debug("برچسب‌های مشابه %s: %s", keywords[0],
+                     ', '.join(f"{label} ({score:.2f})" for label, score in labels))
+        return self.locate_value(index, [label for label, _ in labels])
+
+    def find_value_in_df(self, df, keywords, index=None, axis=1):
+        """جستجوی مقادیر در دیتافریم با دقت بیشتر"""
+        try:
+            # نمایه سلول‌ها یک بار برای هر شیت ساخته می‌شود
+            if index is None:
+                index = CellIndex(df, self.clean_number)
+
+            matches = self.search_keywords(index, keywords, axes=(axis,))
+            return self.select_value(matches[axis])
+
+        except Exception as e:
+            logger.error("خطا در جستجوی مقدار: %s", e)
+            return 0
+
+    def select_value(self, keyword_matches):
+        """انتخاب مقدار نهایی از میان تطابق‌های یافت شده"""
+        return self.select_match(keyword_matches)[0]
+
+    def select_match(self, keyword_matches):
+        """(مقدار نهایی، تطابق دارای آن مقدار)؛ (0, None) اگر مقدار معتبری یافت نشود"""
+        try:
+            if keyword_matches:
+                # حذف مقادیر تکراری
+                unique_values = []
+                seen = set()
+                for match in keyword_matches:
+                    if match['value'] not in seen:
+                        unique_values.append(match)
+                        seen.add(match['value'])
+
+                if len(unique_values) == 1:
+                    best_match = unique_values[0]
+                    logger.debug("مقدار یافت شده برای '%s': %s در %s",
+                                 best_match['keyword'], f"{best_match['value']:,.0f}",
+                                 best_match['location'])
+                    return best_match['value'], best_match
+
+                elif len(unique_values) > 1:
+                    # مرتب‌سازی بر اساس مقدار
+                    values = [match['value'] for match in unique_values]
+                    values.sort()
+
+                    # بررسی پراکندگی مقادیر
+                    if len(values) >= 3:
+                        # حذف مقادیر پرت با IQR
+                        q1 = np.percentile(values, 25)
+                        q3 = np.percentile(values, 75)
+                        iqr = q3 - q1
+                        lower_bound = q1 - (1.5 * iqr)
+                        upper_bound = q3 + (1.5 * iqr)
+                        filtered_values = [v for v in values if lower_bound <= v <= upper_bound]
+                    else:
+                        filtered_values = values
+
+                    if filtered_values:
+                        # انتخاب مقدار مناسب
+                        max_value = max(filtered_values)
+                        min_value = min(filtered_values)
+                        ratio = max_value / min_value if min_value > 0 else float('inf')
+
+                        if ratio > 10:  # اختلاف زیاد
+                            selected_value = np.median(filtered_values)
+                            logger.debug("استفاده از میانه به دلیل پراکندگی زیاد (نسبت: %.2f)", ratio)
+                        else:
+                            selected_value = max_value
+                            logger.debug("استفاده از مقدار حداکثر (نسبت: %.2f)", ratio)
+
+                        # نمایش مقدار انتخاب شده
+                        selected_match = next(
+                            (match for match in unique_values if match['value'] == selected_value),
+                            None
+                        )
+                        if selected_match is None:
+                            # میانه تعداد زوج میانگین دو مقدار میانی است و در هیچ سلولی نیست
+                            logger.debug("میانه %s با هیچ مقدار یافت شده برابر نیست", f"{selected_value:,.0f}")
+                            return 0, None
+                        logger.debug("مقدار نهایی: %s در %s", f"{selected_value:,.0f}",
+                                     selected_match['location'])
+                        return selected_value, selected_match
+
+            logger.debug("هیچ مقدار معتبری یافت نشد")
+            return 0, None
+
+        except Exception as e:
+            logger.error("خطا در جستجوی مقدار: %r", e)
+            return 0, None
+
+    def clean_number(self, value):
+        """تبدیل مقادیر به عدد با دقت بالا"""
+        try:
+            if isinstance(value, (int, float)):
+                return float(value)
+
+            # تبدیل به رشته و پاکسازی
+            value = str(value).strip()
+
+            # حذف کاراکترهای اضافی
+            value = value.replace(',', '')
+            value = value.replace('٬', '')
+            value = value.replace('(', '-')
+            value = value.replace(')', '')
+
+            # تبدیل اعداد فارسی
+            persian_nums = {'۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+                            '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9'}
+            for persian, latin in persian_nums.items():
+                value = value.replace(persian, latin)
+
+            # حذف همه کاراکترها به جز اعداد و علائم خاص
+            value = ''.join(c for c in value if c.isdigit() or c in '.-')
+
+            if value and value not in ['-', '.']:
+                return float(value)
+            return 0
+
+        except:
+
+            return 0
+
+    # فضای نام کش نتایج؛ با تغییر منطق جستجو نسخه افزایش می‌یابد
+    cache_namespace = 'pisi.v1'
+
+    def read_financial_data(self, file_path, sources=None):
+        """خواندن داده‌های مالی از فایل اکسل با دقت بیشتر
+
+        اگر دیکشنری sources داده شود نشانی سلول عدد هر متغیر یافت شده در آن ثبت می‌شود.
+        """
+        if sources is None:
+            sources = {}
+        try:
+            # استخراج سال از نام فایل
+            try:
+                file_name = str(file_path)
+                if '\\' in file_name:
+                    year = file_name.split('_')[0].split('\\')[-1]
+                else:
+                    year = file_name.split('/')[-1].split('_')[0]
+            except:
+                logger.error("خطا در استخراج سال از نام فایل %s", file_path)
+                return None
+
+            # مقادیری که قبلاً برای همین فایل و همین الگوها استخراج شده‌اند
+            cached = self.extraction_cache.lookup(file_path, self.cache_namespace, self.search_patterns,
+                                                  sources)
+
+            index = None
+            if len(cached) < len(self.search_patterns):
+                # خواندن فایل اکسل با روش‌های مختلف
+                with timer.stage('read'):
+                    df = None
+                    try:
+                        df = self.workbook_cache.read_excel(file_path, header=None)
+                        if df.empty:
+                            df = self.workbook_cache.read_excel(file_path, header=0)
+                    except:
+                        try:
+                            df = self.workbook_cache.read_excel(file_path, header=0)
+                        except Exception as e:
+                            logger.error("خطا در خواندن فایل %s: %s", file_path, e)
+                            return None
+
+                if df is None or df.empty:
+                    logger.warning("فایل %s خالی است یا قابل خواندن نیست.", file_path)
+                    return None
+
+                with timer.stage('normalize'):
+                    # پاکسازی و آماده‌سازی داده‌ها
+                    df = df.dropna(axis=1, how='all')  # حذف ستون‌های خالی
+                    df = df.fillna('')  # پر کردن مقادیر NaN با مقدار خالی
+
+                    # نمایه سلول‌ها یک بار ساخته می‌شود و برای همه متغیرها استفاده می‌شود
+                    index = CellIndex(df, self.clean_number)
+
+            # دیکشنری برای ذخیره داده‌ها
+            data = {'سال': year}
+            found_data = False
+            extracted = {}
+
+            # جستجوی مقادیر؛ همسایه‌های سطری و ستونی در یک پیمایش بررسی می‌شوند
+            with timer.stage('search'):
+                for metric, patterns in self.search_patterns.items():
+                    if metric in cached:
+                        value, method = cached[metric], "کش"
+                    else:
+                        value, method, cell = self.locate_value(index, patterns)
+                        if value == 0 and self.fuzzy:
+                            value, method, cell = self.locate_similar(index, patterns)
+                        extracted[metric] = value
+                        if cell:
+                            sources[metric] = cell
+
+                    if value > 0:
+                        found_data = True
+                        logger.debug("%s (جهت %s): %s", metric, method, f"{value:,.0f}",
+                                     extra={'file': str(file_path), 'metric': metric,
+                                            'value': value, 'method': method})
+
+                    # ذخیره مقدار نهایی
+                    data[metric] = value
+
+            self.extraction_cache.update(file_path, self.cache_namespace, self.search_patterns, extracted,
+                                         sources)
+
+            # بررسی صحت داده‌ها
+            required_fields = [
+                'دارایی جاری', 'کل دارایی ها', 'بدهی جاری',
+                'کل بدهی ها', 'فروش', 'سود ناخالص',
+                'سود عملیاتی', 'سود خالص', 'موجودی کالا'
+            ]
+
+            missing_fields = [field for field in required_fields if data.get(field, 0) == 0]
+
+            if missing_fields:
+                logger.info("فیلدهای یافت نشده: %s", '، '.join(missing_fields),
+                            extra={'file': str(file_path), 'missing': missing_fields})
+
+            if not found_data:
+                logger.warning("هیچ داده معتبری در فایل %s یافت نشد!", file_path)
+                return None
+
+            # خلاصه داده‌های یافت شده
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = [f"{metric}: {value:,.0f}" for metric, value in data.items()
+                         if metric != 'سال' and value > 0]
+                logger.debug("خلاصه داده‌های یافت شده:\n%s", '\n'.join(lines))
+
+            return data
+
+        except Exception:
+            logger.exception("خطای کلی در پردازش فایل %s", file_path)
+            return None
+
+    @timed('ratio')
+    def calculate_ratios(self, data):
+        """محاسبه نسبت‌های مالی یک سال با موتور نسبت‌ها (RATIO_SPECS)"""
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("مقادیر ورودی:\n%s", '\n'.join(
+                    f"{name}: {float(data.get(name, 0)):,.0f}" for name in ratio_engine.inputs))
+
+            ratios = as_float(self.numeric.evaluate_one(ratio_engine, data))
+            log_ratios(ratios)
+            return ratios
+
+        except Exception:
+            logger.exception("خطای کلی در محاسبه نسبت‌ها")
+            return {}
+
+    def process_file(self, file, with_ratios=True):
+        """خواندن داده‌ها و محاسبه نسبت‌های یک فایل؛ خروجی (سال، نتایج) یا None
+
+        با with_ratios=False فقط متغیرها برگردانده می‌شوند تا نسبت‌ها یک جا روی
+        جدول همه شرکت‌ها و سال‌ها محاسبه شوند (process_batch).
+        """
+        try:
+            logger.info("پردازش فایل: %s", file.name)
+
+            # خواندن داده‌های مالی و نشانی سلول هر مقدار
+            sources = {}
+            data = self.read_financial_data(file, sources)
+            if data and isinstance(data, dict):
+                year = data.get('سال')
+                if year and not with_ratios:
+                    return year, {'متغیرها': data, 'منابع': sources}
+                if year:
+                    # محاسبه نسبت‌ها
+                    ratios = self.calculate_ratios(data)
+                    if ratios:  # اگر نسبت‌ها محاسبه شدند
+                        return year, {
+                            'متغیرها': data,
+                            'نسبت‌ها': ratios,
+                            'منابع': sources
+                        }
+                    else:
+                        logger.warning("خطا: نسبت‌ها برای سال %s محاسبه نشدند (%s)", year, file.name)
+                else:
+                    logger.warning("خطا: سال در داده‌ها یافت نشد (%s)", file.name)
+            else:
+                logger.warning("خطا: داده‌های معتبر از %s خوانده نشد", file.name)
+
+        except Exception as e:
+            logger.error("خطا در پردازش فایل %s: %s", file.name, e)
+
+        return None
+
+    @timed('write')
+    def save_results(self, results, output_path, companies_per_sheet=None, sheets_per_workbook=20):
+        """ذخیره نتایج در اکسل با فرمت عمودی و شرکت‌ها در هدر
+
+        سال‌ها از خود نتایج گرفته می‌شوند. اگر شرکت‌ها در سقف ستون‌های یک شیت
+        جا نشوند گزارش در چند شیت و در صورت لزوم چند فایل نوشته می‌شود؛ خروجی
+        فهرست مسیر فایل‌های ذخیره شده است (در صورت خطا فهرست خالی).
+        """
+        try:
+            ratios = ratio_engine.names
+            years = sorted({str(year) for company_results in results.values() for year in company_results})
+            companies = sorted(results.keys())
+
+            with WideReportWriter(output_path, ratios, years,
+                                  companies_per_sheet=companies_per_sheet,
+                                  sheets_per_workbook=sheets_per_workbook) as writer:
+                for company in companies:
+                    writer.add_company(company, {
+                        str(year): data.get('نسبت‌ها', {}) for year, data in results[company].items()
+                    })
+
+            logger.info("نتایج با موفقیت در فایل زیر ذخیره شد:\n%s", '\n'.join(map(str, writer.paths)))
+            if writer.sheets > 1:
+                logger.info("%d شرکت در %d شیت و %d فایل", writer.companies, writer.sheets, len(writer.paths))
+
+            # مقادیر ذخیره شده فقط در سطح DEBUG برای بررسی صحت داده‌ها
+            if logger.isEnabledFor(logging.DEBUG):
+                lines = []
+                for company in companies:
+                    lines.append(f"شرکت {company}:")
+                    for year in years:
+                        if year in results[company]:
+                            ratios_data = results[company][year].get('نسبت‌ها', {})
+                            lines.append(f"سال {year}:")
+                            lines += [f"{ratio}: {ratios_data.get(ratio, 0):.6f}" for ratio in ratios]
+                logger.debug("مقادیر ذخیره شده:\n%s", '\n'.join(lines))
+
+            return writer.paths
+
+        except Exception as e:
+            logger.error("خطا در ذخیره نتایج: %s", e)
+            return []
+
+    @timed('write')
+    def export_columnar(self, results, output_path, formats=None):
+        """ذخیره متغیرها، نسبت‌ها و سلول منبع هر مقدار در Parquet/Arrow کنار output_path"""
+        try:
+            paths = export_results('pisi', results, output_path, formats)
+            for path in paths:
+                logger.info("خروجی ستونی ذخیره شد: %s", path)
+            return paths
+
+        except Exception as e:
+            logger.error("خطا در ذخیره خروجی ستونی: %s", e)
+            return []
+
+
+# آنالایزر هر پردازش کارگر یک بار ساخته و برای همه فایل‌ها استفاده می‌شود
+_worker_analyzer = None
+
+
+def _init_worker(folder_path):
+    global _worker_analyzer
+    # پردازش‌های spawn تنظیم لاگ را از متغیرهای محیطی می‌گیرند
+    configure_logging()
+    _worker_analyzer = FinancialAnalyzer(folder_path)
+
+
+def _process_file_worker(file):
+    # آمار مراحل هر فایل همراه نتیجه به پردازش اصلی برگردانده می‌شود
+    timer.reset()
+    with timer.file(file.name):
+        outcome = _worker_analyzer.process_file(file, with_ratios=False)
+    return outcome, timer.snapshot()
+
+
+def discover_companies(folder_path):
+    """فایل‌های هر شرکت از الگوی نام فایل‌ها (سال_شرکت.xlsx): {شرکت: فایل‌های مرتب}
+
+    فایل‌ها با نام دقیق شرکت گروه‌بندی می‌شوند تا شرکتی که نامش بخشی از نام
+    شرکت دیگر است فایل‌های آن را برندارد.
+    """
+    companies = {}
+    for file in sorted(Path(folder_path).glob('*_*.xlsx')):
+        if not file.name.startswith('~$'):
+            companies.setdefault(file.stem.split('_', 1)[1], []).append(file)
+    return dict(sorted(companies.items()))
+
+
+def manifest_for(folder_path, analyzer, enabled=None):
+    """فهرست تغییرات پوشه برای پردازش افزایشی؛ با تغییر الگوها یا منطق جستجو باطل می‌شود"""
+    namespace = namespace_key(analyzer.cache_namespace, analyzer.search_patterns)
+    return Manifest.for_folder(folder_path, 'pisi', namespace, enabled)
+
+
+def process_batch(folder_path, jobs, workers=1, analyzer=None, manifest=None):
+    """پردازش موازی فایل‌ها و جمع‌آوری نتایج در ساختار [شرکت][سال]
+
+    jobs فهرستی از (شرکت، فایل) است؛ نتایج هر شرکت به ترتیب فایل‌ها ثبت می‌شوند.
+    با workers=1 همه فایل‌ها در همین پردازش اجرا می‌شوند. اگر manifest داده
+    شود فقط فایل‌های جدید یا تغییر کرده پردازش می‌شوند و نتیجه بقیه از فهرست
+    برداشته می‌شود.
+    """
+    outcomes = {}
+    pending = jobs
+    if manifest is not None:
+        stored, _ = manifest.partition([file for _, file in jobs])
+        # نتیجه None (ثبت شده در اجراهای قبلی) دوباره پردازش می‌شود
+        outcomes = {(company, file): stored[file] for company, file in jobs if stored.get(file) is not None}
+        pending = [(company, file) for company, file in jobs if (company, file) not in outcomes]
+        logger.info("%d فایل بدون تغییر از فهرست، %d فایل جدید یا تغییر کرده", len(outcomes), len(pending))
+    total = len(pending)
+
+    with profile_batch('pisi'):
+        if workers <= 1 or total <= 1:
+            analyzer = analyzer or FinancialAnalyzer(folder_path)
+            for done, (company, file) in enumerate(pending, 1):
+                logger.info("[%d/%d] شرکت %s", done, total, company)
+                with timer.file(file.name):
+                    outcomes[(company, file)] = analyzer.process_file(file, with_ratios=False)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(folder_path),)) as executor:
+                futures = {
+                    executor.submit(_process_file_worker, file): (company, file)
+                    for company, file in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    company, file = futures[future]
+                    try:
+                        outcomes[(company, file)], stats = future.result()
+                        timer.merge(stats)
+                    except Exception as e:
+                        logger.error("خطا در پردازش فایل %s: %s", file.name, e)
+                        outcomes[(company, file)] = None
+                    logger.info("[%d/%d] %s: %s", done, total, company, file.name)
+
+    if manifest is not None:
+        # فایل‌های ناموفق (خطای کارگر یا بدون داده معتبر) ثبت نمی‌شوند تا در اجرای بعد دوباره امتحان شوند
+        for company, file in pending:
+            outcome = outcomes.get((company, file))
+            if outcome is not None:
+                manifest.record(file, outcome)
+        manifest.save()
+
+    panel = {}
+    sources = {}
+    for company, file in jobs:
+        outcome = outcomes.get((company, file))
+        if outcome:
+            year, entry = outcome
+            panel[(company, year)] = entry['متغیرها']
+            sources[(company, year)] = entry.get('منابع', {})
+
+    # نسبت‌های همه شرکت‌ها و سال‌ها یک جا روی جدول شرکت × سال محاسبه می‌شوند
+    with timer.stage('ratio'):
+        numeric = analyzer.numeric if analyzer is not None else get_backend(None, 'float')
+        panel_ratios = {key: as_float(ratios) for key, ratios in numeric.evaluate(ratio_engine, panel).items()}
+
+    all_results = {}
+    for (company, year), data in panel.items():
+        ratios = panel_ratios[(company, year)]
+        log_ratios(ratios, f"{company} {year}")
+        if ratios:
+            all_results.setdefault(company, {})[year] = {
+                'متغیرها': data, 'نسبت‌ها': ratios, 'منابع': sources[(company, year)]
+            }
+    return all_results
+
+
+def main():
+    configure_logging()
+    print("\n=== سیستم تحلیل مالی ===")
+    print(f"زمان اجرا: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"کاربر: {os.getenv('USERNAME', 'unknown')}")
+
+    try:
+        # تنظیم مسیر خروجی
+        output_base_path = Path("C:\\retina_env\\BOT\\sorat\\reports")
+        output_base_path.mkdir(parents=True, exist_ok=True)
+
+        # دریافت مسیر ورودی
+        folder_path = input("\nلطفاً مسیر پوشه حاوی فایل‌های اکسل را وارد کنید: ").strip()
+        if not os.path.exists(folder_path):
+            print("خطا: مسیر وارد شده وجود ندارد!")
+            return
+
+        # ایجاد آنالایزر
+        analyzer = FinancialAnalyzer(folder_path)
+
+        # دریافت نام شرکت‌ها (* برای همه شرکت‌های موجود در پوشه)
+        companies = []
+        discovered = {}
+        print("\nلطفاً نام شرکت‌ها را وارد کنید (برای پایان، Enter خالی بزنید؛ * برای همه):")
+        while True:
+            company = input(f"نام شرکت {len(companies) + 1}: ").strip()
+            if not company:
+                break
+            if company == '*':
+                discovered = discover_companies(folder_path)
+                companies = list(discovered)
+                break
+            companies.append(company)
+
+        if not companies:
+            print("هیچ شرکتی برای تحلیل وارد نشده است!")
+            return
+
+        # تعداد پردازش‌های موازی
+        default_workers = os.cpu_count() or 1
+        workers_input = input(f"\nتعداد پردازش‌های موازی (پیش‌فرض {default_workers}): ").strip()
+        workers = int(workers_input) if workers_input.isdigit() and int(workers_input) > 0 else default_workers
+
+        # فهرست فایل‌های هر شرکت
+        jobs = []
+        for company in companies:
+            if company in discovered:
+                files = discovered[company]
+            else:
+                files = list(Path(folder_path).glob(f'*{company}*.xlsx'))
+                files.sort()  # مرتب‌سازی فایل‌ها بر اساس نام
+
+            if not files:
+                print(f"هیچ فایلی برای شرکت {company} یافت نشد!")
+                continue
+
+            jobs.extend((company, file) for file in files)
+
+        # پردازش فایل‌ها و جمع‌آوری نتایج به تفکیک شرکت و سال
+        all_results = process_batch(folder_path, jobs, workers, analyzer,
+                                    manifest=manifest_for(folder_path, analyzer))
+
+        for company in companies:
+            if company in all_results:
+                print(f"\nداده‌های شرکت {company} با موفقیت پردازش شد.")
+            else:
+                print(f"\nهیچ داده معتبری برای شرکت {company} یافت نشد.")
+
+        # ذخیره نتایج
+        if all_results:
+            # ایجاد پوشه با تاریخ امروز
+            today_folder = output_base_path / datetime.now().strftime('%Y-%m-%d')
+            today_folder.mkdir(exist_ok=True)
+
+            # ایجاد نام فایل
+            timestamp = datetime.now().strftime('%H%M%S')
+            file_name = f"نتایج_مالی_{timestamp}.xlsx"
+            output_file = today_folder / file_name
+
+            # ذخیره فایل (گزارش‌های بزرگ در چند فایل) و خروجی ستونی انتخاب شده با EXALL_EXPORT
+            formats = export_formats()
+            saved_files = []
+            if 'excel' in formats:
+                saved_files += analyzer.save_results(all_results, output_file)
+            saved_files += analyzer.export_columnar(all_results, output_file, formats)
+
+            if saved_files:
+                print(f"\nفایل با موفقیت در مسیر زیر ذخیره شد:")
+                for saved_file in saved_files:
+                    print(f"{saved_file}")
+            else:
+                print("\nخطا در ذخیره فایل!")
+        else:
+            print("\nهیچ داده‌ای برای ذخیره‌سازی یافت نشد!")
+
+        # خلاصه زمان مراحل دسته
+        timer.report()
+
+    except Exception as e:
+        print(f"\nخطای غیرمنتظره: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+    finally:
+        print("\nپایان برنامه")
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
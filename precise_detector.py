@@ -1,9 +1,5 @@
 import numpy as np
 import logging
-import cv2
-from scipy.ndimage import gaussian_filter, maximum_filter
-from skimage.feature import peak_local_max
-from scipy import ndimage
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +16,8 @@ class PrecisePersonDetector:
 
     def adaptive_thresholding(self, image):
         """اعمال آستانه‌گذاری تطبیقی پیشرفته"""
+        import cv2
+
         block_size = 11
         C = 2
         return cv2.adaptiveThreshold(
@@ -43,6 +41,8 @@ class PrecisePersonDetector:
     def enhance_density_map(self, density_map):
         """بهبود پیشرفته نقشه تراکم با تکنیک‌های متعدد"""
         try:
+            import cv2
+
             # نرمال‌سازی اولیه
             density_norm = self.normalize_density(density_map)
 
@@ -101,6 +101,10 @@ class PrecisePersonDetector:
         return points[mask]
 
     def detect_local_maxima(self, density_map):
+        # کتابخانه‌های سنگین فقط هنگام تشخیص بارگذاری می‌شوند
+        from scipy import ndimage
+        from skimage.feature import peak_local_max
+
         try:
             # پیش‌پردازش و بهبود نقشه تراکم
             processed_map = self.enhance_density_map(density_map)
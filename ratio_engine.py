@@ -0,0 +1,223 @@
+"""موتور برداری نسبت‌های مالی روی جدول شرکت × سال
+
+هر نسبت یک بار به صورت اعلانی تعریف می‌شود (صورت، مخرج، ضریب، محدوده معتبر)
+و برای همه سطرهای جدول با عملیات ستونی numpy محاسبه می‌شود:
+
+    specs = [
+        RatioSpec('نسبت جاری', 'دارایی جاری', 'بدهی جاری'),
+        RatioSpec('نسبت آنی', [('دارایی جاری', 1), ('موجودی کالا', -1)], 'بدهی جاری'),
+        RatioSpec('حاشیه سود خالص', 'سود خالص', 'فروش', multiplier=100),
+    ]
+    engine = RatioEngine(specs, valid=(-1000, 1000))
+    ratios = engine.evaluate(panel)             # DataFrame با یک ستون برای هر نسبت
+    by_key = engine.evaluate_records(records)   # {کلید: {نسبت: مقدار}}
+
+وضعیت هر خانه با ماسک تعیین می‌شود:
+
+- شرط‌های لازم برقرار نیست (requires یا مخرج نامثبت با positive_denominator):
+  نسبت محاسبه نمی‌شود (NaN و در evaluate_records حذف از خروجی)
+- مخرج صفر یا نتیجه خارج از محدوده valid یا کوچک‌تر از min_abs: مقدار fill
+  (پیش‌فرض NaN)
+
+مقادیر ورودی گمشده یا NaN صفر در نظر گرفته می‌شوند.
+"""
+import math
+import numbers
+
+import numpy as np
+import pandas as pd
+
+
+class RatioSpec:
+    """تعریف اعلانی یک نسبت
+
+    numerator و denominator نام یک متغیر یا فهرستی از (متغیر، ضریب) برای
+    ترکیب خطی هستند. requires متغیرهایی است که باید غیرصفر باشند. valid،
+    min_abs و places اگر None باشند از تنظیمات موتور گرفته می‌شوند.
+    """
+
+    def __init__(self, name, numerator, denominator, multiplier=1, requires=(),
+                 valid=None, min_abs=None, places=None):
+        self.name = name
+        self.numerator = self._terms(numerator)
+        self.denominator = self._terms(denominator)
+        self.multiplier = float(multiplier)
+        self.requires = tuple(requires)
+        self.valid = valid
+        self.min_abs = min_abs
+        self.places = places
+
+    @staticmethod
+    def _terms(expression):
+        if isinstance(expression, str):
+            return ((expression, 1.0),)
+        return tuple((name, float(coefficient)) for name, coefficient in expression)
+
+    @property
+    def inputs(self):
+        names = [name for name, _ in self.numerator + self.denominator] + list(self.requires)
+        return list(dict.fromkeys(names))
+
+    def __repr__(self):
+        return f"RatioSpec({self.name!r})"
+
+
+class RatioEngine:
+    """محاسبه برداری مجموعه‌ای از RatioSpec با تنظیمات مشترک"""
+
+    def __init__(self, specs, valid=None, min_abs=0.0, places=None, fill=np.nan,
+                 positive_denominator=False):
+        self.specs = list(specs)
+        self.valid = valid
+        self.min_abs = min_abs
+        self.places = places
+        self.fill = fill
+        self.positive_denominator = positive_denominator
+
+    @property
+    def names(self):
+        return [spec.name for spec in self.specs]
+
+    @property
+    def inputs(self):
+        names = [name for spec in self.specs for name in spec.inputs]
+        return list(dict.fromkeys(names))
+
+    def settings(self, spec):
+        """(محدوده معتبر، کمینه قدر مطلق، تعداد رقم اعشار) یک نسبت"""
+        return (spec.valid if spec.valid is not None else self.valid,
+                spec.min_abs if spec.min_abs is not None else self.min_abs,
+                spec.places if spec.places is not None else self.places)
+
+    def evaluate_arrays(self, columns, size):
+        """محاسبه همه نسبت‌ها روی آرایه‌های ستونی؛ خروجی {نسبت: آرایه float64}"""
+        zeros = np.zeros(size)
+
+        def column(name):
+            values = columns.get(name)
+            if values is None:
+                return zeros
+            return np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0)
+
+        def combine(terms):
+            if len(terms) == 1 and terms[0][1] == 1.0:
+                return column(terms[0][0])
+            total = np.zeros(size)
+            for name, coefficient in terms:
+                total += coefficient * column(name)
+            return total
+
+        results = {}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for spec in self.specs:
+                numerator = combine(spec.numerator)
+                denominator = combine(spec.denominator)
+
+                applicable = np.ones(size, dtype=bool)
+                for name in spec.requires:
+                    applicable &= column(name) != 0
+                if self.positive_denominator:
+                    applicable &= denominator > 0
+
+                bounds, min_abs, places = self.settings(spec)
+                ratio = numerator / denominator * spec.multiplier
+                valid = np.isfinite(ratio) & (denominator != 0)
+                if bounds is not None:
+                    valid &= (ratio >= bounds[0]) & (ratio <= bounds[1])
+                if min_abs:
+                    valid &= np.abs(ratio) >= min_abs
+
+                if places is not None:
+                    # گرد کردن نیمه به سمت دور از صفر، مانند ROUND_HALF_UP در Decimal
+                    # (مقادیر بسیار بزرگی که با ضرب در مقیاس سرریز می‌کنند دست نمی‌خورند)
+                    scale = 10.0 ** places
+                    rounded = np.copysign(np.floor(np.abs(ratio) * scale + 0.5) / scale, ratio)
+                    ratio = np.where(np.isfinite(rounded), rounded, ratio)
+
+                ratio = np.where(valid, ratio, self.fill)
+                results[spec.name] = np.where(applicable, ratio, np.nan)
+        return results
+
+    def evaluate(self, panel):
+        """نسبت‌های هر سطر جدول (مثلاً با ایندکس شرکت و سال) به صورت DataFrame"""
+        columns = {name: panel[name].to_numpy(dtype=np.float64, na_value=np.nan)
+                   for name in self.inputs if name in panel.columns}
+        results = self.evaluate_arrays(columns, len(panel))
+        return pd.DataFrame(results, index=panel.index, columns=self.names)
+
+    def evaluate_records(self, records):
+        """نسبت‌های هر رکورد {کلید: {متغیر: مقدار}}؛ نسبت‌های محاسبه نشده حذف می‌شوند"""
+        keys = list(records)
+        columns = {}
+        for name in self.inputs:
+            values = [records[key].get(name) for key in keys]
+            columns[name] = np.array([float(v) if v is not None else 0.0 for v in values])
+        results = self.evaluate_arrays(columns, len(keys))
+
+        output = {}
+        for i, key in enumerate(keys):
+            output[key] = {
+                name: float(results[name][i]) for name in self.names
+                if not np.isnan(results[name][i])
+            }
+        return output
+
+    def evaluate_one(self, values):
+        """نسبت‌های یک رکورد (یک شرکت در یک سال) با همان قواعد evaluate_arrays
+
+        برای یک رکورد محاسبه اسکالر از سربار ساخت آرایه‌های numpy سریع‌تر است.
+        """
+        inputs = {}
+        for name in self.inputs:
+            value = values.get(name)
+            value = float(value) if value is not None else 0.0
+            inputs[name] = 0.0 if math.isnan(value) else value
+
+        def combine(terms):
+            if len(terms) == 1 and terms[0][1] == 1.0:
+                return inputs[terms[0][0]]
+            total = 0.0
+            for name, coefficient in terms:
+                total += coefficient * inputs[name]
+            return total
+
+        ratios = {}
+        for spec in self.specs:
+            denominator = combine(spec.denominator)
+            if any(inputs[name] == 0 for name in spec.requires):
+                continue
+            if self.positive_denominator and not denominator > 0:
+                continue
+
+            bounds, min_abs, places = self.settings(spec)
+            ratio = math.nan
+            if denominator != 0:
+                ratio = combine(spec.numerator) / denominator * spec.multiplier
+            valid = math.isfinite(ratio)
+            if valid and bounds is not None:
+                valid = bounds[0] <= ratio <= bounds[1]
+            if valid and min_abs:
+                valid = abs(ratio) >= min_abs
+
+            if not valid:
+                ratio = self.fill
+            elif places is not None:
+                scale = 10.0 ** places
+                if math.isfinite(abs(ratio) * scale):
+                    ratio = math.copysign(math.floor(abs(ratio) * scale + 0.5) / scale, ratio)
+            if not math.isnan(ratio):
+                ratios[spec.name] = ratio
+        return ratios
+
+
+def records_panel(records, index_names=None):
+    """جدول شرکت × سال از دیکشنری {کلید: {متغیر: مقدار}}"""
+    panel = pd.DataFrame.from_dict(
+        {key: {name: float(value) for name, value in values.items()
+               if isinstance(value, numbers.Number)}
+         for key, values in records.items()},
+        orient='index'
+    )
+    if index_names and isinstance(panel.index, pd.MultiIndex):
+        panel.index.names = index_names
+    return panel
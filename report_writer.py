@@ -0,0 +1,136 @@
+"""نوشتن جریانی گزارش پهن (شاخص‌ها در سطرها، شرکت × سال در ستون‌ها)
+
+هر شرکت یک بلوک ستونی با یک ستون برای هر سال دارد و نام شرکت روی بلوک
+ادغام می‌شود. شرکت‌ها به ترتیب دریافت می‌شوند و فقط شرکت‌های شیت جاری در
+حافظه می‌مانند؛ وقتی شیت به سقف ستون‌های اکسل (یا companies_per_sheet) برسد
+شیت بعدی و وقتی کارپوشه به sheets_per_workbook شیت برسد کارپوشه بعدی
+(نام_2.xlsx، نام_3.xlsx، ...) ساخته می‌شود. کارپوشه‌ها در حالت
+constant_memory و هر سطر با یک فراخوانی write_row نوشته می‌شوند.
+
+    with WideReportWriter(path, row_labels=ratios, years=years) as writer:
+        for company in companies:
+            writer.add_company(company, {year: {ratio: value}})
+    paths = writer.paths
+"""
+from pathlib import Path
+
+import xlsxwriter
+
+# بیشترین تعداد ستون یک شیت اکسل
+EXCEL_MAX_COLUMNS = 16384
+
+
+class WideReportWriter:
+    header_style = {
+        'bold': True,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#D8E4BC',
+        'border': 1,
+        'text_wrap': True
+    }
+    value_style = {
+        'num_format': '#,##0.000000',
+        'align': 'center',
+        'border': 1
+    }
+
+    def __init__(self, output_path, row_labels, years, sheet_name='نسبت‌های مالی',
+                 companies_per_sheet=None, sheets_per_workbook=20, label_width=25, value_width=15):
+        self.output_path = Path(output_path)
+        self.row_labels = list(row_labels)
+        self.years = [str(year) for year in years]
+        self.sheet_name = sheet_name
+        self.sheets_per_workbook = sheets_per_workbook
+        self.label_width = label_width
+        self.value_width = value_width
+
+        # ستون اول برای نام شاخص‌هاست
+        limit = (EXCEL_MAX_COLUMNS - 1) // max(len(self.years), 1)
+        self.companies_per_sheet = min(companies_per_sheet or limit, limit)
+        if self.companies_per_sheet < 1:
+            raise ValueError(f"تعداد سال‌ها ({len(self.years)}) از سقف ستون‌های اکسل بیشتر است")
+
+        self.paths = []
+        self.companies = 0
+        self.sheets = 0
+        self._workbook = None
+        self._sheets = 0
+        self._pending = []
+
+    def add_company(self, company, values_by_year):
+        """افزودن بلوک یک شرکت؛ values_by_year به شکل {سال: {شاخص: مقدار}}"""
+        self._pending.append((company, values_by_year))
+        self.companies += 1
+        if len(self._pending) >= self.companies_per_sheet:
+            self._flush_sheet()
+
+    def close(self):
+        if self._pending or not self.paths:
+            self._flush_sheet()
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        return False
+
+    def _open_workbook(self):
+        if self._workbook is not None:
+            self._workbook.close()
+        number = len(self.paths) + 1
+        path = self.output_path if number == 1 else \
+            self.output_path.with_name(f"{self.output_path.stem}_{number}{self.output_path.suffix}")
+        self._workbook = xlsxwriter.Workbook(str(path), {'constant_memory': True, 'nan_inf_to_errors': True})
+        self._header_format = self._workbook.add_format(self.header_style)
+        self._value_format = self._workbook.add_format(self.value_style)
+        self._sheets = 0
+        self.paths.append(path)
+
+    def _flush_sheet(self):
+        """نوشتن شرکت‌های در انتظار در یک شیت جدید، سطر به سطر"""
+        if self._workbook is None or (self.sheets_per_workbook and self._sheets >= self.sheets_per_workbook):
+            self._open_workbook()
+        self._sheets += 1
+        self.sheets += 1
+        # شماره شیت‌ها در همه کارپوشه‌ها پیوسته است
+        name = self.sheet_name if self.sheets == 1 else f"{self.sheet_name} {self.sheets}"
+        worksheet = self._workbook.add_worksheet(name)
+
+        companies, self._pending = self._pending, []
+        width = len(self.years)
+        worksheet.set_column(0, 0, self.label_width)
+        if companies:
+            worksheet.set_column(1, len(companies) * width, self.value_width)
+
+        # سطر ۰: نام شرکت‌ها روی بلوک سال‌ها
+        for i, (company, _) in enumerate(companies):
+            first = 1 + i * width
+            if width > 1:
+                worksheet.merge_range(0, first, 0, first + width - 1, company, self._header_format)
+            else:
+                worksheet.write_string(0, first, company, self._header_format)
+
+        # سطر ۱: سال‌ها
+        worksheet.write_row(1, 1, self.years * len(companies), self._header_format)
+
+        # یک سطر برای هر شاخص؛ مقدار صفر یا نبود مقدار خانه خالی با همان فرمت است
+        for row, label in enumerate(self.row_labels, start=2):
+            values = []
+            for _, values_by_year in companies:
+                for year in self.years:
+                    value = values_by_year.get(year, {}).get(label)
+                    values.append(value if value else None)
+            worksheet.write_string(row, 0, label, self._header_format)
+            worksheet.write_row(row, 1, values, self._value_format)
+
+        worksheet.freeze_panes(2, 1)
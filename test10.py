@@ -1,401 +1,591 @@
-
-import pandas as pd
-import numpy as np
-from decimal import Decimal, getcontext, ROUND_HALF_UP, DivisionByZero, InvalidOperation
-from datetime import datetime
-import os
-from pathlib import Path
-import warnings
-
-warnings.filterwarnings('ignore')
-getcontext().prec = 28
-
-
-class FinancialAnalyzer:
-    def __init__(self, input_folder_path):
-        self.input_folder = Path(input_folder_path)
-        self.current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.output_dir = self.input_folder / "Financial_Reports"
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-
-        # Updated variables mapping with alternative text variations
-        self.variables_mapping = {
-            "موجودی نقد": ["موجودی نقد", "وجه نقد", "موجودی نقد و معادل نقد", "نقد و معادل نقد"],
-            "دارایی‌های جاری": [
-                "دارایی‌های جاری",
-                "دارایی های جاری",
-                "جمع دارایی‌های جاری",
-                "جمع دارایی های جاری",
-                "جمع دارایی جاری"
-            ],
-            "موجودی مواد و کالا": [
-                "موجودی مواد و کالا",
-                "موجودی کالا",
-                "موجودی‌ها",
-                "موجودی مواد، کالا و قطعات"
-            ],
-            "بدهی‌های جاری": [
-                "بدهی‌های جاری",
-                "بدهی های جاری",
-                "جمع بدهی‌های جاری",
-                "جمع بدهی های جاری",
-                "جمع بدهی جاری"
-            ],
-            "سود خالص": [
-                "سود خالص",
-                "سود (زیان) خالص",
-                "سود و زیان خالص",
-                "سود (زیان) خالص دوره"
-            ],
-            "جمع دارایی‌ها": [
-                "جمع دارایی‌ها",
-                "جمع کل دارایی‌ها",
-                "جمع دارایی ها",
-                "جمع کل دارایی ها"
-            ],
-            "جمع حقوق مالکانه": [
-                "جمع حقوق مالکانه",
-                "جمع حقوق صاحبان سهام",
-                "حقوق صاحبان سهام"
-            ],
-            "فروش": [
-                "درآمدهای عملیاتی",
-                "فروش خالص",
-                "درآمد عملیاتی",
-                "جمع درآمدهای عملیاتی",
-                "فروش"
-            ],
-            "سود عملیاتی": [
-                "سود عملیاتی",
-                "سود (زیان) عملیاتی",
-                "سود و زیان عملیاتی"
-            ],
-            "سود ناخالص": [
-                "سود ناخالص",
-                "سود (زیان) ناخالص",
-                "سود و زیان ناخالص"
-            ],
-            "دریافتنی‌های تجاری و سایر دریافتنی‌ها": [
-                "دریافتنی‌های تجاری",
-                "حساب‌های دریافتنی تجاری",
-                "دریافتنی های تجاری",
-                "حساب های دریافتنی"
-            ],
-            "بهای تمام شده کالای فروش رفته": [
-                "بهای تمام‌شده درآمدهای عملیاتی",
-                "بهای تمام شده کالای فروش رفته",
-                "بهای تمام شده درآمدهای عملیاتی",
-                "بهای تمام شده فروش"
-            ],
-            "جمع بدهی‌ها": [
-                "جمع بدهی‌ها",
-                "جمع کل بدهی‌ها",
-                "جمع بدهی ها",
-                "جمع کل بدهی ها"
-            ],
-            "موجودی نقد": [
-                "موجودی نقد",
-                "وجه نقد",
-                "موجودی نقد و معادل نقد",
-                "نقد",
-                "وجوه نقد"
-            ]
-        }
-
-    def get_value_by_row(self, df, search_terms):
-        """Enhanced value extraction with better pattern matching for Persian financial statements"""
-        try:
-            if isinstance(search_terms, str):
-                search_terms = [search_terms]
-
-            # Convert DataFrame to string type and clean it
-            df = df.astype(str)
-
-            for search_term in search_terms:
-                # Clean search term
-                clean_search = search_term.replace('‌', ' ').replace('\u200c', ' ').strip()
-
-                # Search through all columns and rows
-                for col in range(df.shape[1]):
-                    for idx, row in df.iterrows():
-                        cell_value = str(row.iloc[col]).replace('‌', ' ').replace('\u200c', ' ').strip()
-
-                        # Check if search term is in the cell
-                        if clean_search in cell_value:
-                            # Look for numeric values in all columns of this row
-                            for value_col in range(df.shape[1]):
-                                value = str(row.iloc[value_col]).strip()
-
-                                # Skip empty or non-numeric cells
-                                if not value or value in ['-', 'nan', 'None']:
-                                    continue
-
-                                try:
-                                    # Clean and convert the value
-                                    cleaned_value = value.replace(',', '')
-                                    cleaned_value = cleaned_value.replace('٫', '.')
-                                    cleaned_value = cleaned_value.replace('−', '-')
-                                    cleaned_value = cleaned_value.replace('(', '-')
-                                    cleaned_value = cleaned_value.replace(')', '')
-
-                                    # Convert Persian numbers to English
-                                    persian_numbers = '۰۱۲۳۴۵۶۷۸۹'
-                                    english_numbers = '0123456789'
-                                    for persian, english in zip(persian_numbers, english_numbers):
-                                        cleaned_value = cleaned_value.replace(persian, english)
-
-                                    # Remove any remaining non-numeric characters except decimal point and minus
-                                    cleaned_value = ''.join(c for c in cleaned_value
-                                                            if c.isdigit() or c in '.-')
-
-                                    if cleaned_value:
-                                        decimal_value = Decimal(cleaned_value)
-                                        if decimal_value != 0:
-                                            print(f"Found value for {search_term}: {float(decimal_value):,.2f}")
-                                            return decimal_value
-                                except (ValueError, TypeError, InvalidOperation):
-                                    continue
-
-                print(f"No valid value found for {search_terms[0]}")
-                return Decimal('0')
-
-            return Decimal('0')
-
-        except Exception as e:
-            print(f"Error processing {search_terms[0]}: {str(e)}")
-            return Decimal('0')
-
-
-
-    def safe_divide(self, numerator, denominator):
-        """Precise division for financial calculations"""
-        try:
-            if numerator is None or denominator is None or pd.isna(numerator) or pd.isna(denominator):
-                return Decimal('0')
-
-            # Convert to Decimal
-            if not isinstance(numerator, Decimal):
-                numerator = Decimal(str(numerator))
-            if not isinstance(denominator, Decimal):
-                denominator = Decimal(str(denominator))
-
-            # Check for zero denominator
-            if abs(denominator) < Decimal('1E-28'):
-                return Decimal('0')
-
-            result = numerator / denominator
-            if not result.is_finite():
-                return Decimal('0')
-
-            return result.quantize(Decimal('0.0000000000'), rounding=ROUND_HALF_UP)
-
-        except Exception as e:
-            print(f"Division error: {str(e)}")
-            return Decimal('0')
-
-    # [Previous process_files and create_consolidated_report methods remain the same]
-
-
-    def process_files(self):
-        try:
-            all_years_data = {
-                'variables': {},
-                'ratios': {}
-            }
-
-            excel_files = sorted([f for f in self.input_folder.glob('*.xlsx')
-                                  if not f.name.startswith('~$')])
-
-            for file_path in excel_files:
-                try:
-                    year = file_path.stem
-                    print(f"\nProcessing year {year}...")
-
-                    # Read Excel file
-                    # In the process_files method, update the Excel reading part:
-
-                    df = pd.read_excel(
-                        file_path,
-                        engine='openpyxl',
-                        header=None,
-                        dtype=str,
-                        na_filter=False  # This prevents pandas from converting empty cells to NaN
-                    )
-
-                    # Remove any completely empty rows and columns
-                    df = df.dropna(how='all').dropna(axis=1, how='all')
-
-                    # Initialize variables dictionary with zeros for all keys
-                    variables = {key: Decimal('0') for key in self.variables_mapping.keys()}
-
-                    # Calculate variables
-                    # In process_files method, update the variables calculation part:
-
-                    # Calculate variables with multiple attempts
-                    for var_key, search_terms in self.variables_mapping.items():
-                        raw_value = Decimal('0')
-
-                        # Try each search term
-                        for term in search_terms:
-                            raw_value = self.get_value_by_row(df, term)
-                            if raw_value != Decimal('0'):
-                                break
-
-                        if raw_value != Decimal('0'):
-                            # Convert to millions and store
-                            variables[var_key] = raw_value / Decimal('1000000.0')
-                            print(f"{var_key}: {float(variables[var_key]):,.10f}")
-                        else:
-                            print(f"Warning: No value found for {var_key} in {year}")
-
-                    # Initialize ratios dictionary
-                    ratios = {}
-
-                    # Calculate ratios only if we have valid values
-                    try:
-                        if variables["دارایی‌های جاری"] != 0 and variables["بدهی‌های جاری"] != 0:
-                            ratios["نسبت جاری"] = self.safe_divide(variables["دارایی‌های جاری"],
-                                                                   variables["بدهی‌های جاری"])
-
-                            ratios["نسبت آنی"] = self.safe_divide(
-                                variables["دارایی‌های جاری"] - variables["موجودی مواد و کالا"],
-                                variables["بدهی‌های جاری"]
-                            )
-
-                            ratios["نسبت نقدی"] = self.safe_divide(variables["موجودی نقد"],
-                                                                   variables["بدهی‌های جاری"])
-
-                        if variables["سود خالص"] != 0:
-                            ratios["بازده دارایی‌ها"] = self.safe_divide(variables["سود خالص"],
-                                                                         variables["جمع دارایی‌ها"])
-                            ratios["بازده حقوق صاحبان سهام"] = self.safe_divide(variables["سود خالص"],
-                                                                                variables["جمع حقوق مالکانه"])
-                            ratios["حاشیه سود خالص"] = self.safe_divide(variables["سود خالص"],
-                                                                        variables["فروش"])
-
-                        if variables["سود عملیاتی"] != 0:
-                            ratios["حاشیه سود عملیاتی"] = self.safe_divide(variables["سود عملیاتی"],
-                                                                           variables["فروش"])
-
-                        if variables["سود ناخالص"] != 0:
-                            ratios["حاشیه سود ناخالص"] = self.safe_divide(variables["سود ناخالص"],
-                                                                          variables["فروش"])
-
-                        if variables["فروش"] != 0:
-                            ratios["دوره وصول مطالبات"] = self.safe_divide(
-                                variables["دریافتنی‌های تجاری و سایر دریافتنی‌ها"] * Decimal('365'),
-                                variables["فروش"]
-                            )
-
-                            ratios["گردش مطالبات"] = self.safe_divide(
-                                variables["فروش"],
-                                variables["دریافتنی‌های تجاری و سایر دریافتنی‌ها"]
-                            )
-
-                        if variables["موجودی مواد و کالا"] != 0:
-                            ratios["گردش موجودی کالا"] = self.safe_divide(
-                                variables["بهای تمام شده کالای فروش رفته"],
-                                variables["موجودی مواد و کالا"]
-                            )
-
-                        if variables["جمع دارایی‌ها"] != 0:
-                            ratios["نسبت بدهی به دارایی"] = self.safe_divide(variables["جمع بدهی‌ها"],
-                                                                             variables["جمع دارایی‌ها"])
-
-                        # Store data with high precision
-                        all_years_data['variables'][year] = {k: float(v) for k, v in variables.items()}
-                        all_years_data['ratios'][year] = {k: float(v) for k, v in ratios.items()}
-
-                    except Exception as e:
-                        print(f"Error calculating ratios for {year}: {str(e)}")
-                        import traceback
-                        print(traceback.format_exc())
-                        continue
-
-                except Exception as e:
-                    print(f"Error processing file {file_path}: {str(e)}")
-                    import traceback
-                    print(traceback.format_exc())
-                    continue
-
-            return self.create_consolidated_report(all_years_data)
-
-        except Exception as e:
-            print(f"Error in process_files: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return None
-
-    def create_consolidated_report(self, all_years_data):
-        try:
-            filename = self.output_dir / f"Consolidated_Financial_Analysis_{self.current_time}.xlsx"
-
-            with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
-                workbook = writer.book
-
-                # Create formats
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'font_color': 'white',
-                    'bg_color': '#0066cc',
-                    'border': 1,
-                    'align': 'right',
-                    'font_name': 'B Nazanin',
-                    'num_format': '#,##0.0000000000'
-                })
-
-                # In create_consolidated_report method:
-                number_format = workbook.add_format({
-                    'num_format': '#,##0.0000000000',
-                    'border': 1,
-                    'align': 'right',
-                    'font_name': 'B Nazanin'
-                })
-
-                # Create DataFrames with exact precision
-                variables_df = pd.DataFrame(all_years_data['variables']).round(10)
-                ratios_df = pd.DataFrame(all_years_data['ratios']).round(10)
-
-                # Write sheets
-                variables_df.to_excel(writer, sheet_name='متغیرهای پایه', index=True)
-                ratios_df.to_excel(writer, sheet_name='نسبت‌های مالی', index=True)
-
-                # Format sheets
-                for sheet_name in writer.sheets:
-                    worksheet = writer.sheets[sheet_name]
-                    worksheet.set_column('A:A', 40)
-                    worksheet.set_column('B:Z', 20, number_format)
-                    worksheet.set_row(0, None, header_format)
-                    worksheet.right_to_left()
-
-            print(f"\nConsolidated report created at:\n{filename}")
-            return filename
-
-        except Exception as e:
-            print(f"Error creating consolidated report: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return None
-
-
-def main():
-    print("Financial Analysis Tool")
-    print("-" * 50)
-
-    input_folder = input("Please enter the folder path containing the yearly files: ").strip()
-
-    if not os.path.exists(input_folder):
-        print("Invalid path!")
-        return
-
-    analyzer = FinancialAnalyzer(input_folder)
-    output_file = analyzer.process_files()
-
-    if output_file:
-        print("\nProcessing completed successfully!")
-        print(f"Output file location: {output_file}")
-
-
-if __name__ == "__main__":
+
+import pandas as pd
+from decimal import getcontext, InvalidOperation
+from datetime import datetime
+import os
+from pathlib import Path
+import warnings
+
+from workbook_cache import WorkbookCache
+from instrumentation import timer, timed, profile_batch
+from ratio_engine import RatioSpec, RatioEngine
+from numeric_backend import DecimalBackend, get_backend
+from columnar_export import (cell_reference, export_formats, export_results,
+                             METRICS_KEY, RATIOS_KEY, SOURCES_KEY)
+from manifest import Manifest, namespace_key
+from label_matcher import LabelMatcher, fuzzy_threshold
+
+warnings.filterwarnings('ignore')
+getcontext().prec = 28
+
+# Each ratio is only reported when the variables in `requires` are non-zero;
+# a zero denominator yields 0, and results keep 10 decimal places
+RATIO_SPECS = [
+    RatioSpec("نسبت جاری", "دارایی‌های جاری", "بدهی‌های جاری",
+              requires=["دارایی‌های جاری", "بدهی‌های جاری"]),
+    RatioSpec("نسبت آنی", [("دارایی‌های جاری", 1), ("موجودی مواد و کالا", -1)], "بدهی‌های جاری",
+              requires=["دارایی‌های جاری", "بدهی‌های جاری"]),
+    RatioSpec("نسبت نقدی", "موجودی نقد", "بدهی‌های جاری",
+              requires=["دارایی‌های جاری", "بدهی‌های جاری"]),
+    RatioSpec("بازده دارایی‌ها", "سود خالص", "جمع دارایی‌ها", requires=["سود خالص"]),
+    RatioSpec("بازده حقوق صاحبان سهام", "سود خالص", "جمع حقوق مالکانه", requires=["سود خالص"]),
+    RatioSpec("حاشیه سود خالص", "سود خالص", "فروش", requires=["سود خالص"]),
+    RatioSpec("حاشیه سود عملیاتی", "سود عملیاتی", "فروش", requires=["سود عملیاتی"]),
+    RatioSpec("حاشیه سود ناخالص", "سود ناخالص", "فروش", requires=["سود ناخالص"]),
+    RatioSpec("دوره وصول مطالبات", "دریافتنی‌های تجاری و سایر دریافتنی‌ها", "فروش",
+              multiplier=365, requires=["فروش"]),
+    RatioSpec("گردش مطالبات", "فروش", "دریافتنی‌های تجاری و سایر دریافتنی‌ها", requires=["فروش"]),
+    RatioSpec("گردش موجودی کالا", "بهای تمام شده کالای فروش رفته", "موجودی مواد و کالا",
+              requires=["موجودی مواد و کالا"]),
+    RatioSpec("نسبت بدهی به دارایی", "جمع بدهی‌ها", "جمع دارایی‌ها", requires=["جمع دارایی‌ها"]),
+]
+ratio_engine = RatioEngine(RATIO_SPECS, places=10, fill=0.0)
+
+# Values and ratios stay in Decimal unless EXALL_NUMERIC or `numeric` selects float/fixed
+DEFAULT_NUMERIC = 'decimal'
+_decimal = DecimalBackend()
+
+
+def clean_label(text):
+    """Normalize half-spaces in a label or cell before substring matching"""
+    return str(text).replace('‌', ' ').replace('\u200c', ' ').strip()
+
+
+def parse_cell_value(value, backend=None):
+    """Parse a statement cell into a number of the given backend (Decimal by default),
+    or None when it holds no number"""
+    value = str(value).strip()
+
+    # Skip empty or non-numeric cells
+    if not value or value in ['-', 'nan', 'None']:
+        return None
+
+    try:
+        # Clean and convert the value
+        cleaned_value = value.replace(',', '')
+        cleaned_value = cleaned_value.replace('٫', '.')
+        cleaned_value = cleaned_value.replace('−', '-')
+        cleaned_value = cleaned_value.replace('(', '-')
+        cleaned_value = cleaned_value.replace(')', '')
+
+        # Convert Persian numbers to English
+        persian_numbers = '۰۱۲۳۴۵۶۷۸۹'
+        english_numbers = '0123456789'
+        for persian, english in zip(persian_numbers, english_numbers):
+            cleaned_value = cleaned_value.replace(persian, english)
+
+        # Remove any remaining non-numeric characters except decimal point and minus
+        cleaned_value = ''.join(c for c in cleaned_value
+                                if c.isdigit() or c in '.-')
+
+        if cleaned_value:
+            return (backend or _decimal).number(cleaned_value)
+    except (ValueError, TypeError, InvalidOperation):
+        pass
+    return None
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that reports every search term found in a text in one pass"""
+
+    def __init__(self, terms):
+        self.terms = []
+        self.term_ids = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for term in terms:
+            if not term or term in self.term_ids:
+                continue
+            self.term_ids[term] = len(self.terms)
+            self.terms.append(term)
+
+            node = 0
+            for char in term:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(self.term_ids[term])
+
+        # Breadth-first pass to set failure links and merge their outputs
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def find_all(self, text):
+        """Return the ids of all terms contained in text"""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._out[node]:
+                found.update(self._out[node])
+        return found
+
+
+class FinancialAnalyzer:
+    def __init__(self, input_folder_path, numeric=None):
+        self.input_folder = Path(input_folder_path)
+        # Numeric backend for values and ratios (float, fixed or decimal)
+        self.numeric = get_backend(numeric, DEFAULT_NUMERIC)
+        self.current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.output_dir = self.input_folder / "Financial_Reports"
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+        # Parsed sheets cached on disk, keyed by file content hash
+        self.workbook_cache = WorkbookCache()
+
+        # Updated variables mapping with alternative text variations
+        self.variables_mapping = {
+            "موجودی نقد": ["موجودی نقد", "وجه نقد", "موجودی نقد و معادل نقد", "نقد و معادل نقد"],
+            "دارایی‌های جاری": [
+                "دارایی‌های جاری",
+                "دارایی های جاری",
+                "جمع دارایی‌های جاری",
+                "جمع دارایی های جاری",
+                "جمع دارایی جاری"
+            ],
+            "موجودی مواد و کالا": [
+                "موجودی مواد و کالا",
+                "موجودی کالا",
+                "موجودی‌ها",
+                "موجودی مواد، کالا و قطعات"
+            ],
+            "بدهی‌های جاری": [
+                "بدهی‌های جاری",
+                "بدهی های جاری",
+                "جمع بدهی‌های جاری",
+                "جمع بدهی های جاری",
+                "جمع بدهی جاری"
+            ],
+            "سود خالص": [
+                "سود خالص",
+                "سود (زیان) خالص",
+                "سود و زیان خالص",
+                "سود (زیان) خالص دوره"
+            ],
+            "جمع دارایی‌ها": [
+                "جمع دارایی‌ها",
+                "جمع کل دارایی‌ها",
+                "جمع دارایی ها",
+                "جمع کل دارایی ها"
+            ],
+            "جمع حقوق مالکانه": [
+                "جمع حقوق مالکانه",
+                "جمع حقوق صاحبان سهام",
+                "حقوق صاحبان سهام"
+            ],
+            "فروش": [
+                "درآمدهای عملیاتی",
+                "فروش خالص",
+                "درآمد عملیاتی",
+                "جمع درآمدهای عملیاتی",
+                "فروش"
+            ],
+            "سود عملیاتی": [
+                "سود عملیاتی",
+                "سود (زیان) عملیاتی",
+                "سود و زیان عملیاتی"
+            ],
+            "سود ناخالص": [
+                "سود ناخالص",
+                "سود (زیان) ناخالص",
+                "سود و زیان ناخالص"
+            ],
+            "دریافتنی‌های تجاری و سایر دریافتنی‌ها": [
+                "دریافتنی‌های تجاری",
+                "حساب‌های دریافتنی تجاری",
+                "دریافتنی های تجاری",
+                "حساب های دریافتنی"
+            ],
+            "بهای تمام شده کالای فروش رفته": [
+                "بهای تمام‌شده درآمدهای عملیاتی",
+                "بهای تمام شده کالای فروش رفته",
+                "بهای تمام شده درآمدهای عملیاتی",
+                "بهای تمام شده فروش"
+            ],
+            "جمع بدهی‌ها": [
+                "جمع بدهی‌ها",
+                "جمع کل بدهی‌ها",
+                "جمع بدهی ها",
+                "جمع کل بدهی ها"
+            ],
+            "موجودی نقد": [
+                "موجودی نقد",
+                "وجه نقد",
+                "موجودی نقد و معادل نقد",
+                "نقد",
+                "وجوه نقد"
+            ]
+        }
+
+        # All search terms are compiled once into a multi-pattern matcher
+        self.automaton = KeywordAutomaton(
+            clean_label(term) for terms in self.variables_mapping.values() for term in terms
+        )
+
+        # Minimum similarity for the fallback to similar cell labels (EXALL_FUZZY), or None
+        self.fuzzy = fuzzy_threshold()
+
+    def get_value_by_row(self, df, search_terms):
+        """Enhanced value extraction with better pattern matching for Persian financial statements"""
+        try:
+            if isinstance(search_terms, str):
+                search_terms = [search_terms]
+
+            values = self.find_values(df, search_terms)
+            for search_term in search_terms:
+                value = values.get(search_term, self.numeric.zero)
+                if value != 0:
+                    print(f"Found value for {search_term}: {float(value):,.2f}")
+                    return value
+
+            print(f"No valid value found for {search_terms[0]}")
+            return self.numeric.zero
+
+        except Exception as e:
+            print(f"Error processing {search_terms[0]}: {str(e)}")
+            return self.numeric.zero
+
+    def find_values(self, df, search_terms, automaton=None, cells=None):
+        """Find the value for every search term in a single pass over the sheet
+
+        Cells are visited column by column, as in the original per-term scan. The
+        first cell containing a term whose row holds a non-zero number gives
+        that term's value. If a cells dict is given, the (row, column) position
+        of each found number is stored in it by term.
+        """
+        if automaton is None:
+            automaton = KeywordAutomaton(clean_label(term) for term in search_terms)
+
+        grid = df.astype(str).to_numpy(dtype=object)
+        row_values = {}
+        resolved = {}
+        positions = {}
+
+        for col in range(grid.shape[1]):
+            if len(resolved) == len(automaton.terms):
+                break
+            for row in range(grid.shape[0]):
+                term_ids = automaton.find_all(clean_label(grid[row, col]))
+                term_ids.difference_update(resolved)
+                if not term_ids:
+                    continue
+
+                # The first non-zero number in a row is shared by all terms matching it
+                if row not in row_values:
+                    row_values[row] = (self.numeric.zero, None)
+                    for number_col, value in enumerate(grid[row]):
+                        number = parse_cell_value(value, self.numeric)
+                        if number is not None and number != 0:
+                            row_values[row] = (number, number_col)
+                            break
+
+                number, number_col = row_values[row]
+                if number != 0:
+                    for term_id in term_ids:
+                        resolved[term_id] = number
+                        positions[term_id] = (row, number_col)
+
+        if cells is not None:
+            for term in search_terms:
+                term_id = automaton.term_ids.get(clean_label(term))
+                if term_id in positions:
+                    cells[term] = positions[term_id]
+
+        return {
+            term: resolved.get(automaton.term_ids.get(clean_label(term)), self.numeric.zero)
+            for term in search_terms
+        }
+
+    def extract_variables(self, df, cells=None):
+        """Extract all mapped variables from a sheet with one automaton pass"""
+        all_terms = [term for terms in self.variables_mapping.values() for term in terms]
+        term_cells = {}
+        values = self.find_values(df, all_terms, self.automaton, term_cells)
+
+        variables = {}
+        for var_key, search_terms in self.variables_mapping.items():
+            variables[var_key] = self.numeric.zero
+            # Terms keep their priority order within each variable
+            for term in search_terms:
+                if values[term] != 0:
+                    variables[var_key] = values[term]
+                    if cells is not None:
+                        cells[var_key] = term_cells[term]
+                    break
+
+        missing = [var_key for var_key, value in variables.items() if value == 0]
+        if missing and self.fuzzy:
+            self.extract_similar(df, missing, variables, cells)
+        return variables
+
+    def extract_similar(self, df, var_keys, variables, cells=None):
+        """Fill the given variables from the cell labels most similar to their search terms
+
+        Candidate labels are tried from the highest similarity score down, and
+        the first one whose row holds a non-zero number is used.
+        """
+        labels = dict.fromkeys(clean_label(value) for value in df.astype(str).to_numpy().ravel())
+        matcher = LabelMatcher(labels)
+        similar = {
+            var_key: matcher.search(self.variables_mapping[var_key], min_score=self.fuzzy)
+            for var_key in var_keys
+        }
+        all_labels = [label for matches in similar.values() for label, _ in matches]
+        if not all_labels:
+            return
+
+        label_cells = {}
+        values = self.find_values(df, all_labels, cells=label_cells)
+        for var_key, matches in similar.items():
+            for label, score in matches:
+                if values[label] != 0:
+                    print(f"{var_key}: using similar label '{label}' (score {score:.2f})")
+                    variables[var_key] = values[label]
+                    if cells is not None:
+                        cells[var_key] = label_cells[label]
+                    break
+
+    def read_variables(self, file_path, year=None, sources=None):
+        """Read one yearly file and extract all variables, in millions
+
+        If a sources dict is given, the A1 address of each found value is stored in it.
+        """
+        year = year or Path(file_path).stem
+
+        # Read Excel file (served from the cache when unchanged)
+        with timer.stage('read'):
+            df = self.workbook_cache.read_excel(
+                file_path,
+                header=None,
+                dtype=str,
+                na_filter=False  # This prevents pandas from converting empty cells to NaN
+            )
+
+        # Remove any completely empty rows and columns
+        with timer.stage('normalize'):
+            df = df.dropna(how='all').dropna(axis=1, how='all')
+
+        # Calculate variables for all search terms in a single pass
+        with timer.stage('search'):
+            cells = {}
+            raw_values = self.extract_variables(df, cells)
+        if sources is not None:
+            for var_key, (row, col) in cells.items():
+                sources[var_key] = cell_reference(df.index[row], df.columns[col])
+        variables = {key: self.numeric.zero for key in self.variables_mapping.keys()}
+
+        for var_key, raw_value in raw_values.items():
+            if raw_value != 0:
+                # Convert to millions and store
+                variables[var_key] = self.numeric.scale(raw_value, 1_000_000)
+                print(f"{var_key}: {float(variables[var_key]):,.10f}")
+            else:
+                print(f"Warning: No value found for {var_key} in {year}")
+
+        return variables
+
+    def manifest(self, enabled=None):
+        """Change manifest of the input folder, invalidated by new mappings, numeric types
+        or fuzzy matching thresholds"""
+        fuzzy = [self.fuzzy] if self.fuzzy else []
+        namespace = namespace_key('test10', self.variables_mapping, self.numeric.name,
+                                  getattr(self.numeric, 'digits', None), *fuzzy)
+        return Manifest.for_folder(self.input_folder, 'test10', namespace, enabled)
+
+    @timed('ratio')
+    def calculate_ratios(self, variables):
+        """Calculate financial ratios only where the inputs are valid"""
+        return self.numeric.evaluate_one(ratio_engine, variables)
+
+    def process_files(self):
+        try:
+            all_years_data = {
+                'variables': {},
+                'ratios': {}
+            }
+
+            excel_files = sorted([f for f in self.input_folder.glob('*.xlsx')
+                                  if not f.name.startswith('~$')])
+
+            # Files unchanged since the last run are taken from the manifest
+            manifest = self.manifest()
+            stored, _ = manifest.partition(excel_files)
+
+            panel = {}
+            sources = {}
+            for file_path in excel_files:
+                try:
+                    year = file_path.stem
+                    if stored.get(file_path):
+                        print(f"\nYear {year} unchanged, using stored values")
+                        panel[year] = {k: self.numeric.exact(v) for k, v in stored[file_path]['variables'].items()}
+                        sources[year] = stored[file_path]['sources']
+                        continue
+
+                    print(f"\nProcessing year {year}...")
+
+                    with timer.file(file_path.name):
+                        sources[year] = {}
+                        panel[year] = self.read_variables(file_path, year, sources[year])
+                    manifest.record(file_path, {
+                        'variables': {k: str(v) for k, v in panel[year].items()},
+                        'sources': sources[year],
+                    })
+
+                except Exception as e:
+                    print(f"Error processing file {file_path}: {str(e)}")
+                    import traceback
+                    print(traceback.format_exc())
+                    continue
+            manifest.save()
+
+            # Ratios for all years are evaluated together over the year panel
+            try:
+                with timer.stage('ratio'):
+                    panel_ratios = self.numeric.evaluate(ratio_engine, panel)
+
+                # Store data with high precision
+                for year, variables in panel.items():
+                    ratios = panel_ratios[year]
+                    all_years_data['variables'][year] = {k: float(v) for k, v in variables.items()}
+                    all_years_data['ratios'][year] = {k: float(v) for k, v in ratios.items()}
+
+            except Exception as e:
+                print(f"Error calculating ratios: {str(e)}")
+                import traceback
+                print(traceback.format_exc())
+
+            all_years_data['sources'] = sources
+
+            # Outputs selected with EXALL_EXPORT (Excel only by default)
+            formats = export_formats()
+            report = None
+            if 'excel' in formats:
+                report = self.create_consolidated_report(all_years_data)
+            columnar = self.export_columnar(all_years_data, formats)
+            return report or (columnar[0] if columnar else None)
+
+        except Exception as e:
+            print(f"Error in process_files: {str(e)}")
+            import traceback
+            print(traceback.format_exc())
+            return None
+
+    @timed('write')
+    def create_consolidated_report(self, all_years_data):
+        try:
+            filename = self.output_dir / f"Consolidated_Financial_Analysis_{self.current_time}.xlsx"
+
+            with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+                workbook = writer.book
+
+                # Create formats
+                header_format = workbook.add_format({
+                    'bold': True,
+                    'font_color': 'white',
+                    'bg_color': '#0066cc',
+                    'border': 1,
+                    'align': 'right',
+                    'font_name': 'B Nazanin',
+                    'num_format': '#,##0.0000000000'
+                })
+
+                # In create_consolidated_report method:
+                number_format = workbook.add_format({
+                    'num_format': '#,##0.0000000000',
+                    'border': 1,
+                    'align': 'right',
+                    'font_name': 'B Nazanin'
+                })
+
+                # Create DataFrames with exact precision
+                variables_df = pd.DataFrame(all_years_data['variables']).round(10)
+                ratios_df = pd.DataFrame(all_years_data['ratios']).round(10)
+
+                # Write sheets
+                variables_df.to_excel(writer, sheet_name='متغیرهای پایه', index=True)
+                ratios_df.to_excel(writer, sheet_name='نسبت‌های مالی', index=True)
+
+                # Format sheets
+                for sheet_name in writer.sheets:
+                    worksheet = writer.sheets[sheet_name]
+                    worksheet.set_column('A:A', 40)
+                    worksheet.set_column('B:Z', 20, number_format)
+                    worksheet.set_row(0, None, header_format)
+                    worksheet.right_to_left()
+
+            print(f"\nConsolidated report created at:\n{filename}")
+            return filename
+
+        except Exception as e:
+            print(f"Error creating consolidated report: {str(e)}")
+            import traceback
+            print(traceback.format_exc())
+            return None
+
+    @timed('write')
+    def export_columnar(self, all_years_data, formats=None):
+        """Write variables, ratios and source cells as Parquet/Arrow next to the Excel report
+
+        The input folder holds one company's yearly files, so its name is used as the company.
+        """
+        try:
+            company = self.input_folder.resolve().name
+            results = {company: {
+                year: {
+                    METRICS_KEY: variables,
+                    RATIOS_KEY: all_years_data['ratios'].get(year, {}),
+                    SOURCES_KEY: all_years_data.get('sources', {}).get(year, {}),
+                }
+                for year, variables in all_years_data['variables'].items()
+            }}
+            filename = self.output_dir / f"Consolidated_Financial_Analysis_{self.current_time}.xlsx"
+            paths = export_results('test10', results, filename, formats)
+            for path in paths:
+                print(f"Columnar export written to:\n{path}")
+            return paths
+
+        except Exception as e:
+            print(f"Error writing columnar export: {str(e)}")
+            return []
+
+
+def main():
+    print("Financial Analysis Tool")
+    print("-" * 50)
+
+    input_folder = input("Please enter the folder path containing the yearly files: ").strip()
+
+    if not os.path.exists(input_folder):
+        print("Invalid path!")
+        return
+
+    analyzer = FinancialAnalyzer(input_folder)
+    with profile_batch('test10'):
+        output_file = analyzer.process_files()
+    timer.report()
+
+    if output_file:
+        print("\nProcessing completed successfully!")
+        print(f"Output file location: {output_file}")
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
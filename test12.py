@@ -1,33 +1,111 @@
-from pathlib import Path
-import pandas as pd
-from typing import Dict, Tuple, Optional
-from helper_functions import clean_persian_text, convert_to_number
-from financial_ratios import FinancialRatioCalculator
-from decimal import Decimal, ROUND_HALF_UP
-import pandas as pd
 import re
-from decimal import Decimal
-from typing import Dict, Optional
-from helper_functions import safe_divide
 import sys
 import logging
 from datetime import datetime
+from decimal import Decimal
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Tuple, Optional
+
 import pandas as pd
-from financial_analyzer import FinancialAnalyzer
+
+from workbook_cache import WorkbookCache
+from instrumentation import timer, timed, profile_batch
+from ratio_engine import RatioSpec, RatioEngine
+from numeric_backend import DecimalBackend, get_backend
+
+# مقادیر و نسبت‌ها به صورت پیش‌فرض Decimal هستند (قابل تغییر با EXALL_NUMERIC یا numeric)
+DEFAULT_NUMERIC = 'decimal'
+_decimal = DecimalBackend()
+
+
+def clean_persian_text(text: str) -> str:
+    """
+    پاکسازی و یکسان‌سازی متن فارسی
+    """
+    if not isinstance(text, str):
+        return ''
+
+    # حذف فاصله‌های اضافی
+    text = re.sub(r'\s+', ' ', text)
+
+    # یکسان‌سازی کاراکترها
+    replacements = {
+        'ي': 'ی', 'ك': 'ک',
+        '٠': '۰', '١': '۱', '٢': '۲', '٣': '۳', '٤': '۴',
+        '٥': '۵', '٦': '۶', '٧': '۷', '٨': '۸', '٩': '۹'
+    }
+
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+
+    return text.strip()
+
+
+def convert_to_number(value: str, backend=None) -> Decimal:
+    """
+    تبدیل متن به عدد (از نوع عددی backend، پیش‌فرض Decimal) با پشتیبانی از فرمت‌های مختلف
+    """
+    backend = backend or _decimal
+    try:
+        if pd.isna(value) or not str(value).strip():
+            return backend.zero
+
+        value = str(value)
+
+        # تبدیل اعداد فارسی به انگلیسی
+        persian_nums = '۰۱۲۳۴۵۶۷۸۹'
+        english_nums = '0123456789'
+        for persian, english in zip(persian_nums, english_nums):
+            value = value.replace(persian, english)
+
+        # پاکسازی کاراکترهای غیرعددی
+        value = value.replace(',', '').replace('٬', '')
+        value = value.replace('(', '-').replace(')', '')
+        value = value.replace('−', '-').replace('–', '-')
+
+        # فقط نگه داشتن اعداد و علامت‌های خاص
+        value = ''.join(c for c in value if c.isdigit() or c in '.-')
+
+        number = backend.number(value) if value else None
+        if number is None and value:
+            raise ValueError("عدد نامعتبر")
+        return number if number is not None else backend.zero
+
+    except Exception as e:
+        print(f"خطا در تبدیل مقدار {value} به عدد: {str(e)}")
+        return backend.zero
+
 
 class FinancialAnalyzer:
-    def __init__(self, input_folder: str):
+    def __init__(self, input_folder: str, numeric=None):
         self.input_folder = Path(input_folder)
-        self.ratio_calculator = FinancialRatioCalculator()
+        self.output_dir = self.input_folder / "Financial_Reports"
+        self.output_dir.mkdir(exist_ok=True)
+        self.numeric = get_backend(numeric, DEFAULT_NUMERIC)
+        self.ratio_calculator = FinancialRatioCalculator(self.numeric)
+
+        # کش شیت‌های تجزیه شده با کلید هش محتوای فایل
+        self.workbook_cache = WorkbookCache()
 
         # عبارات جستجو برای متغیرها
         self.search_terms = {
             "وجه نقد": ["موجودی نقد", "وجه نقد", "موجودی نقد و بانک"],
             "حساب دریافتنی": ["حسابهای دریافتنی تجاری", "دریافتنی‌های تجاری"],
             "موجودی کالا": ["موجودی مواد و کالا", "موجودی کالا", "موجودی‌ها"],
-            # ... سایر متغیرها
+            "دارایی جاری": ["جمع دارایی‌های جاری", "جمع دارایی های جاری", "دارایی‌های جاری"],
+            "بدهی جاری": ["جمع بدهی‌های جاری", "جمع بدهی های جاری", "بدهی‌های جاری"],
+            "کل دارایی ها": ["جمع دارایی‌ها", "جمع کل دارایی‌ها", "جمع دارایی ها", "جمع کل دارایی ها"],
+            "کل بدهی ها": ["جمع بدهی‌ها", "جمع کل بدهی‌ها", "جمع بدهی ها", "جمع کل بدهی ها"],
+            "حقوق صاحبان سهام": ["جمع حقوق مالکانه", "جمع حقوق صاحبان سهام", "حقوق صاحبان سهام"],
+            "فروش": ["درآمدهای عملیاتی", "فروش خالص", "درآمد عملیاتی", "فروش"],
+            "بهای تمام شده کالای فروش رفته": [
+                "بهای تمام شده کالای فروش رفته",
+                "بهای تمام شده درآمدهای عملیاتی",
+                "بهای تمام‌شده درآمدهای عملیاتی"
+            ],
+            "سود ناخالص": ["سود ناخالص", "سود (زیان) ناخالص"],
+            "سود عملیاتی": ["سود عملیاتی", "سود (زیان) عملیاتی"],
+            "سود خالص": ["سود خالص", "سود (زیان) خالص"]
         }
 
     def find_value_in_df(self, df: pd.DataFrame, search_terms: list) -> Decimal:
@@ -43,38 +121,44 @@ class FinancialAnalyzer:
                         if term in cell_value:
                             for value_col in df.columns:
                                 value = str(row[value_col])
-                                number = convert_to_number(value)
+                                number = convert_to_number(value, self.numeric)
                                 if number != 0:
                                     return number
-            return Decimal('0')
+            return self.numeric.zero
 
         except Exception as e:
             print(f"خطا در جستجوی مقدار: {str(e)}")
-            return Decimal('0')
+            return self.numeric.zero
 
-    def process_file(self, file_path: Path) -> Tuple[Dict, Dict]:
+    def process_file(self, file_path: Path, with_ratios: bool = True) -> Tuple[Dict, Dict]:
         """
-        پردازش فایل اکسل و استخراج داده‌ها
+        پردازش فایل اکسل و استخراج داده‌ها (با with_ratios=False بدون محاسبه نسبت‌ها)
         """
         try:
             print(f"\nدر حال پردازش فایل: {file_path.name}")
 
-            df = pd.read_excel(
-                file_path,
-                header=None,
-                dtype=str,
-                na_filter=False
-            )
+            with timer.stage('read'):
+                df = self.workbook_cache.read_excel(
+                    file_path,
+                    header=None,
+                    dtype=str,
+                    na_filter=False
+                )
 
             # استخراج متغیرها
             variables = {}
-            for var_name, search_terms in self.search_terms.items():
-                value = self.find_value_in_df(df, search_terms)
-                variables[var_name] = value
-                print(f"{var_name}: {float(value):,.0f}")
+            with timer.stage('search'):
+                for var_name, search_terms in self.search_terms.items():
+                    value = self.find_value_in_df(df, search_terms)
+                    variables[var_name] = value
+                    print(f"{var_name}: {float(value):,.0f}")
+
+            if not with_ratios:
+                return variables, {}
 
             # محاسبه نسبت‌ها
-            ratios = self.ratio_calculator.calculate_all_ratios(variables)
+            with timer.stage('ratio'):
+                ratios = self.ratio_calculator.calculate_all_ratios(variables)
 
             # نمایش نسبت‌ها
             print("\nنسبت‌های مالی محاسبه شده:")
@@ -87,290 +171,250 @@ class FinancialAnalyzer:
             print(f"خطا در پردازش فایل {file_path.name}: {str(e)}")
             return {}, {}
 
-        def safe_divide(numerator: Decimal, denominator: Decimal) -> Decimal:
-            """
-            تقسیم ایمن دو عدد با در نظر گرفتن حالت تقسیم بر صفر
-            """
-            try:
-                if numerator is None or denominator is None:
-                    return Decimal('0')
-
-                numerator = Decimal(str(numerator))
-                denominator = Decimal(str(denominator))
-
-                if denominator == 0:
-                    return Decimal('0')
-
-                result = numerator / denominator
-                return result.quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)
-
-            except Exception as e:
-                print(f"خطا در تقسیم: {str(e)}")
-                return Decimal('0')
+    def analyze_company(self, company_name: str) -> Dict:
+        """
+        تحلیل همه فایل‌های سالانه یک شرکت (با نام year_company.xlsx)
+        """
+        results = {'variables': {}, 'ratios': {}}
 
-        def clean_persian_text(text: str) -> str:
-            """
-            پاکسازی و یکسان‌سازی متن فارسی
-            """
-            if not isinstance(text, str):
-                return ''
+        for file_path in sorted(self.input_folder.glob(f"*_{company_name}*.xlsx")):
+            year = file_path.stem.split('_')[0]
+            if not year.isdigit():
+                continue
 
-            # حذف فاصله‌های اضافی
-            text = re.sub(r'\s+', ' ', text)
+            with timer.file(file_path.name):
+                variables, _ = self.process_file(file_path, with_ratios=False)
+            if variables:
+                results['variables'][year] = variables
 
-            # یکسان‌سازی کاراکترها
-            replacements = {
-                'ي': 'ی', 'ك': 'ک',
-                '٠': '۰', '١': '۱', '٢': '۲', '٣': '۳', '٤': '۴',
-                '٥': '۵', '٦': '۶', '٧': '۷', '٨': '۸', '٩': '۹'
-            }
+        # نسبت‌های همه سال‌ها یک جا روی جدول سال‌ها محاسبه می‌شوند
+        with timer.stage('ratio'):
+            results['ratios'] = self.ratio_calculator.calculate_panel(results['variables'])
 
-            for old, new in replacements.items():
-                text = text.replace(old, new)
+        if not results['variables']:
+            logging.error(f"هیچ فایلی برای شرکت {company_name} یافت نشد.")
+        return results
 
-            return text.strip()
+    @timed('write')
+    def create_excel_report(self, results: Dict, company_name: str) -> Optional[Path]:
+        """
+        ذخیره متغیرها و نسبت‌های هر سال در یک فایل اکسل
+        """
+        try:
+            excel_file = self.output_dir / f"{company_name}_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 
-        def convert_to_number(value: str) -> Decimal:
-            """
-            تبدیل متن به عدد با پشتیبانی از فرمت‌های مختلف
-            """
-            try:
-                if pd.isna(value) or not str(value).strip():
-                    return Decimal('0')
+            with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
+                for sheet_name, key in [("متغیرها", 'variables'), ("نسبت‌ها", 'ratios')]:
+                    df = pd.DataFrame({
+                        year: {name: float(value) for name, value in values.items()}
+                        for year, values in sorted(results[key].items())
+                    })
+                    df.index.name = "شرح"
+                    df.to_excel(writer, sheet_name=sheet_name)
 
-                value = str(value)
+            logging.info(f"گزارش اکسل در مسیر زیر ذخیره شد:\n{excel_file}")
+            return excel_file
 
-                # تبدیل اعداد فارسی به انگلیسی
-                persian_nums = '۰۱۲۳۴۵۶۷۸۹'
-                english_nums = '0123456789'
-                for persian, english in zip(persian_nums, english_nums):
-                    value = value.replace(persian, english)
+        except Exception as e:
+            logging.error(f"خطا در ایجاد گزارش اکسل: {str(e)}")
+            return None
 
-                # پاکسازی کاراکترهای غیرعددی
-                value = value.replace(',', '').replace('٬', '')
-                value = value.replace('(', '-').replace(')', '')
-                value = value.replace('−', '-').replace('–', '-')
+    @timed('plot')
+    def create_charts(self, results: Dict, company_name: str) -> Optional[Path]:
+        """
+        رسم روند نسبت‌های مالی در سال‌های مختلف
+        """
+        try:
+            # matplotlib فقط هنگام رسم نمودار بارگذاری می‌شود
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+
+            years = sorted(results['ratios'])
+            ratio_names = list(results['ratios'][years[0]])
+
+            fig, axes = plt.subplots(len(ratio_names), 1, figsize=(10, 3 * len(ratio_names)))
+            for ax, ratio_name in zip(axes, ratio_names):
+                values = [float(results['ratios'][year].get(ratio_name, 0)) for year in years]
+                ax.plot(range(len(years)), values, marker='o')
+                ax.set_xticks(range(len(years)), years)
+                ax.set_title(ratio_name)
+                ax.grid(True)
+
+            fig.tight_layout()
+            charts_file = self.output_dir / f"{company_name}_charts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            fig.savefig(charts_file, dpi=100)
+            plt.close(fig)
+
+            logging.info(f"نمودارها در مسیر زیر ذخیره شدند:\n{charts_file}")
+            return charts_file
 
-                # فقط نگه داشتن اعداد و علامت‌های خاص
-                value = ''.join(c for c in value if c.isdigit() or c in '.-')
+        except Exception as e:
+            logging.error(f"خطا در رسم نمودارها: {str(e)}")
+            return None
 
-                return Decimal(value) if value else Decimal('0')
 
-            except Exception as e:
-                print(f"خطا در تبدیل مقدار {value} به عدد: {str(e)}")
-                return Decimal('0')
+# نسبت‌های مالی؛ مخرج صفر مقدار صفر می‌دهد و نسبت‌های درصدی پس از ضرب در ۱۰۰ گرد می‌شوند
+RATIO_SPECS = [
+    # نسبت‌های نقدینگی
+    RatioSpec("نسبت جاری", "دارایی جاری", "بدهی جاری"),
+    RatioSpec("نسبت آنی", [("دارایی جاری", 1), ("موجودی کالا", -1)], "بدهی جاری"),
+    RatioSpec("نسبت وجه نقد", "وجه نقد", "بدهی جاری"),
+    # نسبت‌های سودآوری
+    RatioSpec("بازده دارایی ها", "سود خالص", "کل دارایی ها", multiplier=100, places=2),
+    RatioSpec("بازده حقوق صاحبان سهام", "سود خالص", "حقوق صاحبان سهام", multiplier=100, places=2),
+    RatioSpec("حاشیه سود خالص", "سود خالص", "فروش", multiplier=100, places=2),
+    RatioSpec("حاشیه سود عملیاتی", "سود عملیاتی", "فروش", multiplier=100, places=2),
+    RatioSpec("حاشیه سود ناخالص", "سود ناخالص", "فروش", multiplier=100, places=2),
+    # نسبت‌های فعالیت
+    RatioSpec("دوره وصول مطالبات", "حساب دریافتنی", "فروش", multiplier=365),
+    RatioSpec("گردش حساب دریافتنی", "فروش", "حساب دریافتنی"),
+    RatioSpec("گردش موجودی کالا", "بهای تمام شده کالای فروش رفته", "موجودی کالا"),
+    # نسبت‌های اهرمی
+    RatioSpec("نسبت بدهی به دارایی", "کل بدهی ها", "کل دارایی ها", multiplier=100, places=2),
+]
 
 
 class FinancialRatioCalculator:
     """
-    کلاس محاسبه‌کننده نسبت‌های مالی
+    کلاس محاسبه‌کننده نسبت‌های مالی با موتور برداری نسبت‌ها
     """
 
-    @staticmethod
-    def calculate_liquidity_ratios(data: Dict[str, Decimal]) -> Dict[str, Decimal]:
-        """
-        محاسبه نسبت‌های نقدینگی
-        """
-        return {
-            "نسبت جاری": safe_divide(
-                data["دارایی جاری"],
-                data["بدهی جاری"]
-            ),
-            "نسبت آنی": safe_divide(
-                data["دارایی جاری"] - data["موجودی کالا"],
-                data["بدهی جاری"]
-            ),
-            "نسبت وجه نقد": safe_divide(
-                data["وجه نقد"],
-                data["بدهی جاری"]
-            )
-        }
+    def __init__(self, numeric=None):
+        self.engine = RatioEngine(RATIO_SPECS, places=4, fill=0.0)
+        self.numeric = get_backend(numeric, DEFAULT_NUMERIC)
 
-    @staticmethod
-    def calculate_profitability_ratios(data: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    def calculate_all_ratios(self, data: Dict[str, Decimal]) -> Dict[str, Decimal]:
         """
-        محاسبه نسبت‌های سودآوری
+        محاسبه همه نسبت‌های مالی یک سال
         """
-        return {
-            "بازده دارایی ها": safe_divide(
-                data["سود خالص"],
-                data["کل دارایی ها"]
-            ) * Decimal('100'),
-            "بازده حقوق صاحبان سهام": safe_divide(
-                data["سود خالص"],
-                data["حقوق صاحبان سهام"]
-            ) * Decimal('100'),
-            "حاشیه سود خالص": safe_divide(
-                data["سود خالص"],
-                data["فروش"]
-            ) * Decimal('100'),
-            "حاشیه سود عملیاتی": safe_divide(
-                data["سود عملیاتی"],
-                data["فروش"]
-            ) * Decimal('100'),
-            "حاشیه سود ناخالص": safe_divide(
-                data["سود ناخالص"],
-                data["فروش"]
-            ) * Decimal('100')
-        }
+        return self.numeric.evaluate_one(self.engine, data)
 
-    @staticmethod
-    def calculate_activity_ratios(data: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    def calculate_panel(self, records: Dict[str, Dict[str, Decimal]]) -> Dict[str, Dict[str, Decimal]]:
         """
-        محاسبه نسبت‌های فعالیت
+        محاسبه همه نسبت‌های مالی چند سال (یا چند شرکت) در یک محاسبه ستونی
         """
-        return {
-            "دوره وصول مطالبات": safe_divide(
-                data["حساب دریافتنی"] * Decimal('365'),
-                data["فروش"]
-            ),
-            "گردش حساب دریافتنی": safe_divide(
-                data["فروش"],
-                data["حساب دریافتنی"]
-            ),
-            "گردش موجودی کالا": safe_divide(
-                data["بهای تمام شده کالای فروش رفته"],
-                data["موجودی کالا"]
-            )
-        }
+        return self.numeric.evaluate(self.engine, records)
 
-    @staticmethod
-    def calculate_leverage_ratios(data: Dict[str, Decimal]) -> Dict[str, Decimal]:
-        """
-        محاسبه نسبت‌های اهرمی
-        """
-        return {
-            "نسبت بدهی به دارایی": safe_divide(
-                data["کل بدهی ها"],
-                data["کل دارایی ها"]
-            ) * Decimal('100')
-        }
 
-    def calculate_all_ratios(self, data: Dict[str, Decimal]) -> Dict[str, Decimal]:
-        """
-        محاسبه همه نسبت‌های مالی
-        """
-        all_ratios = {}
-        all_ratios.update(self.calculate_liquidity_ratios(data))
-        all_ratios.update(self.calculate_profitability_ratios(data))
-        all_ratios.update(self.calculate_activity_ratios(data))
-        all_ratios.update(self.calculate_leverage_ratios(data))
-        return all_ratios
-
-    def setup_logging(output_dir: Path) -> None:
-        """
-        راه‌اندازی سیستم ثبت لاگ
-        """
-        log_file = output_dir / f"financial_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
-
-    def get_valid_path(prompt: str) -> Optional[Path]:
-        """
-        دریافت و اعتبارسنجی مسیر ورودی
-        """
-        try:
-            while True:
-                path_str = input(prompt).strip()
+def setup_logging(output_dir: Path) -> None:
+    """
+    راه‌اندازی سیستم ثبت لاگ
+    """
+    log_file = output_dir / f"financial_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
 
-                if not path_str:
-                    logging.error("مسیر نمی‌تواند خالی باشد!")
-                    continue
 
-                path = Path(path_str)
+def get_valid_path(prompt: str) -> Optional[Path]:
+    """
+    دریافت و اعتبارسنجی مسیر ورودی
+    """
+    try:
+        while True:
+            path_str = input(prompt).strip()
 
-                if not path.exists():
-                    logging.error("مسیر وارد شده وجود ندارد!")
-                    retry = input("آیا می‌خواهید دوباره تلاش کنید؟ (بله/خیر) ").strip().lower()
-                    if retry != 'بله':
-                        return None
-                    continue
+            if not path_str:
+                logging.error("مسیر نمی‌تواند خالی باشد!")
+                continue
 
-                return path
+            path = Path(path_str)
 
-        except Exception as e:
-            logging.error(f"خطا در دریافت مسیر: {str(e)}")
-            return None
+            if not path.exists():
+                logging.error("مسیر وارد شده وجود ندارد!")
+                retry = input("آیا می‌خواهید دوباره تلاش کنید؟ (بله/خیر) ").strip().lower()
+                if retry != 'بله':
+                    return None
+                continue
 
-    def save_summary_report(analyzer: FinancialAnalyzer, all_results: dict, company_name: str) -> None:
-        """
-        ذخیره گزارش خلاصه تحلیل
-        """
-        try:
-            summary_file = analyzer.output_dir / f"{company_name}_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            return path
 
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                f.write(f"گزارش تحلیل مالی شرکت {company_name}\n")
-                f.write(f"تاریخ تحلیل: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"تحلیلگر: {sys.argv[1] if len(sys.argv) > 1 else 'mmdura12'}\n")
-                f.write("-" * 50 + "\n\n")
+    except Exception as e:
+        logging.error(f"خطا در دریافت مسیر: {str(e)}")
+        return None
 
-                for year, data in sorted(all_results['ratios'].items()):
-                    f.write(f"\nسال {year}:\n")
-                    f.write("-" * 20 + "\n")
 
-                    # نمایش نسبت‌های کلیدی
-                    key_ratios = [
-                        "نسبت جاری",
-                        "نسبت آنی",
-                        "بازده دارایی ها",
-                        "بازده حقوق صاحبان سهام",
-                        "حاشیه سود خالص"
-                    ]
+def save_summary_report(analyzer: FinancialAnalyzer, all_results: dict, company_name: str) -> None:
+    """
+    ذخیره گزارش خلاصه تحلیل
+    """
+    try:
+        summary_file = analyzer.output_dir / f"{company_name}_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
 
-                    for ratio in key_ratios:
-                        if ratio in data:
-                            f.write(f"{ratio}: {float(data[ratio]):.2f}\n")
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(f"گزارش تحلیل مالی شرکت {company_name}\n")
+            f.write(f"تاریخ تحلیل: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"تحلیلگر: {sys.argv[1] if len(sys.argv) > 1 else 'mmdura12'}\n")
+            f.write("-" * 50 + "\n\n")
 
-                f.write("\n" + "-" * 50 + "\n")
-                f.write("پایان گزارش")
+            for year, data in sorted(all_results['ratios'].items()):
+                f.write(f"\nسال {year}:\n")
+                f.write("-" * 20 + "\n")
 
-            logging.info(f"گزارش خلاصه در مسیر زیر ذخیره شد:\n{summary_file}")
+                # نمایش نسبت‌های کلیدی
+                key_ratios = [
+                    "نسبت جاری",
+                    "نسبت آنی",
+                    "بازده دارایی ها",
+                    "بازده حقوق صاحبان سهام",
+                    "حاشیه سود خالص"
+                ]
 
-        except Exception as e:
-            logging.error(f"خطا در ذخیره گزارش خلاصه: {str(e)}")
+                for ratio in key_ratios:
+                    if ratio in data:
+                        f.write(f"{ratio}: {float(data[ratio]):.2f}\n")
 
-    def main() -> None:
-        """
-        تابع اصلی برنامه
-        """
-        try:
-            print("\n=== سیستم تحلیل مالی ===")
-            print(f"تاریخ و زمان: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
-            print(f"کاربر: {sys.argv[1] if len(sys.argv) > 1 else 'mmdura12'}")
-            print("-" * 30 + "\n")
-
-            # دریافت مسیر پوشه ورودی
-            input_folder = get_valid_path("لطفا مسیر پوشه حاوی فایل‌های اکسل را وارد کنید: ")
-            if not input_folder:
-                logging.error("برنامه به دلیل عدم دریافت مسیر معتبر خاتمه می‌یابد.")
-                return
-
-            # ایجاد پوشه خروجی و راه‌اندازی لاگینگ
-            output_dir = input_folder / "Financial_Reports"
-            output_dir.mkdir(exist_ok=True)
-            setup_logging(output_dir)
-
-            # ایجاد آنالایزر
-            analyzer = FinancialAnalyzer(str(input_folder))
-            logging.info(f"آنالایزر با مسیر ورودی {input_folder} ایجاد شد.")
-
-            # دریافت نام شرکت
-            while True:
-                company_name = input("نام شرکت را وارد کنید: ").strip()
-                if company_name:
-                    break
-                print("نام شرکت نمی‌تواند خالی باشد!")
-
-            # تحلیل شرکت
-            logging.info(f"شروع تحلیل شرکت {company_name}")
+            f.write("\n" + "-" * 50 + "\n")
+            f.write("پایان گزارش")
+
+        logging.info(f"گزارش خلاصه در مسیر زیر ذخیره شد:\n{summary_file}")
+
+    except Exception as e:
+        logging.error(f"خطا در ذخیره گزارش خلاصه: {str(e)}")
+
+
+def main() -> None:
+    """
+    تابع اصلی برنامه
+    """
+    try:
+        print("\n=== سیستم تحلیل مالی ===")
+        print(f"تاریخ و زمان: {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+        print(f"کاربر: {sys.argv[1] if len(sys.argv) > 1 else 'mmdura12'}")
+        print("-" * 30 + "\n")
+
+        # دریافت مسیر پوشه ورودی
+        input_folder = get_valid_path("لطفا مسیر پوشه حاوی فایل‌های اکسل را وارد کنید: ")
+        if not input_folder:
+            logging.error("برنامه به دلیل عدم دریافت مسیر معتبر خاتمه می‌یابد.")
+            return
+
+        # ایجاد پوشه خروجی و راه‌اندازی لاگینگ
+        output_dir = input_folder / "Financial_Reports"
+        output_dir.mkdir(exist_ok=True)
+        setup_logging(output_dir)
+
+        # ایجاد آنالایزر
+        analyzer = FinancialAnalyzer(str(input_folder))
+        logging.info(f"آنالایزر با مسیر ورودی {input_folder} ایجاد شد.")
+
+        # دریافت نام شرکت
+        while True:
+            company_name = input("نام شرکت را وارد کنید: ").strip()
+            if company_name:
+                break
+            print("نام شرکت نمی‌تواند خالی باشد!")
+
+        # تحلیل شرکت
+        logging.info(f"شروع تحلیل شرکت {company_name}")
+        with profile_batch('test12'):
             results = analyzer.analyze_company(company_name)
 
             if results and results.get('variables') and results.get('ratios'):
@@ -391,16 +435,19 @@ class FinancialRatioCalculator:
                 logging.error(f"خطا در تحلیل شرکت {company_name}")
                 print("\nمتاسفانه تحلیل با خطا مواجه شد. لطفا لاگ‌ها را بررسی کنید.")
 
-        except KeyboardInterrupt:
-            print("\n\nبرنامه توسط کاربر متوقف شد.")
-            logging.info("برنامه توسط کاربر متوقف شد.")
+        timer.report()
 
-        except Exception as e:
-            logging.error(f"خطای کلی در اجرای برنامه: {str(e)}")
-            print("\nخطایی در اجرای برنامه رخ داد. لطفا لاگ‌ها را بررسی کنید.")
+    except KeyboardInterrupt:
+        print("\n\nبرنامه توسط کاربر متوقف شد.")
+        logging.info("برنامه توسط کاربر متوقف شد.")
+
+    except Exception as e:
+        logging.error(f"خطای کلی در اجرای برنامه: {str(e)}")
+        print("\nخطایی در اجرای برنامه رخ داد. لطفا لاگ‌ها را بررسی کنید.")
+
+    finally:
+        print("\n=== پایان برنامه ===")
 
-        finally:
-            print("\n=== پایان برنامه ===")
 
-    if __name__ == "__main__":
-        main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from xlsx_readers import get_reader
+from log_config import get_logger
+
+logger = get_logger('workbook_cache')
+
+# با تغییر قالب ذخیره‌سازی، نسخه افزایش می‌یابد تا ورودی‌های قدیمی نادیده گرفته شوند
+CACHE_VERSION = 1
+
+
+def default_cache_dir():
+    """مسیر پیش‌فرض کش (قابل تنظیم با متغیر محیطی EXALL_CACHE_DIR)"""
+    return Path(os.getenv('EXALL_CACHE_DIR') or Path.home() / '.cache' / 'exall')
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """هش SHA-256 محتوای فایل"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write(path, write):
+    """نوشتن فایل در یک فایل موقت و جایگزینی اتمی آن برای کارگرهای همزمان"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp_', suffix=path.suffix)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WorkbookCache:
+    """کش دیسکی شیت‌های خوانده شده با کلید هش محتوای فایل و نام شیت
+
+    هر شیت پس از اولین خواندن به صورت باینری (pickle دیتافریم) ذخیره می‌شود و
+    اجرای‌های بعدی روی فایل تغییر نکرده دیگر اکسل را تجزیه نمی‌کنند. در صورت
+    نبود در کش، فایل با خواننده انتخاب شده (xlsx_readers) تجزیه می‌شود.
+    """
+
+    def __init__(self, cache_dir=None, enabled=None, reader=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.reader = reader if reader is not None else get_reader()
+        if enabled is None:
+            enabled = os.getenv('EXALL_CACHE', '1') != '0'
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._hashes = {}
+
+    def content_hash(self, file_path):
+        """هش محتوای فایل؛ تا زمانی که اندازه و زمان تغییر ثابت است دوباره محاسبه نمی‌شود"""
+        stat = os.stat(file_path)
+        key = (str(Path(file_path).resolve()), stat.st_size, stat.st_mtime_ns)
+        if key not in self._hashes:
+            self._hashes[key] = file_hash(file_path)
+        return self._hashes[key]
+
+    def _entry_path(self, digest, *parts):
+        """مسیر ورودی کش برای هش فایل و اجزای کلید"""
+        key = json.dumps([CACHE_VERSION, self.reader.name, *parts],
+                         ensure_ascii=False, sort_keys=True, default=str)
+        key_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / 'workbooks' / digest[:2] / f"{digest}_{key_hash}.pkl"
+
+    def _load(self, path):
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            return None
+
+    def _store(self, path, obj):
+        try:
+            atomic_write(path, lambda tmp_path: pd.to_pickle(obj, tmp_path))
+        except Exception as e:
+            logger.warning("خطا در ذخیره کش %s: %s", path, e)
+
+    def read_sheets(self, file_path, **kwargs):
+        """خواندن همه شیت‌های فایل به صورت دیکشنری مرتب نام شیت -> دیتافریم"""
+        if not self.enabled:
+            return self.reader.read_excel(file_path, sheet_name=None, **kwargs)
+
+        digest = self.content_hash(file_path)
+        names_path = self._entry_path(digest, 'sheet_names')
+        names = self._load(names_path)
+        if names is not None:
+            sheets = {}
+            for name in names:
+                df = self._load(self._entry_path(digest, 'sheet', name, kwargs))
+                if df is None:
+                    break
+                sheets[name] = df
+            else:
+                self.hits += 1
+                return sheets
+
+        # تجزیه کل فایل در یک بار باز کردن و ذخیره تک‌تک شیت‌ها
+        self.misses += 1
+        sheets = self.reader.read_excel(file_path, sheet_name=None, **kwargs)
+        for name, df in sheets.items():
+            self._store(self._entry_path(digest, 'sheet', name, kwargs), df)
+        self._store(names_path, list(sheets))
+        return sheets
+
+    def read_excel(self, file_path, sheet_name=0, **kwargs):
+        """جایگزین pd.read_excel برای یک شیت؛ خواننده و آرگومان‌ها جزئی از کلید هستند"""
+        if not self.enabled:
+            return self.reader.read_excel(file_path, sheet_name=sheet_name, **kwargs)
+
+        digest = self.content_hash(file_path)
+        path = self._entry_path(digest, 'sheet', sheet_name, kwargs)
+        df = self._load(path)
+        if df is not None:
+            self.hits += 1
+            return df
+
+        self.misses += 1
+        df = self.reader.read_excel(file_path, sheet_name=sheet_name, **kwargs)
+        self._store(path, df)
+        return df
+
+
+class ExtractionCache:
+    """کش نتایج استخراج هر متغیر با کلید هش فایل و هش الگوهای همان متغیر
+
+    تغییر فهرست کلیدواژه‌های یک متغیر فقط ورودی همان متغیر را باطل می‌کند و
+    بقیه متغیرهای فایل همچنان از کش خوانده می‌شوند.
+    """
+
+    def __init__(self, workbook_cache):
+        self.workbook_cache = workbook_cache
+        self.cache_dir = workbook_cache.cache_dir / 'results'
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.workbook_cache.enabled
+
+    @staticmethod
+    def metric_key(namespace, metric, patterns):
+        """کلید یک متغیر بر اساس فضای نام تحلیلگر، نام متغیر و الگوهای آن"""
+        key = json.dumps([CACHE_VERSION, namespace, metric, list(patterns)], ensure_ascii=False)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+    def _entry_path(self, file_path):
+        digest = self.workbook_cache.content_hash(file_path)
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def lookup(self, file_path, namespace, search_patterns, sources=None):
+        """مقادیر ذخیره شده متغیرهایی که الگوهایشان تغییر نکرده است
+
+        اگر دیکشنری sources داده شود سلول منبع ذخیره شده هر مقدار در آن ثبت می‌شود.
+        """
+        if not self.enabled:
+            return {}
+
+        entries = self._load(self._entry_path(file_path))
+        found = {}
+        for metric, patterns in search_patterns.items():
+            key = self.metric_key(namespace, metric, patterns)
+            if key in entries:
+                found[metric] = entries[key]
+                if sources is not None and entries.get(key + '@'):
+                    sources[metric] = entries[key + '@']
+        self.hits += len(found)
+        self.misses += len(search_patterns) - len(found)
+        return found
+
+    def update(self, file_path, namespace, search_patterns, values, sources=None):
+        """ذخیره مقادیر تازه استخراج شده (و سلول منبع آن‌ها) در کنار ورودی‌های قبلی فایل"""
+        if not self.enabled or not values:
+            return
+
+        path = self._entry_path(file_path)
+        entries = self._load(path)
+        for metric, value in values.items():
+            key = self.metric_key(namespace, metric, search_patterns[metric])
+            entries[key] = None if value is None else float(value)
+            entries.pop(key + '@', None)
+            if sources and sources.get(metric):
+                entries[key + '@'] = sources[metric]
+
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+
+        try:
+            atomic_write(path, write)
+        except Exception as e:
+            logger.warning("خطا در ذخیره کش نتایج %s: %s", path, e)
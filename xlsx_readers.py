@@ -0,0 +1,270 @@
+import os
+import time
+import zipfile
+import importlib.util
+import posixpath
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+class ExcelReader:
+    """پایه خواننده‌های اکسل؛ هر خواننده زمان و تعداد خواندن‌های خود را ثبت می‌کند"""
+
+    name = None
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def _read(self, file_path, sheet_name, **kwargs):
+        raise NotImplementedError
+
+    def read_excel(self, file_path, sheet_name=0, **kwargs):
+        """خواندن یک شیت (یا همه شیت‌ها با sheet_name=None) با معنای pd.read_excel"""
+        start = time.perf_counter()
+        try:
+            return self._read(file_path, sheet_name, **kwargs)
+        finally:
+            self.calls += 1
+            self.seconds += time.perf_counter() - start
+
+    def timing(self):
+        """خلاصه زمان‌بندی این خواننده"""
+        return {
+            'reader': self.name,
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'avg_ms': self.seconds / self.calls * 1000 if self.calls else 0.0
+        }
+
+
+class PandasReader(ExcelReader):
+    """خواندن با pd.read_excel و موتور مشخص (openpyxl یا calamine)"""
+
+    def __init__(self, engine='openpyxl'):
+        super().__init__()
+        self.engine = engine
+        self.name = engine
+
+    def _read(self, file_path, sheet_name, **kwargs):
+        kwargs.pop('engine', None)
+        return pd.read_excel(file_path, sheet_name=sheet_name, engine=self.engine, **kwargs)
+
+
+class StreamingReader(ExcelReader):
+    """خواندن مستقیم sheetN.xml و sharedStrings.xml از فایل zip با iterparse
+
+    فقط متن و عدد سلول‌ها خوانده می‌شود؛ استایل‌ها و فرمول‌ها نادیده گرفته
+    می‌شوند (مقدار ذخیره شده فرمول استفاده می‌شود و تاریخ‌ها به صورت عدد سریال
+    اکسل برمی‌گردند).
+    """
+
+    name = 'stream'
+
+    def _read(self, file_path, sheet_name, header=0, dtype=None, na_filter=True, **kwargs):
+        kwargs.pop('engine', None)
+        with zipfile.ZipFile(file_path) as archive:
+            sheets = self._sheet_paths(archive)
+            shared_strings = None
+
+            if sheet_name is None:
+                selected = list(sheets)
+            elif isinstance(sheet_name, int):
+                selected = [list(sheets)[sheet_name]]
+            else:
+                if sheet_name not in sheets:
+                    raise ValueError(f"Worksheet named '{sheet_name}' not found")
+                selected = [sheet_name]
+
+            output = {}
+            for name in selected:
+                if shared_strings is None:
+                    shared_strings = self._shared_strings(archive)
+                data = self._sheet_data(archive, sheets[name], shared_strings)
+                output[name] = self._to_frame(data, header, dtype, na_filter, kwargs)
+
+        if sheet_name is None:
+            return output
+        return output[selected[0]]
+
+    @staticmethod
+    def _sheet_paths(archive):
+        """نگاشت نام شیت‌ها به مسیر XML آن‌ها به ترتیب فایل"""
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{PKG_REL_NS}Relationship')}
+
+        sheets = {}
+        for sheet in workbook.iter(f'{MAIN_NS}sheet'):
+            target = targets[sheet.get(f'{REL_NS}id')]
+            if target.startswith('/'):
+                path = target.lstrip('/')
+            else:
+                path = posixpath.normpath(posixpath.join('xl', target))
+            sheets[sheet.get('name')] = path
+        return sheets
+
+    @staticmethod
+    def _shared_strings(archive):
+        """خواندن جدول رشته‌های مشترک"""
+        if 'xl/sharedStrings.xml' not in archive.namelist():
+            return []
+
+        strings = []
+        with archive.open('xl/sharedStrings.xml') as f:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == f'{MAIN_NS}si':
+                    strings.append(StreamingReader._rich_text(elem))
+                    elem.clear()
+        return strings
+
+    @staticmethod
+    def _rich_text(elem):
+        """متن یک رشته ساده یا چندبخشی (بدون متن آوایی rPh)"""
+        parts = []
+        for child in elem:
+            if child.tag == f'{MAIN_NS}t':
+                parts.append(child.text or '')
+            elif child.tag == f'{MAIN_NS}r':
+                parts.extend(t.text or '' for t in child.iter(f'{MAIN_NS}t'))
+        return ''.join(parts)
+
+    @staticmethod
+    def _column_index(ref):
+        """تبدیل مرجع سلول (مثل AB12) به شماره ستون از صفر"""
+        col = 0
+        for char in ref:
+            if not char.isalpha():
+                break
+            col = col * 26 + (ord(char.upper()) - 64)
+        return col - 1
+
+    def _sheet_data(self, archive, path, shared_strings):
+        """سطرهای شیت به صورت لیست مقادیر، با همان قواعد خواننده openpyxl در pandas"""
+        data = []
+        with archive.open(path) as f:
+            row_number = -1
+            for _, elem in ET.iterparse(f):
+                if elem.tag != f'{MAIN_NS}row':
+                    continue
+
+                ref = elem.get('r')
+                row_number = int(ref) - 1 if ref else row_number + 1
+                while len(data) < row_number:
+                    data.append([])
+
+                row = []
+                col = -1
+                for cell in elem.iter(f'{MAIN_NS}c'):
+                    ref = cell.get('r')
+                    col = self._column_index(ref) if ref else col + 1
+                    value = self._cell_value(cell, shared_strings)
+                    if value == '':
+                        continue
+                    row.extend([''] * (col - len(row)))
+                    row.append(value)
+
+                data.append(row)
+                elem.clear()
+
+        # حذف سطرهای خالی انتهایی و هم‌عرض کردن سطرها
+        while data and not data[-1]:
+            data.pop()
+        if data:
+            width = max(len(row) for row in data)
+            data = [row + [''] * (width - len(row)) for row in data]
+        return data
+
+    @staticmethod
+    def _cell_value(cell, shared_strings):
+        """مقدار یک سلول؛ عدد صحیح، اعشاری، متن یا بولی"""
+        cell_type = cell.get('t', 'n')
+
+        if cell_type == 'inlineStr':
+            inline = cell.find(f'{MAIN_NS}is')
+            return StreamingReader._rich_text(inline) if inline is not None else ''
+
+        v = cell.find(f'{MAIN_NS}v')
+        if v is None or v.text is None:
+            return ''
+        text = v.text
+
+        if cell_type == 's':
+            return shared_strings[int(text)]
+        if cell_type in ('str', 'd'):
+            return text
+        if cell_type == 'b':
+            return text == '1'
+        if cell_type == 'e':
+            return float('nan')
+
+        number = float(text)
+        return int(number) if number.is_integer() else number
+
+    @staticmethod
+    def _to_frame(data, header, dtype, na_filter, kwargs):
+        """ساخت دیتافریم با همان تبدیل نوع pd.read_excel"""
+        try:
+            parser = TextParser(
+                data,
+                header=header,
+                dtype=dtype,
+                na_filter=na_filter,
+                skip_blank_lines=False,
+                **kwargs
+            )
+            return parser.read()
+        except EmptyDataError:
+            return pd.DataFrame()
+
+
+def available_readers():
+    """نام خواننده‌هایی که در این محیط قابل استفاده‌اند"""
+    names = ['openpyxl', 'stream']
+    if importlib.util.find_spec('python_calamine') is not None:
+        names.insert(1, 'calamine')
+    return names
+
+
+def get_reader(name=None):
+    """ساخت خواننده با نام مشخص (پیش‌فرض از متغیر محیطی EXALL_XLSX_READER)"""
+    name = name or os.getenv('EXALL_XLSX_READER', 'openpyxl')
+    if name == 'stream':
+        return StreamingReader()
+    if name not in available_readers():
+        raise ValueError(f"خواننده {name} در دسترس نیست؛ گزینه‌ها: {', '.join(available_readers())}")
+    return PandasReader(name)
+
+
+def compare_readers(files, names=None, **read_kwargs):
+    """اجرای همه خواننده‌ها روی فایل‌ها و گزارش زمان و تفاوت خروجی هر کدام"""
+    names = names or available_readers()
+    report = []
+    reference = {}
+
+    for name in names:
+        reader = get_reader(name)
+        mismatches = 0
+        for file_path in files:
+            sheets = reader.read_excel(file_path, sheet_name=None, **read_kwargs)
+            if file_path not in reference:
+                reference[file_path] = sheets
+            elif any(
+                name_ not in sheets or not sheets[name_].equals(df)
+                for name_, df in reference[file_path].items()
+            ):
+                mismatches += 1
+
+        timing = reader.timing()
+        timing['files_per_sec'] = len(files) / timing['seconds'] if timing['seconds'] else 0.0
+        timing['mismatches'] = mismatches
+        report.append(timing)
+
+    return sorted(report, key=lambda r: r['seconds'])